@@ -0,0 +1,106 @@
+"""pack action log field changes
+
+Revision ID: 0b6d4f2e8c15
+Revises: f3b8e1d94a27
+Create Date: 2026-10-18 20:47:26.503917
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import msgpack
+import sqlalchemy as sa
+# https://arunanshub.hashnode.dev/using-sqlmodel-with-alembic
+import sqlmodel.sql.sqltypes
+
+
+# revision identifiers, used by Alembic.
+revision: str = '0b6d4f2e8c15'
+down_revision: Union[str, None] = 'f3b8e1d94a27'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+# Columns are added, dropped and renamed with plain ALTER TABLE rather than
+# in batch mode, so SQLite never recreates action_log (and its full-text
+# search triggers) and Postgres applies them to every partition.
+
+# pack218.audit.encoding's code table and encoder as of this revision,
+# copied so the stored bytes never depend on later code. The live
+# FIELD_NAMES is append-only and must keep this tuple as its prefix
+# (tests/test_audit_log.py checks it), so rows packed here stay readable.
+_FIELD_NAMES = (
+    # diff_for() delete payloads
+    "_action", "snapshot",
+    # shared
+    "id", "family_id", "user_id", "event_id",
+    # User
+    "username", "hashed_password", "is_admin", "first_name", "last_name",
+    "family_member_type", "gender", "email", "phone_number",
+    "has_food_allergies", "food_allergies_detail", "has_food_intolerances",
+    "food_intolerances", "can_login", "email_confirmed", "email_confirmation_code",
+    # Family
+    "family_name",
+    "emergency_contact_first_name_1", "emergency_contact_last_name_1", "emergency_contact_phone_number_1",
+    "emergency_contact_first_name_2", "emergency_contact_last_name_2", "emergency_contact_phone_number_2",
+    "car_license_plates",
+    # Event
+    "event_type", "date", "location", "details", "duration_in_days", "capacity", "cancelled",
+    # EventRegistration
+    "registration_ts", "stay_friday_night", "stay_saturday_night",
+    "eat_saturday_breakfast", "eat_saturday_lunch", "eat_saturday_dinner", "eat_sunday_breakfast",
+    "has_paid",
+)
+_FIELD_CODES = {name: code for code, name in enumerate(_FIELD_NAMES)}
+
+
+def _map_keys(value, mapping):
+    if isinstance(value, dict):
+        return {mapping(key): _map_keys(item, mapping) for key, item in value.items()}
+    return value
+
+
+def _pack(field_changes: dict) -> bytes:
+    return msgpack.packb(_map_keys(field_changes, lambda key: _FIELD_CODES.get(key, key)), use_bin_type=True)
+
+
+def _unpack(data: bytes) -> dict:
+    return _map_keys(
+        msgpack.unpackb(data, raw=False, strict_map_key=False),
+        lambda key: _FIELD_NAMES[key] if isinstance(key, int) else key,
+    )
+
+
+_EMPTY = {'sqlite': {'packed': "X'80'", 'json': "'{}'"},
+          'postgresql': {'packed': "'\\x80'::bytea", 'json': "'{}'::json"}}
+
+
+def _convert(from_type, to_type, kind: str, convert) -> None:
+    bind = op.get_bind()
+    op.add_column('action_log', sa.Column(
+        'field_changes_new', to_type, nullable=False,
+        server_default=sa.text(_EMPTY[bind.dialect.name][kind]),
+    ))
+    action_log = sa.table(
+        'action_log',
+        sa.column('id', sa.Integer),
+        sa.column('field_changes', from_type),
+        sa.column('field_changes_new', to_type),
+    )
+    rows = bind.execute(sa.select(action_log.c.id, action_log.c.field_changes)).all()
+    updates = [{'row_id': row.id, 'value': convert(row.field_changes or {})} for row in rows]
+    if updates:
+        bind.execute(
+            action_log.update().where(action_log.c.id == sa.bindparam('row_id'))
+            .values(field_changes_new=sa.bindparam('value')),
+            updates,
+        )
+    op.execute("ALTER TABLE action_log DROP COLUMN field_changes")
+    op.execute("ALTER TABLE action_log RENAME COLUMN field_changes_new TO field_changes")
+
+
+def upgrade() -> None:
+    _convert(sa.JSON(), sa.LargeBinary(), 'packed', _pack)
+
+
+def downgrade() -> None:
+    _convert(sa.LargeBinary(), sa.JSON(), 'json', lambda value: _unpack(value) if value else {})
@@ -0,0 +1,107 @@
+"""add waitlist position to eventregistration
+
+Revision ID: 47545fa5e05f
+Revises: 9ed788ef938a
+Create Date: 2026-10-18 09:12:41.208113
+
+"""
+import itertools
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+# https://arunanshub.hashnode.dev/using-sqlmodel-with-alembic
+import sqlmodel.sql.sqltypes
+
+
+# revision identifiers, used by Alembic.
+revision: str = '47545fa5e05f'
+down_revision: Union[str, None] = '9ed788ef938a'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    with op.batch_alter_table('eventregistration', schema=None) as batch_op:
+        batch_op.add_column(sa.Column('waitlist_position', sa.Integer(), nullable=True))
+        batch_op.create_index('ix_eventregistration_event_waitlist', ['event_id', 'waitlist_position'], unique=False)
+
+    # Backfill the materialized positions for events that have a capacity.
+    # The waitlist rules are copied here as they are at this revision
+    # (EventRegistration.compute_waitlist_positions), over tables frozen at
+    # this revision, so later model or rule changes do not alter it.
+    bind = op.get_bind()
+    registration = sa.table(
+        'eventregistration',
+        sa.column('id', sa.Integer), sa.column('event_id', sa.Integer),
+        sa.column('user_id', sa.Integer), sa.column('registration_ts', sa.DateTime),
+        sa.column('waitlist_position', sa.Integer),
+    )
+    user = sa.table('user', sa.column('id', sa.Integer), sa.column('family_id', sa.Integer))
+    event = sa.table('event', sa.column('id', sa.Integer), sa.column('capacity', sa.Integer))
+    rows = bind.execute(
+        sa.select(
+            registration.c.event_id, registration.c.id, registration.c.registration_ts,
+            user.c.family_id, event.c.capacity,
+        )
+        .join(user, user.c.id == registration.c.user_id)
+        .join(event, event.c.id == registration.c.event_id)
+        .where(event.c.capacity > 0)
+        .order_by(registration.c.event_id, registration.c.registration_ts, registration.c.id)
+    ).all()
+
+    positions = []
+    for _event_id, event_rows in itertools.groupby(rows, key=lambda row: row.event_id):
+        event_rows = list(event_rows)
+        positions += _waitlist_positions(event_rows, event_rows[0].capacity)
+    if positions:
+        bind.execute(
+            registration.update()
+            .where(registration.c.id == sa.bindparam('registration_id'))
+            .values(waitlist_position=sa.bindparam('position')),
+            positions,
+        )
+
+
+def _waitlist_positions(rows, capacity: int) -> list[dict]:
+    """``{registration_id, position}`` for the waitlisted registrations of one event.
+
+    ``rows`` are in (registration_ts, id) order. Members of a family
+    registered at the same time form one batch; batches are admitted until
+    the headcount reaches capacity, a family with any admitted batch is
+    never waitlisted, and waitlisted batches share a 1-based position.
+    """
+    batches = []
+    same_ts_batches = {}
+    previous_ts = None
+    for row in rows:
+        if row.registration_ts != previous_ts:
+            same_ts_batches = {}
+            previous_ts = row.registration_ts
+        batch = same_ts_batches.get(row.family_id)
+        if batch is None:
+            batch = same_ts_batches[row.family_id] = []
+            batches.append((row.family_id, batch))
+        batch.append(row.id)
+
+    waitlisted, admitted_families, headcount = [], set(), 0
+    for family_id, batch in batches:
+        if headcount >= capacity:
+            waitlisted.append((family_id, batch))
+        else:
+            headcount += len(batch)
+            admitted_families.add(family_id)
+
+    positions, position = [], 0
+    for family_id, batch in waitlisted:
+        if family_id in admitted_families:
+            continue
+        position += 1
+        positions += [{'registration_id': registration_id, 'position': position} for registration_id in batch]
+    return positions
+
+
+def downgrade() -> None:
+    with op.batch_alter_table('eventregistration', schema=None) as batch_op:
+        batch_op.drop_index('ix_eventregistration_event_waitlist')
+        batch_op.drop_column('waitlist_position')
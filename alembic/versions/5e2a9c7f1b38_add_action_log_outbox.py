@@ -0,0 +1,112 @@
+"""add action log outbox
+
+Revision ID: 5e2a9c7f1b38
+Revises: 0b6d4f2e8c15
+Create Date: 2026-10-18 21:26:40.871204
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import msgpack
+import sqlalchemy as sa
+# https://arunanshub.hashnode.dev/using-sqlmodel-with-alembic
+import sqlmodel.sql.sqltypes
+
+
+# revision identifiers, used by Alembic.
+revision: str = '5e2a9c7f1b38'
+down_revision: Union[str, None] = '0b6d4f2e8c15'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+# The downgrade decodes queued field_changes and builds their search_text the
+# way pack218.audit.encoding and pack218.audit.search do at this revision,
+# copied so later changes there cannot alter it.
+_FIELD_NAMES = (
+    # diff_for() delete payloads
+    "_action", "snapshot",
+    # shared
+    "id", "family_id", "user_id", "event_id",
+    # User
+    "username", "hashed_password", "is_admin", "first_name", "last_name",
+    "family_member_type", "gender", "email", "phone_number",
+    "has_food_allergies", "food_allergies_detail", "has_food_intolerances",
+    "food_intolerances", "can_login", "email_confirmed", "email_confirmation_code",
+    # Family
+    "family_name",
+    "emergency_contact_first_name_1", "emergency_contact_last_name_1", "emergency_contact_phone_number_1",
+    "emergency_contact_first_name_2", "emergency_contact_last_name_2", "emergency_contact_phone_number_2",
+    "car_license_plates",
+    # Event
+    "event_type", "date", "location", "details", "duration_in_days", "capacity", "cancelled",
+    # EventRegistration
+    "registration_ts", "stay_friday_night", "stay_saturday_night",
+    "eat_saturday_breakfast", "eat_saturday_lunch", "eat_saturday_dinner", "eat_sunday_breakfast",
+    "has_paid",
+)
+
+
+def _unpack(data: bytes) -> dict:
+    def decode(value):
+        if isinstance(value, dict):
+            return {_FIELD_NAMES[key] if isinstance(key, int) else key: decode(item) for key, item in value.items()}
+        return value
+    return decode(msgpack.unpackb(data, raw=False, strict_map_key=False))
+
+
+_REDACTED = '<redacted>'
+
+
+def _search_text(entity_name, action, field_changes, reason) -> str:
+    field_changes = field_changes or {}
+    if field_changes.get('_action') == 'delete':
+        values = list(field_changes.get('snapshot', {}).values())
+    else:
+        values = []
+        for change in field_changes.values():
+            values.extend(change if isinstance(change, list) else [change])
+    parts = [entity_name, action, reason]
+    parts.extend(field for field in field_changes if field != '_action')
+    parts.extend(value for value in values if value != _REDACTED)
+    return ' '.join(str(part) for part in parts if part not in (None, ''))
+
+
+def upgrade() -> None:
+    op.create_table(
+        'action_log_outbox',
+        sa.Column('id', sa.Integer(), nullable=False),
+        sa.Column('actor_user_id', sa.Integer(), nullable=True),
+        sa.Column('subject_user_id', sa.Integer(), nullable=True),
+        sa.Column('subject_family_id', sa.Integer(), nullable=True),
+        sa.Column('entity_name', sa.String(), nullable=False),
+        sa.Column('entity_id', sa.Integer(), nullable=False),
+        sa.Column('action', sa.String(), nullable=False),
+        sa.Column('field_changes', sa.LargeBinary(), nullable=False),
+        sa.Column('reason', sqlmodel.sql.sqltypes.AutoString(), nullable=True),
+        sa.Column('created_at', sa.DateTime(), nullable=False),
+        sa.PrimaryKeyConstraint('id', name=op.f('pk_action_log_outbox')),
+    )
+
+
+def downgrade() -> None:
+    # Move anything still queued into action_log first, so no audit row is lost.
+    bind = op.get_bind()
+    outbox = sa.table(
+        'action_log_outbox', *(sa.column(name) for name in (
+            'id', 'actor_user_id', 'subject_user_id', 'subject_family_id', 'entity_name',
+            'entity_id', 'action', 'reason', 'created_at')),
+        sa.column('field_changes', sa.LargeBinary),
+    )
+    queued = bind.execute(sa.select(outbox).order_by(outbox.c.id)).mappings().all()
+    if queued:
+        action_log = sa.table('action_log', *(sa.column(name) for name in (
+            'actor_user_id', 'subject_user_id', 'subject_family_id', 'entity_name', 'entity_id',
+            'action', 'field_changes', 'reason', 'created_at', 'search_text')))
+        bind.execute(action_log.insert(), [
+            {**{key: value for key, value in row.items() if key != 'id'},
+             'search_text': _search_text(row['entity_name'], row['action'],
+                                         _unpack(row['field_changes']), row['reason'])}
+            for row in queued
+        ])
+    op.drop_table('action_log_outbox')
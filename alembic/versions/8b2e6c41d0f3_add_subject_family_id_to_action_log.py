@@ -0,0 +1,49 @@
+"""add subject family id to action log
+
+Revision ID: 8b2e6c41d0f3
+Revises: 5d3f0a9c7b21
+Create Date: 2026-10-18 17:48:36.902114
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+# https://arunanshub.hashnode.dev/using-sqlmodel-with-alembic
+import sqlmodel.sql.sqltypes
+
+
+# revision identifiers, used by Alembic.
+revision: str = '8b2e6c41d0f3'
+down_revision: Union[str, None] = '5d3f0a9c7b21'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    with op.batch_alter_table('action_log', schema=None) as batch_op:
+        batch_op.add_column(sa.Column('subject_family_id', sa.Integer(), nullable=True))
+
+    # Backfill: Family rows point at the family itself; User and
+    # EventRegistration rows take their subject's current family, the
+    # closest we can get to the family at write time for historic rows.
+    op.execute(
+        "UPDATE action_log SET subject_family_id = entity_id "
+        "WHERE entity_name = 'Family'"
+    )
+    op.execute(
+        'UPDATE action_log SET subject_family_id = '
+        '(SELECT "user".family_id FROM "user" WHERE "user".id = action_log.subject_user_id) '
+        'WHERE subject_user_id IS NOT NULL'
+    )
+
+    op.create_index(
+        'ix_action_log_subject_family_created', 'action_log',
+        ['subject_family_id', sa.text('created_at DESC')], unique=False,
+    )
+
+
+def downgrade() -> None:
+    op.drop_index('ix_action_log_subject_family_created', table_name='action_log')
+    with op.batch_alter_table('action_log', schema=None) as batch_op:
+        batch_op.drop_column('subject_family_id')
@@ -0,0 +1,30 @@
+"""add action log created id index
+
+Revision ID: a7c9d2e4f613
+Revises: e41a7c93b5d8
+Create Date: 2026-10-18 19:12:47.330519
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+# https://arunanshub.hashnode.dev/using-sqlmodel-with-alembic
+import sqlmodel.sql.sqltypes
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'a7c9d2e4f613'
+down_revision: Union[str, None] = 'e41a7c93b5d8'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    # Outside batch mode so SQLite never recreates action_log, which would
+    # drop the full-text search triggers along with it.
+    op.create_index('ix_action_log_created_id', 'action_log', ['created_at', 'id'], unique=False)
+
+
+def downgrade() -> None:
+    op.drop_index('ix_action_log_created_id', table_name='action_log')
@@ -0,0 +1,77 @@
+"""store event date as date
+
+Revision ID: cc01696a2d9c
+Revises: 1c0ba5ca6b11
+Create Date: 2026-10-18 10:41:52.093377
+
+"""
+from datetime import datetime
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+# https://arunanshub.hashnode.dev/using-sqlmodel-with-alembic
+import sqlmodel.sql.sqltypes
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'cc01696a2d9c'
+down_revision: Union[str, None] = '1c0ba5ca6b11'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    # Existing values are 'YYYY-MM-DD' strings (validated by is_date, which
+    # did not require zero padding).
+    if op.get_bind().dialect.name == 'sqlite':
+        # A batch type change copies rows through CAST(date AS DATE), and
+        # SQLite's NUMERIC affinity turns '2026-06-01' into 2026. Copy the
+        # text into a fresh DATE column instead (SQLite stores DATE as the
+        # same ISO text), then swap it in.
+        _swap_sqlite_date_column(sa.Date())
+    else:
+        with op.batch_alter_table('event', schema=None) as batch_op:
+            batch_op.alter_column(
+                'date',
+                existing_type=sqlmodel.sql.sqltypes.AutoString(),
+                type_=sa.Date(),
+                existing_nullable=False,
+                postgresql_using='date::date',
+            )
+
+
+def downgrade() -> None:
+    if op.get_bind().dialect.name == 'sqlite':
+        _swap_sqlite_date_column(sa.String())
+    else:
+        with op.batch_alter_table('event', schema=None) as batch_op:
+            batch_op.alter_column(
+                'date',
+                existing_type=sa.Date(),
+                type_=sqlmodel.sql.sqltypes.AutoString(),
+                existing_nullable=False,
+                postgresql_using="to_char(date, 'YYYY-MM-DD')",
+            )
+
+
+def _swap_sqlite_date_column(type_) -> None:
+    with op.batch_alter_table('event', schema=None) as batch_op:
+        batch_op.drop_index('ix_event_date')
+        batch_op.add_column(sa.Column('date_new', type_, nullable=True))
+    # Parse every value rather than copying the text: strptime (and so
+    # is_date) accepted unpadded dates like '2026-6-1', which would compare
+    # wrongly as text. SQLite stores DATE as ISO text, so write isoformat().
+    bind = op.get_bind()
+    rows = bind.execute(sa.text("SELECT id, date FROM event")).all()
+    if rows:
+        bind.execute(
+            sa.text("UPDATE event SET date_new = :date WHERE id = :id"),
+            [{'id': id_, 'date': datetime.strptime(str(value), '%Y-%m-%d').date().isoformat()}
+             for id_, value in rows],
+        )
+    with op.batch_alter_table('event', schema=None) as batch_op:
+        batch_op.drop_column('date')
+    with op.batch_alter_table('event', schema=None) as batch_op:
+        batch_op.alter_column('date_new', new_column_name='date', existing_type=type_, nullable=False)
+    op.create_index('ix_event_date', 'event', ['date'], unique=False)
@@ -0,0 +1,107 @@
+"""add action log search index
+
+Revision ID: e41a7c93b5d8
+Revises: 8b2e6c41d0f3
+Create Date: 2026-10-18 18:31:04.755190
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+# https://arunanshub.hashnode.dev/using-sqlmodel-with-alembic
+import sqlmodel.sql.sqltypes
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'e41a7c93b5d8'
+down_revision: Union[str, None] = '8b2e6c41d0f3'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+# The index and the indexed text as pack218.audit.search defines them at this
+# revision, copied so later changes there cannot rewrite this migration.
+_SEARCH_DDL = {
+    'sqlite': [
+        "CREATE VIRTUAL TABLE action_log_fts USING fts5("
+        "search_text, content='action_log', content_rowid='id', "
+        "tokenize='unicode61 remove_diacritics 2')",
+        "CREATE TRIGGER action_log_fts_insert AFTER INSERT ON action_log BEGIN "
+        "INSERT INTO action_log_fts(rowid, search_text) VALUES (new.id, new.search_text); END",
+        "CREATE TRIGGER action_log_fts_delete AFTER DELETE ON action_log BEGIN "
+        "INSERT INTO action_log_fts(action_log_fts, rowid, search_text) "
+        "VALUES ('delete', old.id, old.search_text); END",
+        "CREATE TRIGGER action_log_fts_update AFTER UPDATE OF search_text ON action_log BEGIN "
+        "INSERT INTO action_log_fts(action_log_fts, rowid, search_text) "
+        "VALUES ('delete', old.id, old.search_text); "
+        "INSERT INTO action_log_fts(rowid, search_text) VALUES (new.id, new.search_text); END",
+    ],
+    'postgresql': [
+        "ALTER TABLE action_log ADD COLUMN search_vector tsvector "
+        "GENERATED ALWAYS AS (to_tsvector('simple', search_text)) STORED",
+        "CREATE INDEX ix_action_log_search_vector ON action_log USING gin (search_vector)",
+    ],
+}
+
+_REDACTED = '<redacted>'
+
+
+def _search_text(entity_name, action, field_changes, reason) -> str:
+    field_changes = field_changes or {}
+    if field_changes.get('_action') == 'delete':
+        values = list(field_changes.get('snapshot', {}).values())
+    else:
+        values = []
+        for change in field_changes.values():
+            values.extend(change if isinstance(change, list) else [change])
+    parts = [entity_name, action, reason]
+    parts.extend(field for field in field_changes if field != '_action')
+    parts.extend(value for value in values if value != _REDACTED)
+    return ' '.join(str(part) for part in parts if part not in (None, ''))
+
+
+def upgrade() -> None:
+    with op.batch_alter_table('action_log', schema=None) as batch_op:
+        batch_op.add_column(sa.Column('search_text', sa.Text(), nullable=False, server_default=''))
+
+    # Backfill with the same text record_change() writes from now on.
+    bind = op.get_bind()
+    action_log = sa.table(
+        'action_log',
+        sa.column('id', sa.Integer), sa.column('entity_name', sa.String),
+        sa.column('action', sa.String), sa.column('field_changes', sa.JSON),
+        sa.column('reason', sa.String), sa.column('search_text', sa.Text),
+    )
+    rows = bind.execute(sa.select(
+        action_log.c.id, action_log.c.entity_name, action_log.c.action,
+        action_log.c.field_changes, action_log.c.reason,
+    )).all()
+    updates = [
+        {'row_id': row.id, 'text': _search_text(row.entity_name, row.action, row.field_changes, row.reason)}
+        for row in rows
+    ]
+    if updates:
+        bind.execute(
+            action_log.update().where(action_log.c.id == sa.bindparam('row_id'))
+            .values(search_text=sa.bindparam('text')),
+            updates,
+        )
+
+    for statement in _SEARCH_DDL.get(bind.dialect.name, []):
+        op.execute(statement)
+    if bind.dialect.name == 'sqlite':
+        op.execute("INSERT INTO action_log_fts(action_log_fts) VALUES ('rebuild')")
+
+
+def downgrade() -> None:
+    bind = op.get_bind()
+    if bind.dialect.name == 'sqlite':
+        for trigger in ('action_log_fts_insert', 'action_log_fts_delete', 'action_log_fts_update'):
+            op.execute(f"DROP TRIGGER {trigger}")
+        op.execute("DROP TABLE action_log_fts")
+    elif bind.dialect.name == 'postgresql':
+        op.execute("DROP INDEX ix_action_log_search_vector")
+        op.execute("ALTER TABLE action_log DROP COLUMN search_vector")
+
+    with op.batch_alter_table('action_log', schema=None) as batch_op:
+        batch_op.drop_column('search_text')
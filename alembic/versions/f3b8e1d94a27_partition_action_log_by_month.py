@@ -0,0 +1,110 @@
+"""partition action log by month
+
+Revision ID: f3b8e1d94a27
+Revises: a7c9d2e4f613
+Create Date: 2026-10-18 20:04:51.118342
+
+"""
+from datetime import date
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+# https://arunanshub.hashnode.dev/using-sqlmodel-with-alembic
+import sqlmodel.sql.sqltypes
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'f3b8e1d94a27'
+down_revision: Union[str, None] = 'a7c9d2e4f613'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+# Postgres only: SQLite has no declarative partitioning and keeps one
+# action_log table (pack218.audit.archive bounds its size instead).
+
+_COLUMNS = (
+    "id, actor_user_id, subject_user_id, subject_family_id, entity_name, entity_id, "
+    "action, field_changes, reason, created_at, search_text"
+)
+_MONTHS_AHEAD = 3
+
+
+def _add_months(month: date, n: int) -> date:
+    index = month.year * 12 + month.month - 1 + n
+    return date(index // 12, index % 12 + 1, 1)
+
+
+def _drop_indexes(table: str) -> None:
+    for name in (
+        'ix_action_log_actor_user_id', 'ix_action_log_entity', 'ix_action_log_subject_created',
+        'ix_action_log_subject_actor_created', 'ix_action_log_subject_family_created',
+        'ix_action_log_created_id', 'ix_action_log_search_vector',
+    ):
+        op.drop_index(name, table_name=table)
+
+
+def _create_indexes() -> None:
+    op.create_index('ix_action_log_actor_user_id', 'action_log', ['actor_user_id'])
+    op.create_index('ix_action_log_entity', 'action_log', ['entity_name', 'entity_id'])
+    op.create_index('ix_action_log_subject_created', 'action_log', ['subject_user_id', 'created_at'])
+    op.create_index('ix_action_log_subject_actor_created', 'action_log',
+                    ['subject_user_id', 'actor_user_id', 'created_at'])
+    op.create_index('ix_action_log_subject_family_created', 'action_log',
+                    ['subject_family_id', sa.text('created_at DESC')])
+    op.create_index('ix_action_log_created_id', 'action_log', ['created_at', 'id'])
+    op.create_index('ix_action_log_search_vector', 'action_log', ['search_vector'], postgresql_using='gin')
+
+
+def _rebuild(old: str, body: str, suffix: str = '') -> None:
+    """Rename action_log to ``old``, create the new action_log from ``body``,
+    copy the rows over and move the id sequence to the new table."""
+    op.execute(f"ALTER TABLE action_log RENAME TO {old}")
+    op.execute(f"ALTER TABLE {old} RENAME CONSTRAINT pk_action_log TO pk_{old}")
+    _drop_indexes(old)
+    op.execute(
+        f"CREATE TABLE action_log (LIKE {old} INCLUDING DEFAULTS INCLUDING GENERATED, "
+        f"CONSTRAINT pk_action_log {body}, "
+        "CONSTRAINT fk_action_log_actor_user_id_user FOREIGN KEY (actor_user_id) REFERENCES \"user\" (id), "
+        f"CONSTRAINT fk_action_log_subject_user_id_user FOREIGN KEY (subject_user_id) REFERENCES \"user\" (id)){suffix}"
+    )
+
+
+def _finish(old: str) -> None:
+    op.execute(f"INSERT INTO action_log ({_COLUMNS}) SELECT {_COLUMNS} FROM {old}")
+    op.execute("ALTER SEQUENCE action_log_id_seq OWNED BY action_log.id")
+    op.execute(f"DROP TABLE {old} CASCADE")
+    _create_indexes()
+
+
+def upgrade() -> None:
+    bind = op.get_bind()
+    if bind.dialect.name != 'postgresql':
+        return
+
+    _rebuild('action_log_unpartitioned', 'PRIMARY KEY (id, created_at)', ' PARTITION BY RANGE (created_at)')
+
+    # One partition per month from the oldest row to a few months ahead;
+    # pack218.audit.archive.ensure_action_log_partitions() keeps it ahead.
+    this_month = date.today().replace(day=1)
+    oldest = bind.execute(sa.text("SELECT min(created_at) FROM action_log_unpartitioned")).scalar()
+    month = min(oldest.date().replace(day=1), this_month) if oldest else this_month
+    while month <= _add_months(this_month, _MONTHS_AHEAD):
+        end = _add_months(month, 1)
+        op.execute(
+            f"CREATE TABLE action_log_y{month.year:04d}m{month.month:02d} PARTITION OF action_log "
+            f"FOR VALUES FROM ('{month.isoformat()}') TO ('{end.isoformat()}')"
+        )
+        month = end
+    op.execute("CREATE TABLE action_log_default PARTITION OF action_log DEFAULT")
+
+    _finish('action_log_unpartitioned')
+
+
+def downgrade() -> None:
+    bind = op.get_bind()
+    if bind.dialect.name != 'postgresql':
+        return
+
+    _rebuild('action_log_partitioned', 'PRIMARY KEY (id)')
+    _finish('action_log_partitioned')
@@ -0,0 +1,108 @@
+"""Bytes per ActionLog row spent on field_changes: JSON vs. the packed encoding.
+
+Builds a realistic log (families signing up, parents and kids with their
+profiles, a camping trip with registrations, edits and cancellations)
+through the normal save() / delete_by_id() paths, then reports the stored
+field_changes size per action next to what the same diffs took as JSON.
+
+    PACK218_STORAGE_KEY=x PACK218_APP_URL=http://x PACK218_USE_SQLITE=1 \\
+        python benchmarks/action_log_row_size.py --families 40
+"""
+import argparse
+import json
+import os
+import statistics
+import sys
+from collections import defaultdict
+
+os.environ.setdefault("PACK218_STORAGE_KEY", "benchmark")
+os.environ.setdefault("PACK218_APP_URL", "http://localhost")
+os.environ.setdefault("PACK218_USE_SQLITE", "1")
+# Run from a checkout without installing it: import pack218 from the repo root.
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from sqlalchemy import text  # noqa: E402
+from sqlalchemy.pool import StaticPool  # noqa: E402
+from sqlmodel import Session, SQLModel, create_engine, select  # noqa: E402
+
+from pack218.audit import current_actor, current_reason  # noqa: E402
+from pack218.entities.models import ActionLog, Event, EventRegistration, Family, User  # noqa: E402
+
+
+def build_log(session: Session, families: int) -> None:
+    admin = User(first_name="Dave", last_name="Admin", email="dave@example.com", is_admin=True)
+    session.add(admin)
+    session.commit()
+    current_actor.set(admin.id)
+    current_reason.set("Signup night at the school")
+
+    event = Event(event_type="Camping", date="2026-05-15", location="Camp Cutter",
+                  details="Bring a sleeping bag and a flashlight.", capacity=families * 2)
+    event.save(session=session)
+
+    for i in range(families):
+        family = Family(
+            family_name=f"Family {i}",
+            emergency_contact_first_name_1="Grace", emergency_contact_last_name_1=f"Family {i}",
+            emergency_contact_phone_number_1=f"+1650555{i:04d}",
+            emergency_contact_first_name_2="Tom", emergency_contact_last_name_2="Neighbor",
+            emergency_contact_phone_number_2=f"+1408555{i:04d}",
+            car_license_plates=f"{i}ABC123",
+        )
+        family.save(session=session)
+        members = [
+            User(first_name="Parent", last_name=f"Family {i}", email=f"parent{i}@example.com",
+                 family_member_type="Adult", gender="Female", phone_number=f"+1650666{i:04d}",
+                 family_id=family.id),
+            User(first_name="Cub", last_name=f"Family {i}", family_member_type="Cub Scout",
+                 gender="Male", has_food_allergies=i % 3 == 0,
+                 food_allergies_detail="Peanuts, tree nuts" if i % 3 == 0 else "",
+                 family_id=family.id),
+        ]
+        User.save_many(members, session=session)
+        registrations = [
+            EventRegistration(user_id=member.id, event_id=event.id, stay_friday_night=True,
+                              eat_saturday_breakfast=True, eat_saturday_dinner=True)
+            for member in members
+        ]
+        EventRegistration.save_many(registrations, session=session)
+
+        members[1].food_intolerances = "Lactose"
+        members[1].save(session=session)
+        registrations[0].has_paid = True
+        registrations[0].save(session=session)
+        if i % 4 == 0:
+            EventRegistration.delete_by_id(registrations[1].id, session=session)
+
+
+def report(session: Session) -> None:
+    stored = dict(session.exec(text("SELECT id, length(field_changes) FROM action_log")).all())
+    packed, as_json = defaultdict(list), defaultdict(list)
+    for row in session.exec(select(ActionLog)).all():
+        packed[row.action].append(stored[row.id])
+        as_json[row.action].append(len(json.dumps(row.field_changes).encode()))
+
+    print(f"{'action':>8} {'rows':>6} {'json B/row':>11} {'packed B/row':>13} {'saved':>7}")
+    for action in ("create", "update", "delete", "all"):
+        before = sum(as_json.values(), []) if action == "all" else as_json[action]
+        after = sum(packed.values(), []) if action == "all" else packed[action]
+        if not before:
+            continue
+        print(f"{action:>8} {len(before):>6} {statistics.mean(before):>11.1f} "
+              f"{statistics.mean(after):>13.1f} {1 - sum(after) / sum(before):>7.0%}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--families", type=int, default=40)
+    args = parser.parse_args()
+
+    engine = create_engine("sqlite://", poolclass=StaticPool, connect_args={"check_same_thread": False})
+    SQLModel.metadata.create_all(engine)
+    with Session(engine) as session:
+        build_log(session, args.families)
+        report(session)
+
+
+if __name__ == "__main__":
+    main()
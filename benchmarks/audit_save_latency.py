@@ -0,0 +1,87 @@
+"""Latency of save() and of the diff_for() it runs for an update.
+
+An admin edits another parent's profile with a reason, the on-behalf path
+that runs the full diff, the blocklist check and the audit insert. The database is in-memory
+SQLite so the Python side of the hook dominates; run it on two checkouts
+to compare them, or with --outbox to queue the audit rows in the outbox
+(config.audit_outbox) instead of inserting them into action_log.
+
+    PACK218_STORAGE_KEY=x PACK218_APP_URL=http://x PACK218_USE_SQLITE=1 \\
+        python benchmarks/audit_save_latency.py --iterations 2000 [--outbox]
+"""
+import argparse
+import os
+import statistics
+import sys
+import time
+
+os.environ.setdefault("PACK218_STORAGE_KEY", "benchmark")
+os.environ.setdefault("PACK218_APP_URL", "http://localhost")
+os.environ.setdefault("PACK218_USE_SQLITE", "1")
+# Run from a checkout without installing it: import pack218 from the repo root.
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from sqlalchemy.pool import StaticPool  # noqa: E402
+from sqlmodel import Session, SQLModel, create_engine  # noqa: E402
+
+from pack218.audit import current_actor, current_reason, diff_for  # noqa: E402
+from pack218.config import config  # noqa: E402
+from pack218.entities.models import Family, User  # noqa: E402
+
+
+def setup(session: Session) -> tuple[User, User]:
+    admin_family, parent_family = Family(family_name="Admins"), Family(family_name="Chen")
+    session.add_all([admin_family, parent_family])
+    session.commit()
+    admin = User(first_name="Dave", last_name="Admin", email="dave@example.com",
+                 is_admin=True, family_id=admin_family.id)
+    parent = User(first_name="Sarah", last_name="Chen", email="sarah@example.com",
+                  family_id=parent_family.id)
+    session.add_all([admin, parent])
+    session.commit()
+    session.refresh(admin)
+    session.refresh(parent)
+    current_actor.set(admin.id)
+    current_reason.set("Sarah called the office")
+    return admin, parent
+
+
+def report(label: str, samples: list[float]) -> None:
+    samples_us = sorted(s * 1e6 for s in samples)
+    p95 = samples_us[int(len(samples_us) * 0.95)]
+    print(f"{label:>22}: median {statistics.median(samples_us):7.1f} us, "
+          f"p95 {p95:7.1f} us over {len(samples_us)} runs")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--iterations", type=int, default=2000)
+    parser.add_argument("--outbox", action="store_true", help="queue audit rows in the outbox")
+    args = parser.parse_args()
+    config.audit_outbox = args.outbox
+
+    engine = create_engine("sqlite://", poolclass=StaticPool, connect_args={"check_same_thread": False})
+    SQLModel.metadata.create_all(engine)
+    with Session(engine) as session:
+        _, parent = setup(session)
+
+        diff, save = [], []
+        for i in range(args.iterations):
+            parent.phone_number = f"+1650555{i % 10000:04d}"
+            parent.last_name = f"Chen-{i}"
+
+            start = time.perf_counter()
+            field_changes = diff_for(parent, "update")
+            diff.append(time.perf_counter() - start)
+            assert len(field_changes) == 2
+
+            start = time.perf_counter()
+            parent.save(session=session)
+            save.append(time.perf_counter() - start)
+
+    report("diff_for", diff)
+    report("save()", save)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,105 @@
+"""Registration-write throughput on SQLite: legacy PRAGMAs vs the tuned profile.
+
+Each writer thread registers users for capacity-limited trips through
+EventRegistration.save(). Each save also runs the audit hook and refreshes
+the materialized waitlist, which is the write path hit during a
+registration rush. Every save is its own commit, so the profile's fsync
+policy shows up directly.
+
+    PACK218_STORAGE_KEY=x PACK218_APP_URL=http://x PACK218_USE_SQLITE=1 \\
+        python benchmarks/sqlite_registration_writes.py --threads 4 --writes 200
+"""
+import argparse
+import os
+import sys
+import tempfile
+import threading
+import time
+
+os.environ.setdefault("PACK218_STORAGE_KEY", "benchmark")
+os.environ.setdefault("PACK218_APP_URL", "http://localhost")
+os.environ.setdefault("PACK218_USE_SQLITE", "1")
+# Run from a checkout without installing it: import pack218 from the repo root.
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from sqlalchemy import create_engine, event  # noqa: E402
+from sqlalchemy.exc import OperationalError  # noqa: E402
+from sqlmodel import Session, SQLModel  # noqa: E402
+
+from pack218.entities.models import Event, EventRegistration, Family, User  # noqa: E402
+from pack218.persistence.engine import apply_sqlite_pragmas  # noqa: E402
+
+
+TRIPS = 20
+
+
+def legacy_pragmas(dbapi_conn, connection_record):
+    cursor = dbapi_conn.cursor()
+    cursor.execute("PRAGMA journal_mode=WAL")
+    cursor.execute("PRAGMA wal_autocheckpoint=1000")
+    cursor.close()
+
+
+def tuned_pragmas(dbapi_conn, connection_record):
+    apply_sqlite_pragmas(dbapi_conn)
+
+
+def run(profile, threads: int, writes: int, directory: str) -> None:
+    with tempfile.TemporaryDirectory(dir=directory) as tmp:
+        engine = create_engine(f"sqlite:///{tmp}/bench.db", pool_size=threads, max_overflow=0)
+        event.listen(engine, "connect", profile)
+        SQLModel.metadata.create_all(engine)
+
+        with Session(engine) as session:
+            trips = [Event(date="2026-06-01", location=f"Site {i}", capacity=8) for i in range(TRIPS)]
+            session.add_all(trips)
+            session.commit()
+            trip_ids = [trip.id for trip in trips]
+            user_ids = []
+            for t in range(threads):
+                family = Family(family_name=f"F{t}")
+                session.add(family)
+                session.commit()
+                users = [User(first_name=f"U{t}-{i}", last_name="X", family_id=family.id) for i in range(writes)]
+                session.add_all(users)
+                session.commit()
+                user_ids.append([u.id for u in users])
+
+        errors = []
+
+        def writer(ids):
+            with Session(engine) as session:
+                for i, user_id in enumerate(ids):
+                    try:
+                        registration = EventRegistration(user_id=user_id, event_id=trip_ids[i % TRIPS])
+                        registration.save(session=session)
+                    except OperationalError as e:
+                        session.rollback()
+                        errors.append(e)
+
+        workers = [threading.Thread(target=writer, args=(ids,)) for ids in user_ids]
+        start = time.perf_counter()
+        for w in workers:
+            w.start()
+        for w in workers:
+            w.join()
+        elapsed = time.perf_counter() - start
+        engine.dispose()
+
+    done = threads * writes - len(errors)
+    print(f"{profile.__name__:>15}: {done} writes in {elapsed:.2f}s "
+          f"= {done / elapsed:.0f} writes/s, {len(errors)} 'database is locked' errors")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--threads", type=int, default=4)
+    parser.add_argument("--writes", type=int, default=200, help="registrations per thread")
+    parser.add_argument("--dir", default=".", help="where to create the scratch database (use a real disk)")
+    args = parser.parse_args()
+    for profile in (legacy_pragmas, tuned_pragmas):
+        run(profile, threads=args.threads, writes=args.writes, directory=args.dir)
+
+
+if __name__ == "__main__":
+    main()
@@ -13,13 +13,16 @@ from starlette.config import Config
 from starlette.middleware.cors import CORSMiddleware
 from starlette.middleware.sessions import SessionMiddleware
 from starlette.requests import Request
-from starlette.responses import JSONResponse, RedirectResponse
+from starlette.responses import JSONResponse, PlainTextResponse, RedirectResponse
+import asyncio
 import json
 import logging
 import os
 import pathlib
+import secrets
 import uuid
 from contextlib import asynccontextmanager
+from typing import Optional
 
 from jose import jwt
 
@@ -40,9 +43,11 @@ from pack218.pages.event_registration import render_page_event_registration
 from pack218.pages.home_page import render_camping_trip_detail, render_home_page
 from pack218.pages.profile import render_profile_page
 from pack218.pages.ui_components import BUTTON_CLASSES_ACCEPT
-from pack218.pages.utils import SessionDep, assert_is_admin
+from pack218.pages.utils import AsyncSessionDep, SessionDep, assert_is_admin
 
+from pack218.instrumentation import RequestTracingMiddleware, instrument_engine
 from pack218.persistence import create_db_and_tables
+from pack218.persistence.engine import async_engine, engine
 
 from starlette.config import Config
 from starlette.middleware.sessions import SessionMiddleware
@@ -83,6 +88,52 @@ app.add_middleware(
     allow_methods=["*"],
     max_age=3600,
 )
+# Outermost, so a request's trace covers the other middlewares too.
+app.add_middleware(RequestTracingMiddleware)
+instrument_engine(engine)
+instrument_engine(async_engine.sync_engine)
+
+
+# Background task keeping next months' action_log partitions in place (Postgres).
+_partition_maintenance: Optional[asyncio.Task] = None
+
+
+@app.on_startup
+async def start_partition_maintenance() -> None:
+    global _partition_maintenance
+    from pack218.audit.archive import run_partition_maintenance
+    _partition_maintenance = asyncio.create_task(run_partition_maintenance())
+
+
+@app.on_shutdown
+def stop_partition_maintenance() -> None:
+    if _partition_maintenance is not None:
+        _partition_maintenance.cancel()
+
+
+# Background task moving queued audit rows to action_log (config.audit_outbox).
+_outbox_drainer: Optional[asyncio.Task] = None
+
+
+@app.on_startup
+async def start_outbox_drainer() -> None:
+    global _outbox_drainer
+    from pack218.audit.outbox import drain_all, run_outbox_drainer
+    from pack218.persistence import run_db
+    # Rows queued before a restart, or before the mode was switched off.
+    await run_db(drain_all)
+    if config.audit_outbox:
+        _outbox_drainer = asyncio.create_task(run_outbox_drainer())
+
+
+@app.on_shutdown
+async def stop_outbox_drainer() -> None:
+    if _outbox_drainer is None:
+        return
+    from pack218.audit.outbox import drain_all
+    from pack218.persistence import run_db
+    _outbox_drainer.cancel()
+    await run_db(drain_all)
 
 if not config.local_dev:
     # Google OAuth
@@ -230,6 +281,20 @@ async def upload_image(request: Request, file: UploadFile = File(...)) -> JSONRe
     return JSONResponse(status_code=200, content={'url': f'/images/uploads/{name}'})
 
 
+@nicegui.app.get('/metrics')
+def metrics(request: Request, session: SessionDep) -> PlainTextResponse:
+    # For the scraper, not for people: no login session, but the route is off
+    # unless METRICS_TOKEN is set, and then needs it as a bearer token.
+    if not config.metrics_token:
+        return PlainTextResponse('not found', status_code=404)
+    if not secrets.compare_digest(
+        request.headers.get('authorization', '').encode(), f'Bearer {config.metrics_token}'.encode()
+    ):
+        return PlainTextResponse('unauthorized', status_code=401)
+    from pack218.metrics import CONTENT_TYPE, render_metrics
+    return PlainTextResponse(render_metrics(session), media_type=CONTENT_TYPE)
+
+
 def assert_logged_in(request: Request):
     user = request.session.get("user")
     should_redirect = user is None and not request.url.path.startswith('/_nicegui') and request.url.path not in unrestricted_page_routes
@@ -301,6 +366,7 @@ def chrome(request: Request, session: Session):
                 ui.link('Users', admin_users)
                 ui.link('Families', admin_families)
                 ui.link('Action Log', admin_action_log_page)
+                ui.link('Performance', admin_perf_page)
 
             ui.label('Log Out')
             ui.button(on_click=logout, icon='logout').props('outline round')
@@ -313,12 +379,19 @@ def chrome(request: Request, session: Session):
     menu()
 
 
+# The hot pages below are async: they render inside session.run_sync(), so
+# their queries are awaited instead of blocking the event loop (and every
+# other connected client) on our single worker. The render functions keep
+# taking a plain Session.
+
 @ui.page('/')
-def main_page(request: Request, session: SessionDep) -> None:
-    redirect = redirect = chrome(request=request, session=session)
-    if redirect is not None:
-        return redirect
-    render_home_page(request=request, session=session)
+async def main_page(request: Request, session: AsyncSessionDep) -> None:
+    def render(s: Session):
+        redirect = chrome(request=request, session=s)
+        if redirect is not None:
+            return redirect
+        render_home_page(request=request, session=s)
+    return await session.run_sync(render)
 
 @ui.page('/my-profile')
 def profile_page(request: Request, session: SessionDep) -> None:
@@ -328,38 +401,44 @@ def profile_page(request: Request, session: SessionDep) -> None:
     render_profile_page(request=request, session=session)
 
 @ui.page('/camping-trip/{event_id}')
-def camping_trip_page(request: Request, session: SessionDep, event_id: int) -> None:
-    redirect = chrome(request=request, session=session)
-    if redirect is not None:
-        return redirect
-    event = Event.get_by_id(event_id, session=session)
-    if event is None:
-        ui.label('Camping trip not found.').classes('text-lg font-bold text-red-500')
-        ui.link('Back to camping trips', main_page)
-        return
-    render_camping_trip_detail(event=event, request=request, session=session)
+async def camping_trip_page(request: Request, session: AsyncSessionDep, event_id: int) -> None:
+    def render(s: Session):
+        redirect = chrome(request=request, session=s)
+        if redirect is not None:
+            return redirect
+        event = Event.get_by_id(event_id, session=s)
+        if event is None:
+            ui.label('Camping trip not found.').classes('text-lg font-bold text-red-500')
+            ui.link('Back to camping trips', main_page)
+            return
+        render_camping_trip_detail(event=event, request=request, session=s)
+    return await session.run_sync(render)
 
 @ui.page('/event-registration/{event_id}')
-def event_registration_page(request: Request, session: SessionDep, event_id: int) -> None:
-    redirect = chrome(request=request, session=session)
-    if redirect is not None:
-        return redirect
-    render_page_event_registration(request=request, session=session, event_id=event_id)
+async def event_registration_page(request: Request, session: AsyncSessionDep, event_id: int) -> None:
+    def render(s: Session):
+        redirect = chrome(request=request, session=s)
+        if redirect is not None:
+            return redirect
+        render_page_event_registration(request=request, session=s, event_id=event_id)
+    return await session.run_sync(render)
 
 
 @ui.page('/event-registration/{event_id}/family/{family_id}')
-def event_registration_on_behalf_page(
-    request: Request, session: SessionDep, event_id: int, family_id: int
+async def event_registration_on_behalf_page(
+    request: Request, session: AsyncSessionDep, event_id: int, family_id: int
 ) -> None:
-    # Only real admins may register on behalf of another family. The lens
-    # (view-as-non-admin) does not bypass this — actual privilege is required.
-    assert_is_admin(request=request, session=session)
-    redirect = chrome(request=request, session=session)
-    if redirect is not None:
-        return redirect
-    render_page_event_registration(
-        request=request, session=session, event_id=event_id, target_family_id=family_id,
-    )
+    def render(s: Session):
+        # Only real admins may register on behalf of another family. The lens
+        # (view-as-non-admin) does not bypass this — actual privilege is required.
+        assert_is_admin(request=request, session=s)
+        redirect = chrome(request=request, session=s)
+        if redirect is not None:
+            return redirect
+        render_page_event_registration(
+            request=request, session=s, event_id=event_id, target_family_id=family_id,
+        )
+    return await session.run_sync(render)
 
 @ui.page('/admin/action-log')
 def admin_action_log_page(request: Request, session: SessionDep) -> None:
@@ -371,6 +450,16 @@ def admin_action_log_page(request: Request, session: SessionDep) -> None:
     render_admin_action_log(session=session)
 
 
+@ui.page('/admin/perf')
+def admin_perf_page(request: Request, session: SessionDep) -> None:
+    assert_is_admin(request=request, session=session)
+    redirect = chrome(request=request, session=session)
+    if redirect is not None:
+        return redirect
+    from pack218.pages.admin_perf import render_admin_perf
+    render_admin_perf()
+
+
 @ui.page('/admin/families')
 def admin_families(request: Request, session: SessionDep) -> None:
     assert_is_admin(request=request, session=session)
@@ -20,6 +20,8 @@ from pack218.audit.hooks import (  # noqa: F401
     enforce_on_behalf_rules,
     is_self_edit,
     record_change,
+    record_changes,
+    subject_family_ids,
     subject_for,
 )
 
@@ -0,0 +1,279 @@
+"""Monthly lifecycle for the append-only ``action_log`` table.
+
+On Postgres, ``action_log`` is range-partitioned by month on ``created_at``
+(``action_log_yYYYYmMM`` plus ``action_log_default``, see the migration that
+introduced them). ``ensure_action_log_partitions()`` creates the next few
+months ahead of time, so new rows never land in the default partition.
+The app runs it at startup and then daily (``run_partition_maintenance()``),
+and the archive job calls it too.
+SQLite keeps a single table.
+
+``archive_action_log()`` moves whole months older than the retention period
+out of the database into gzip-compressed JSONL files, one per month
+(``action_log-YYYY-MM.jsonl.gz``), then deletes exactly the rows it wrote and
+drops the emptied month partition. Archived rows are no longer in the
+database, but ``search_archive()`` still finds them for the admin Action Log
+page, on demand. Run it from cron or by hand:
+
+    python -m pack218.audit.archive --months 12
+
+This job is the one place rows leave ``action_log``: it deletes them
+directly, not through ``delete_by_id()`` (which refuses ActionLog rows).
+"""
+import argparse
+import asyncio
+import gzip
+import json
+import logging
+import os
+from datetime import date, datetime
+from pathlib import Path
+from typing import Iterator, List, Optional
+
+from sqlalchemy import delete, func, text
+from sqlmodel import Session, select
+
+from pack218.audit.search import matches_terms, matching_user_ids, search_terms
+from pack218.config import config
+
+logger = logging.getLogger(__name__)
+
+_CHUNK = 1000
+
+
+def _month(d: date) -> date:
+    return date(d.year, d.month, 1)
+
+
+def _add_months(month: date, n: int) -> date:
+    index = month.year * 12 + month.month - 1 + n
+    return date(index // 12, index % 12 + 1, 1)
+
+
+def _partition_name(month: date) -> str:
+    return f"action_log_y{month.year:04d}m{month.month:02d}"
+
+
+def _archive_path(directory: Path, month: date) -> Path:
+    return directory / f"action_log-{month.year:04d}-{month.month:02d}.jsonl.gz"
+
+
+def _is_partitioned(session: Session) -> bool:
+    if session.get_bind().dialect.name != "postgresql":
+        return False
+    return session.exec(text(
+        "SELECT c.relkind = 'p' FROM pg_class c WHERE c.oid = to_regclass('action_log')"
+    )).scalar() is True
+
+
+def ensure_action_log_partitions(session: Session, months_ahead: int = 3) -> List[str]:
+    """Create the monthly partitions from this month to ``months_ahead`` out.
+
+    A no-op unless ``action_log`` is a partitioned Postgres table. Returns
+    the names of the partitions it created. Does not commit.
+
+    Postgres refuses to create a partition whose range already has rows in
+    ``action_log_default`` (the app ran past the pre-created months), so
+    those rows are moved into the new partition, which is then attached.
+    """
+    if not _is_partitioned(session):
+        return []
+    from pack218.entities.models import ActionLog
+
+    # One app process at a time; released at the end of the transaction.
+    session.exec(text("SELECT pg_advisory_xact_lock(hashtext('action_log_partitions'))"))
+    # search_vector is generated, so it is left out of the copy.
+    columns = ", ".join(ActionLog.__table__.columns.keys())
+    created = []
+    this_month = _month(date.today())
+    for n in range(months_ahead + 1):
+        month = _add_months(this_month, n)
+        name = _partition_name(month)
+        exists = session.exec(text("SELECT to_regclass(:name) IS NOT NULL").bindparams(name=name)).scalar()
+        if exists:
+            continue
+        bounds = f"FOR VALUES FROM ('{month.isoformat()}') TO ('{_add_months(month, 1).isoformat()}')"
+        in_month = "created_at >= :start AND created_at < :end"
+        params = {"start": month, "end": _add_months(month, 1)}
+        strays = session.exec(
+            text(f"SELECT count(*) FROM action_log_default WHERE {in_month}").bindparams(**params)
+        ).scalar()
+        if strays:
+            logger.warning(f"Moving {strays} action_log rows for {month:%Y-%m} out of action_log_default into {name}")
+            session.exec(text(f"CREATE TABLE {name} (LIKE action_log INCLUDING DEFAULTS INCLUDING GENERATED)"))
+            session.exec(text(
+                f"INSERT INTO {name} ({columns}) SELECT {columns} FROM action_log_default WHERE {in_month}"
+            ).bindparams(**params))
+            session.exec(text(f"DELETE FROM action_log_default WHERE {in_month}").bindparams(**params))
+            # Attaching creates the partition's copies of the parent's
+            # primary key, foreign keys and indexes.
+            session.exec(text(f"ALTER TABLE action_log ATTACH PARTITION {name} {bounds}"))
+        else:
+            session.exec(text(f"CREATE TABLE {name} PARTITION OF action_log {bounds}"))
+        created.append(name)
+    return created
+
+
+def _ensure_partitions_and_commit(session: Session) -> List[str]:
+    created = ensure_action_log_partitions(session)
+    session.commit()
+    if created:
+        logger.info(f"Created action_log partitions: {', '.join(created)}")
+    return created
+
+
+async def run_partition_maintenance() -> None:
+    """Keep the partitions ahead of the calendar for as long as the app runs:
+    check now and then every ``config.action_log_partition_check_interval_s``."""
+    from pack218.persistence import run_db
+
+    while True:
+        try:
+            await run_db(_ensure_partitions_and_commit)
+        except Exception:
+            logger.exception("Creating action_log partitions failed; retrying later")
+        await asyncio.sleep(config.action_log_partition_check_interval_s)
+
+
+def _row_dict(row) -> dict:
+    from pack218.entities.models import ActionLog
+
+    values = {column: getattr(row, column) for column in ActionLog.__table__.columns.keys()}
+    values["created_at"] = values["created_at"].isoformat()
+    return values
+
+
+def _write_month(path: Path, rows: List[dict]) -> None:
+    """Write (or extend) one month's archive file atomically."""
+    if path.exists():
+        archived_ids = {row["id"] for row in rows}
+        rows = [row for row in _read(path) if row["id"] not in archived_ids] + rows
+        rows.sort(key=lambda row: row["id"])
+    tmp = path.with_name(path.name + ".tmp")
+    with gzip.open(tmp, "wt", encoding="utf-8") as f:
+        for row in rows:
+            f.write(json.dumps(row, separators=(",", ":")))
+            f.write("\n")
+        f.flush()
+        os.fsync(f.fileno())
+    os.replace(tmp, path)
+
+
+def _read(path: Path) -> Iterator[dict]:
+    with gzip.open(path, "rt", encoding="utf-8") as f:
+        for line in f:
+            yield json.loads(line)
+
+
+def archive_action_log(
+    session: Session,
+    months: Optional[int] = None,
+    directory: Optional[Path] = None,
+    today: Optional[date] = None,
+) -> List[Path]:
+    """Move every whole month older than ``months`` months to the archive.
+
+    Each month is written to its file before its rows are deleted, and is
+    committed on its own, so an interrupted run loses nothing and can be
+    re-run. Returns the files written.
+    """
+    from pack218.entities.models import ActionLog
+
+    months = config.action_log_retention_months if months is None else months
+    directory = Path(directory or config.action_log_archive_dir)
+    directory.mkdir(parents=True, exist_ok=True)
+    cutoff = _add_months(_month(today or date.today()), -months)
+    partitioned = _is_partitioned(session)
+
+    oldest = session.exec(select(func.min(ActionLog.created_at))).one()
+    written = []
+    month = _month(oldest) if oldest is not None else cutoff
+    while month < cutoff:
+        end = _add_months(month, 1)
+        rows = session.exec(
+            select(ActionLog)
+            .where(ActionLog.created_at >= datetime.combine(month, datetime.min.time()))
+            .where(ActionLog.created_at < datetime.combine(end, datetime.min.time()))
+            .order_by(ActionLog.id)
+        ).all()
+        if rows:
+            path = _archive_path(directory, month)
+            _write_month(path, [_row_dict(row) for row in rows])
+            ids = [row.id for row in rows]
+            for row in rows:
+                session.expunge(row)
+            for start in range(0, len(ids), _CHUNK):
+                session.exec(delete(ActionLog).where(ActionLog.id.in_(ids[start:start + _CHUNK])))
+            written.append(path)
+            logger.info(f"Archived {len(ids)} action_log rows to {path}")
+        if partitioned:
+            session.exec(text(f"DROP TABLE IF EXISTS {_partition_name(month)}"))
+        session.commit()
+        month = end
+    return written
+
+
+def iter_archived_rows(directory: Optional[Path] = None) -> Iterator[dict]:
+    """Every archived row, newest month first."""
+    directory = Path(directory or config.action_log_archive_dir)
+    for path in sorted(directory.glob("action_log-*.jsonl.gz"), reverse=True):
+        yield from _read(path)
+
+
+def search_archive(
+    session: Session,
+    q: str,
+    limit: int,
+    action: Optional[str] = None,
+    entity: Optional[str] = None,
+    directory: Optional[Path] = None,
+) -> list:
+    """Archived rows matching ``q`` the way the live search does, as
+    (unsaved) ActionLog instances: text matches first, then rows matched by
+    actor/subject name, each newest first. Reads every archive file, so it
+    only runs when asked for."""
+    from pack218.entities.models import ActionLog
+
+    terms = search_terms(q)
+    if not terms:
+        return []
+    user_ids = set(matching_user_ids(session, q))
+    text_hits, name_hits = [], []
+    for row in iter_archived_rows(directory):
+        if action is not None and row["action"] != action:
+            continue
+        if entity is not None and row["entity_name"] != entity:
+            continue
+        if matches_terms(row.get("search_text", ""), terms):
+            text_hits.append(row)
+        elif row["actor_user_id"] in user_ids or row["subject_user_id"] in user_ids:
+            name_hits.append(row)
+    found = []
+    for hits in (text_hits, name_hits):
+        hits.sort(key=lambda row: (row["created_at"], row["id"]), reverse=True)
+        found.extend(hits)
+    return [
+        ActionLog(**{**row, "created_at": datetime.fromisoformat(row["created_at"])})
+        for row in found[:limit]
+    ]
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--months", type=int, default=config.action_log_retention_months,
+                        help="keep this many whole months in the database")
+    parser.add_argument("--dir", default=config.action_log_archive_dir, help="archive directory")
+    args = parser.parse_args()
+    logging.basicConfig(level=logging.INFO)
+
+    from pack218.persistence.engine import engine
+
+    with Session(engine) as session:
+        ensure_action_log_partitions(session)
+        session.commit()
+        for path in archive_action_log(session, months=args.months, directory=Path(args.dir)):
+            print(path)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,68 @@
+"""Compact storage format for ``ActionLog.field_changes``.
+
+A diff is a small dict whose keys are column names — long ones like
+``emergency_contact_phone_number_1`` — repeated on every row: a create
+lists every column, a delete snapshots every column. On disk each known
+field name is replaced by its code in ``FIELD_NAMES`` (a one-byte msgpack
+integer) and the whole dict is msgpack-encoded. ``pack()`` and ``unpack()``
+are exact inverses, and the ``PackedFieldChanges`` column type applies
+them, so everything above the database still sees the usual dict.
+
+One dictionary covers every audited entity (most fields are unique to one
+entity, and the shared ones like ``id`` can share a code). The column type
+then needs nothing but the value, which is all a bulk INSERT gives it.
+"""
+from typing import Any
+
+import msgpack
+
+# Append-only: a field's code is its position, and stored rows depend on it.
+# Add new fields at the end; never reorder or remove. Field names missing
+# from here are stored as plain strings, so forgetting one only costs bytes.
+FIELD_NAMES = (
+    # diff_for() delete payloads
+    "_action", "snapshot",
+    # shared
+    "id", "family_id", "user_id", "event_id",
+    # User
+    "username", "hashed_password", "is_admin", "first_name", "last_name",
+    "family_member_type", "gender", "email", "phone_number",
+    "has_food_allergies", "food_allergies_detail", "has_food_intolerances",
+    "food_intolerances", "can_login", "email_confirmed", "email_confirmation_code",
+    # Family
+    "family_name",
+    "emergency_contact_first_name_1", "emergency_contact_last_name_1", "emergency_contact_phone_number_1",
+    "emergency_contact_first_name_2", "emergency_contact_last_name_2", "emergency_contact_phone_number_2",
+    "car_license_plates",
+    # Event
+    "event_type", "date", "location", "details", "duration_in_days", "capacity", "cancelled",
+    # EventRegistration
+    "registration_ts", "stay_friday_night", "stay_saturday_night",
+    "eat_saturday_breakfast", "eat_saturday_lunch", "eat_saturday_dinner", "eat_sunday_breakfast",
+    "has_paid",
+)
+_FIELD_CODES = {name: code for code, name in enumerate(FIELD_NAMES)}
+
+
+def _encode_keys(value: Any) -> Any:
+    if isinstance(value, dict):
+        return {_FIELD_CODES.get(key, key): _encode_keys(item) for key, item in value.items()}
+    return value
+
+
+def _decode_keys(value: Any) -> Any:
+    if isinstance(value, dict):
+        return {
+            FIELD_NAMES[key] if isinstance(key, int) else key: _decode_keys(item)
+            for key, item in value.items()
+        }
+    return value
+
+
+def pack(field_changes: dict) -> bytes:
+    """Encode a field_changes dict (nested dicts too, for delete snapshots)."""
+    return msgpack.packb(_encode_keys(field_changes), use_bin_type=True)
+
+
+def unpack(data: bytes) -> dict:
+    return _decode_keys(msgpack.unpackb(data, raw=False, strict_map_key=False))
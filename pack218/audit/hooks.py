@@ -3,16 +3,23 @@
 `SQLModelWithSave.save()` and `.delete_by_id()` call `record_change()` to write
 one `ActionLog` row per persistent mutation, attributing it to the
 request-scoped `current_actor` and the operator-supplied `current_reason`.
+Batch writes (`save_many()` / `delete_many()`) use `record_changes()`, which
+inserts all of their rows in one executemany.
 `ActionLog` itself is the recursion-bypass exemption — recording would be
 infinite. See `AGENTS.md` for the universal-write-path convention.
 """
 
 from contextvars import ContextVar
 from datetime import datetime, date
-from typing import Any, Optional, Tuple
+from typing import Any, NamedTuple, Optional, Sequence, Tuple
 
-from sqlalchemy import inspect
-from sqlmodel import Session
+from sqlalchemy import event, insert, inspect
+from sqlalchemy.orm import Session as OrmSession
+from sqlmodel import Session, select
+
+from pack218.audit.search import search_text_for
+from pack218.config import config
+from pack218.instrumentation import count_audit_rows
 
 
 # Request-scoped actor and reason. Set by the request boundary in app.py
@@ -23,6 +30,27 @@ current_actor: ContextVar[Optional[int]] = ContextVar("pack218_current_actor", d
 current_reason: ContextVar[Optional[str]] = ContextVar("pack218_current_reason", default=None)
 
 
+# Audit rows added in a session's open transaction, counted into the metrics
+# only once that transaction commits (and dropped if it rolls back).
+_PENDING_AUDIT_ROWS = "pack218_pending_audit_rows"
+
+
+def _count_when_committed(session: Session, n: int) -> None:
+    session.info[_PENDING_AUDIT_ROWS] = session.info.get(_PENDING_AUDIT_ROWS, 0) + n
+
+
+@event.listens_for(OrmSession, "after_commit")
+def _count_committed_audit_rows(session: OrmSession) -> None:
+    n = session.info.pop(_PENDING_AUDIT_ROWS, 0)
+    if n:
+        count_audit_rows(n)
+
+
+@event.listens_for(OrmSession, "after_rollback")
+def _drop_rolled_back_audit_rows(session: OrmSession) -> None:
+    session.info.pop(_PENDING_AUDIT_ROWS, None)
+
+
 class AuditError(Exception):
     """Raised when an on-behalf-of write violates the audit/authorization rules.
 
@@ -79,6 +107,15 @@ _REDACTED_USER_FIELDS = frozenset({
 _REDACTED_PLACEHOLDER = "<redacted>"
 
 
+# Columns holding derived state that after_write hooks maintain from other
+# rows (not user input). They are left out of every diff so creates don't
+# carry them as noise and automatic reshuffles aren't attributed to whoever
+# happened to trigger them.
+_DERIVED_FIELDS = {
+    "EventRegistration": frozenset({"waitlist_position"}),
+}
+
+
 def _serialize_value(value: Any) -> Any:
     """Coerce a Python value into something JSON-serializable for ActionLog."""
     if isinstance(value, _SCALAR_TYPES):
@@ -88,8 +125,35 @@ def _serialize_value(value: Any) -> Any:
     return str(value)
 
 
-def _redact_if_sensitive(entity_name: str, field: str, value: Any) -> Any:
-    if entity_name == "User" and field in _REDACTED_USER_FIELDS:
+class _DiffPlan(NamedTuple):
+    """What diff_for needs to know about one model class, built once per mapper.
+
+    ``columns`` maps every audited column key (derived columns already left
+    out) to whether its values are redacted, in mapper order.
+    """
+    entity_name: str
+    columns: dict
+
+
+_diff_plans: dict = {}
+
+
+def _diff_plan(cls) -> _DiffPlan:
+    plan = _diff_plans.get(cls)
+    if plan is None:
+        entity_name = cls.__name__
+        derived = _DERIVED_FIELDS.get(entity_name, frozenset())
+        redacted = _REDACTED_USER_FIELDS if entity_name == "User" else frozenset()
+        plan = _diff_plans[cls] = _DiffPlan(entity_name, {
+            attr.key: attr.key in redacted
+            for attr in inspect(cls).column_attrs
+            if attr.key not in derived
+        })
+    return plan
+
+
+def _audit_value(value: Any, redacted: bool) -> Any:
+    if redacted:
         return _REDACTED_PLACEHOLDER if value not in (None, "") else value
     return _serialize_value(value)
 
@@ -97,14 +161,10 @@ def _redact_if_sensitive(entity_name: str, field: str, value: Any) -> Any:
 def _model_snapshot(instance) -> dict:
     """Best-effort dict-of-columns snapshot for delete actions, with sensitive
     User fields redacted."""
-    insp = inspect(instance)
-    entity_name = type(instance).__name__
-    out = {}
-    for attr in insp.mapper.column_attrs:
-        out[attr.key] = _redact_if_sensitive(
-            entity_name, attr.key, getattr(instance, attr.key, None)
-        )
-    return out
+    return {
+        key: _audit_value(getattr(instance, key, None), redacted)
+        for key, redacted in _diff_plan(type(instance)).columns.items()
+    }
 
 
 def diff_for(instance, action: str) -> dict:
@@ -113,38 +173,44 @@ def diff_for(instance, action: str) -> dict:
     - create: {field: [None, value]} for every column (sensitive User fields redacted)
     - update: {field: [before, after]} only for dirty COLUMNS (relationships skipped)
     - delete: {"_action": "delete", "snapshot": {column: value, ...}}
+
+    The keys of an update diff are exactly the columns the write changes;
+    enforce_on_behalf_rules() checks the blocklist against them.
     """
-    entity_name = type(instance).__name__
     if action == "delete":
         return {"_action": "delete", "snapshot": _model_snapshot(instance)}
 
-    insp = inspect(instance)
+    columns = _diff_plan(type(instance)).columns
     diff: dict = {}
 
     if action == "create":
-        for attr in insp.mapper.column_attrs:
-            if attr.key == "id":
+        for key, redacted in columns.items():
+            if key == "id":
                 continue  # id is the row identity, not a "field change"
-            value = getattr(instance, attr.key, None)
-            diff[attr.key] = [None, _redact_if_sensitive(entity_name, attr.key, value)]
+            diff[key] = [None, _audit_value(getattr(instance, key, None), redacted)]
         return diff
 
-    # update — iterate only columns (NOT relationships); relationship attrs
-    # would surface stringified SQLModel objects in the JSON.
-    for attr in insp.mapper.column_attrs:
-        history = inspect(instance).attrs[attr.key].history
+    # update — only attributes modified since the last flush can have
+    # history, and committed_state holds exactly those, so most columns
+    # are skipped without building their history. Relationships never
+    # appear in the plan; they would surface stringified SQLModel objects
+    # in the JSON.
+    insp = inspect(instance)
+    modified = insp.committed_state
+    attrs = insp.attrs
+    for key, redacted in columns.items():
+        if key not in modified:
+            continue
+        history = attrs[key].history
         if not history.has_changes():
             continue
         before_raw = history.deleted[0] if history.deleted else None
         after_raw = (
             history.added[0]
             if history.added
-            else getattr(instance, attr.key, None)
+            else getattr(instance, key, None)
         )
-        diff[attr.key] = [
-            _redact_if_sensitive(entity_name, attr.key, before_raw),
-            _redact_if_sensitive(entity_name, attr.key, after_raw),
-        ]
+        diff[key] = [_audit_value(before_raw, redacted), _audit_value(after_raw, redacted)]
     return diff
 
 
@@ -255,21 +321,23 @@ def is_self_edit(session: Session, instance, actor_id: int) -> bool:
 _is_self_edit = is_self_edit
 
 
-def _blocked_user_fields_in_change(instance, action: str) -> frozenset:
-    """Return the set of blocklisted User fields this write would change."""
+def _blocked_user_fields_in_change(
+    instance, action: str, field_changes: Optional[dict] = None
+) -> frozenset:
+    """Return the set of blocklisted User fields this write would change.
+
+    For updates, pass the write's ``field_changes`` from diff_for() when it
+    is already computed; its keys are the changed columns.
+    """
     from pack218.entities.models import User
 
     if not isinstance(instance, User):
         return frozenset()
 
     if action == "update":
-        insp = inspect(instance)
-        violations = set()
-        for field in BLOCKLISTED_USER_FIELDS:
-            attr = insp.attrs.get(field)
-            if attr is not None and attr.history.has_changes():
-                violations.add(field)
-        return frozenset(violations)
+        if field_changes is None:
+            field_changes = diff_for(instance, action)
+        return BLOCKLISTED_USER_FIELDS.intersection(field_changes)
 
     if action == "create":
         # On create, only the privilege-granting subset is blocked — admin
@@ -301,11 +369,15 @@ def _is_admin_target(session: Session, instance) -> bool:
     return False
 
 
-def enforce_on_behalf_rules(session: Session, instance, action: str) -> None:
+def enforce_on_behalf_rules(
+    session: Session, instance, action: str, field_changes: Optional[dict] = None
+) -> None:
     """Raise AuditError if this write violates the on-behalf-of rules.
 
     Called from SQLModelWithSave.save() and .delete_by_id() between pre_save
     and flush. Reads current_actor / current_reason from contextvars.
+    ``field_changes`` is the write's diff_for() result, passed by callers
+    that already computed it so the blocklist check doesn't diff again.
 
     When current_actor is None (offline scripts, tests without setup), no
     rules are enforced; record_change will log the row with actor_user_id=NULL.
@@ -331,7 +403,7 @@ def enforce_on_behalf_rules(session: Session, instance, action: str) -> None:
     if not reason:
         raise AuditError("Reason is required when editing another user's record")
 
-    blocked = _blocked_user_fields_in_change(instance, action)
+    blocked = _blocked_user_fields_in_change(instance, action, field_changes)
     if blocked:
         raise AuditError(
             "These fields can only be changed by the user themselves: "
@@ -346,6 +418,79 @@ def enforce_on_behalf_rules(session: Session, instance, action: str) -> None:
         raise AuditError("On-behalf-of edits cannot target another admin's record")
 
 
+def subject_family_ids(session: Session, instances: Sequence[Any], inline: bool = False) -> list:
+    """Return the subject's family id for each instance, as of this write.
+
+    - Family → the family itself
+    - User → the user's family_id (the new value when the write moves them)
+    - EventRegistration → the owner's family_id
+
+    Stored denormalized on ActionLog.subject_family_id so the parent panel
+    reads one family's rows with a single index range scan. Owners already
+    in the session are read from it; the rest come from one IN query, or
+    with ``inline=True`` (one ORM-added row) as a scalar subquery that the
+    INSERT evaluates, so a single write costs no extra round trip.
+    """
+    from pack218.entities.models import EventRegistration, Family, User
+
+    owner_ids = {i.user_id for i in instances if isinstance(i, EventRegistration)}
+    owner_family_ids: dict = {}
+    with session.no_autoflush:
+        missing = []
+        for user_id in owner_ids:
+            owner = session.identity_map.get(session.identity_key(User, user_id))
+            if owner is None:
+                missing.append(user_id)
+            else:
+                owner_family_ids[user_id] = owner.family_id
+        if missing and inline:
+            owner_family_ids.update({
+                user_id: select(User.family_id).where(User.id == user_id).scalar_subquery()
+                for user_id in missing
+            })
+        elif missing:
+            owner_family_ids.update(session.exec(
+                select(User.id, User.family_id).where(User.id.in_(missing))
+            ).all())
+
+    family_ids = []
+    for instance in instances:
+        if isinstance(instance, Family):
+            family_ids.append(instance.id)
+        elif isinstance(instance, User):
+            family_ids.append(instance.family_id)
+        elif isinstance(instance, EventRegistration):
+            family_ids.append(owner_family_ids.get(instance.user_id))
+        else:
+            family_ids.append(None)
+    return family_ids
+
+
+def _action_log_values(
+    instance, action: str, field_changes: Optional[dict], subject_family_id: Optional[int]
+) -> dict:
+    if field_changes is None:
+        field_changes = diff_for(instance, action)
+
+    entity_name, entity_id, subject_user_id = subject_for(instance)
+    reason = current_reason.get()
+    return dict(
+        actor_user_id=current_actor.get(),
+        subject_user_id=subject_user_id,
+        subject_family_id=subject_family_id,
+        entity_name=entity_name,
+        entity_id=entity_id,
+        action=action,
+        field_changes=field_changes,
+        reason=reason,
+    )
+
+
+def _with_search_text(values: dict) -> dict:
+    return {**values, "search_text": search_text_for(
+        values["entity_name"], values["action"], values["field_changes"], values["reason"])}
+
+
 def record_change(
     session: Session,
     instance,
@@ -361,24 +506,51 @@ def record_change(
     ``field_changes`` may be passed pre-computed (the save() hook does this
     because it needs the diff BEFORE flush, while attribute history is still
     intact). When omitted, the diff is computed here.
+
+    With ``config.audit_outbox`` on, the row is queued in ActionLogOutbox
+    instead, still inside the caller's transaction (see pack218.audit.outbox).
     """
-    from pack218.entities.models import ActionLog
+    from pack218.entities.models import ActionLog, ActionLogOutbox
 
     if isinstance(instance, ActionLog):
         return
 
-    if field_changes is None:
-        field_changes = diff_for(instance, action)
+    [subject_family_id] = subject_family_ids(session, [instance], inline=True)
+    values = _action_log_values(instance, action, field_changes, subject_family_id)
+    if config.audit_outbox:
+        session.add(ActionLogOutbox(**values))
+    else:
+        session.add(ActionLog(**_with_search_text(values)))
+    _count_when_committed(session, 1)
 
-    entity_name, entity_id, subject_user_id = subject_for(instance)
 
-    log = ActionLog(
-        actor_user_id=current_actor.get(),
-        subject_user_id=subject_user_id,
-        entity_name=entity_name,
-        entity_id=entity_id,
-        action=action,
-        field_changes=field_changes,
-        reason=current_reason.get(),
-    )
-    session.add(log)
+def record_changes(
+    session: Session,
+    changes: Sequence[Tuple[Any, str, Optional[dict]]],
+) -> None:
+    """Insert the ActionLog rows for a batch of writes in one executemany.
+
+    ``changes`` holds ``(instance, action, field_changes)`` triples, with the
+    same meaning as record_change()'s arguments. The rows skip the ORM
+    unit of work entirely: they are built as plain dicts (subject and ids
+    are read now, so deletes must be recorded before the row is deleted)
+    and sent as a single bulk INSERT inside the caller's transaction (into
+    the outbox when ``config.audit_outbox`` is on). No commit; ActionLog
+    instances are skipped.
+    """
+    from pack218.entities.models import ActionLog, ActionLogOutbox
+
+    changes = [change for change in changes if not isinstance(change[0], ActionLog)]
+    family_ids = subject_family_ids(session, [instance for instance, _, _ in changes])
+    created_at = datetime.now()
+    rows = [
+        {**_action_log_values(instance, action, field_changes, subject_family_id), "created_at": created_at}
+        for (instance, action, field_changes), subject_family_id in zip(changes, family_ids)
+    ]
+    if not rows:
+        return
+    if config.audit_outbox:
+        session.execute(insert(ActionLogOutbox), rows)
+    else:
+        session.execute(insert(ActionLog), [_with_search_text(row) for row in rows])
+    _count_when_committed(session, len(rows))
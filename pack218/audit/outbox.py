@@ -0,0 +1,81 @@
+"""Deferred audit writes through ``action_log_outbox``.
+
+With ``config.audit_outbox`` on, ``record_change()`` / ``record_changes()``
+queue each audit row in ``action_log_outbox`` instead of inserting it into
+``action_log``. The outbox row is written in the same transaction as the
+entity it describes, so one is never committed without the other. What
+moves out of the request is the expensive part: ``action_log``'s secondary
+indexes, its full-text index and the search text itself.
+
+``drain_action_log_outbox()`` moves queued rows to ``action_log`` in id
+order, a batch per transaction: the batch is claimed with a DELETE ...
+RETURNING, so concurrent drainers (one per app process) never move the same
+row twice, and the ActionLog inserts commit or roll back together with
+that delete, so a crash mid-batch leaves the rows queued. The app runs
+``run_outbox_drainer()`` in the background while the mode is on and drains
+what is left on shutdown.
+
+Audit rows only appear in the admin Action Log and the on-behalf panel once
+drained, up to ``config.audit_outbox_interval_s`` later.
+"""
+import asyncio
+import logging
+from typing import Optional
+
+from sqlalchemy import delete, insert
+from sqlmodel import Session, select
+
+from pack218.audit.hooks import _with_search_text
+from pack218.config import config
+
+logger = logging.getLogger(__name__)
+
+
+def drain_action_log_outbox(session: Session, batch_size: Optional[int] = None) -> int:
+    """Move up to ``batch_size`` queued rows into action_log and commit.
+
+    Returns how many rows were moved.
+    """
+    from pack218.entities.models import ActionLog, ActionLogOutbox
+
+    batch_size = config.audit_outbox_batch_size if batch_size is None else batch_size
+    outbox = ActionLogOutbox.__table__
+    claimed = session.execute(
+        delete(outbox)
+        .where(outbox.c.id.in_(select(outbox.c.id).order_by(outbox.c.id).limit(batch_size)))
+        .returning(*outbox.c)
+    ).mappings().all()
+    if not claimed:
+        session.rollback()
+        return 0
+    rows = [
+        _with_search_text({key: value for key, value in row.items() if key != "id"})
+        for row in sorted(claimed, key=lambda row: row["id"])
+    ]
+    session.execute(insert(ActionLog), rows)
+    session.commit()
+    return len(rows)
+
+
+def drain_all(session: Session) -> int:
+    """Drain until the outbox is empty; returns how many rows were moved."""
+    moved = total = drain_action_log_outbox(session)
+    while moved:
+        moved = drain_action_log_outbox(session)
+        total += moved
+    return total
+
+
+async def run_outbox_drainer() -> None:
+    """Drain the outbox forever: back to back while there is a backlog,
+    every ``config.audit_outbox_interval_s`` once it is caught up."""
+    from pack218.persistence import run_db
+
+    while True:
+        try:
+            moved = await run_db(drain_action_log_outbox)
+        except Exception:
+            logger.exception("Draining action_log_outbox failed; retrying")
+            moved = 0
+        if moved < config.audit_outbox_batch_size:
+            await asyncio.sleep(config.audit_outbox_interval_s)
@@ -0,0 +1,154 @@
+"""Full-text search over the audit log.
+
+Every ``ActionLog`` row carries a ``search_text`` column, filled in by
+``record_change()`` / ``record_changes()`` from the entity, action, reason
+and field-level diff. The search index over it depends on the database:
+
+- SQLite: an FTS5 external-content table ``action_log_fts`` kept in sync by
+  triggers on ``action_log``, ranked with bm25 (FTS5's ``rank``).
+- Postgres: a generated ``search_vector`` tsvector column with a GIN index,
+  ranked with ``ts_rank()``.
+
+Both are created with the table (``ACTION_LOG_SEARCH_DDL`` is attached to it
+in models.py) and by the migration that introduced them. Actor and subject
+names are not indexed: they are matched against the small ``user`` table and
+then looked up through the indexed actor/subject columns, so a renamed user
+is found under their current name.
+"""
+import re
+from typing import Any, Optional
+
+from sqlalchemy import Float, column, literal, literal_column, or_, table, union_all
+from sqlalchemy.sql import Subquery, func
+from sqlmodel import Session, select
+
+
+ACTION_LOG_SEARCH_DDL = {
+    "sqlite": [
+        "CREATE VIRTUAL TABLE action_log_fts USING fts5("
+        "search_text, content='action_log', content_rowid='id', "
+        "tokenize='unicode61 remove_diacritics 2')",
+        "CREATE TRIGGER action_log_fts_insert AFTER INSERT ON action_log BEGIN "
+        "INSERT INTO action_log_fts(rowid, search_text) VALUES (new.id, new.search_text); END",
+        "CREATE TRIGGER action_log_fts_delete AFTER DELETE ON action_log BEGIN "
+        "INSERT INTO action_log_fts(action_log_fts, rowid, search_text) "
+        "VALUES ('delete', old.id, old.search_text); END",
+        "CREATE TRIGGER action_log_fts_update AFTER UPDATE OF search_text ON action_log BEGIN "
+        "INSERT INTO action_log_fts(action_log_fts, rowid, search_text) "
+        "VALUES ('delete', old.id, old.search_text); "
+        "INSERT INTO action_log_fts(rowid, search_text) VALUES (new.id, new.search_text); END",
+    ],
+    "postgresql": [
+        "ALTER TABLE action_log ADD COLUMN search_vector tsvector "
+        "GENERATED ALWAYS AS (to_tsvector('simple', search_text)) STORED",
+        "CREATE INDEX ix_action_log_search_vector ON action_log USING gin (search_vector)",
+    ],
+}
+
+# The FTS5 table isn't mapped; this is just enough to query it.
+_action_log_fts = table("action_log_fts", column("rowid"), column("rank", Float))
+
+_REDACTED = "<redacted>"
+_TERM = re.compile(r"\w+", re.UNICODE)
+
+# Rows found only through an actor/subject name sort after every text match
+# (bm25 and the negated ts_rank are <= 0, lower is better).
+_NAME_MATCH_RANK = 1.0
+
+
+def _values(field_changes: dict) -> list:
+    if field_changes.get("_action") == "delete":
+        return list(field_changes.get("snapshot", {}).values())
+    values = []
+    for change in field_changes.values():
+        values.extend(change if isinstance(change, list) else [change])
+    return values
+
+
+def search_text_for(
+    entity_name: str, action: str, field_changes: Optional[dict], reason: Optional[str]
+) -> str:
+    """The text indexed for one ActionLog row: entity, action, reason, the
+    changed field names and their (already redacted) values."""
+    field_changes = field_changes or {}
+    parts: list[Any] = [entity_name, action, reason]
+    parts.extend(field for field in field_changes if field != "_action")
+    parts.extend(value for value in _values(field_changes) if value != _REDACTED)
+    return " ".join(str(part) for part in parts if part not in (None, ""))
+
+
+def _text_matches(session: Session, terms: list[str]):
+    """select(id, rank) of the rows whose search_text has every term as a prefix."""
+    from pack218.entities.models import ActionLog
+
+    if session.get_bind().dialect.name == "postgresql":
+        query = func.to_tsquery("simple", " & ".join(f"{term}:*" for term in terms))
+        vector = literal_column("action_log.search_vector")
+        return select(
+            ActionLog.id.label("id"), (-func.ts_rank(vector, query)).label("rank"),
+        ).where(vector.op("@@")(query))
+
+    match = " ".join(f'"{term}"*' for term in terms)
+    # FTS5's hidden rank column is bm25() by default. Unlike a bm25() call
+    # it survives SQLite flattening this query into the caller's GROUP BY.
+    return select(
+        _action_log_fts.c.rowid.label("id"), _action_log_fts.c.rank.label("rank"),
+    ).where(literal_column("action_log_fts").op("MATCH")(match))
+
+
+def search_terms(q: str) -> list[str]:
+    """The words of a free-text query, lowercased."""
+    return _TERM.findall(q.lower())
+
+
+def matches_terms(search_text: str, terms: list[str]) -> bool:
+    """Whether ``search_text`` has every term as a word prefix, the same
+    test the indexes apply (used where there is no index, e.g. archives)."""
+    words = search_terms(search_text)
+    return all(any(word.startswith(term) for word in words) for term in terms)
+
+
+def matching_user_ids(session: Session, q: str) -> list[int]:
+    """Ids of the users whose name or email contains ``q``."""
+    from pack218.entities.models import User
+
+    like = f"%{q.strip()}%"
+    return session.exec(
+        select(User.id).where(or_(
+            User.first_name.ilike(like),
+            User.last_name.ilike(like),
+            User.email.ilike(like),
+        ))
+    ).all()
+
+
+def search_action_log(session: Session, q: str) -> Optional[Subquery]:
+    """Rank the ActionLog rows matching the free-text query ``q``.
+
+    Returns a subquery of ``(id, rank)`` to join against ActionLog and order
+    by ``rank`` (lower is better), or None when ``q`` has nothing to search
+    for. A row matches when its indexed text contains every word of ``q``
+    as a prefix, or when its actor or subject's name or email contains ``q``.
+    """
+    from pack218.entities.models import ActionLog
+
+    terms = search_terms(q)
+    if not terms:
+        return None
+
+    matches = [_text_matches(session, terms)]
+
+    user_ids = matching_user_ids(session, q)
+    if user_ids:
+        for user_column in (ActionLog.actor_user_id, ActionLog.subject_user_id):
+            matches.append(
+                select(ActionLog.id.label("id"), literal(_NAME_MATCH_RANK, Float).label("rank"))
+                .where(user_column.in_(user_ids))
+            )
+
+    found = union_all(*matches).subquery()
+    return (
+        select(found.c.id, func.min(found.c.rank).label("rank"))
+        .group_by(found.c.id)
+        .subquery("search")
+    )
@@ -1,4 +1,4 @@
-from typing import Optional
+from typing import Literal, Optional
 
 from pydantic import model_validator
 from pydantic_settings import BaseSettings, SettingsConfigDict
@@ -16,6 +16,49 @@ class Configs(BaseSettings):
     google_oauth_client_id: Optional[str] = None
     google_oauth_client_secret: Optional[str] = None
 
+    # Connection pool (see pack218/persistence/engine.py)
+    db_pool_size: int = 5
+    db_max_overflow: int = 10
+    db_pool_timeout: float = 30.0
+    db_pool_pre_ping: bool = True
+    db_pool_recycle: int = 1800  # seconds, -1 to never recycle
+    # Postgres only: server-side statement_timeout, unset for no limit.
+    db_statement_timeout_ms: Optional[int] = None
+    # Checkouts that wait longer than this for a connection are logged.
+    db_pool_slow_checkout_ms: int = 500
+    # Threads for run_db() write batches; keep it within the pool size.
+    db_executor_max_workers: int = 4
+
+    # SQLite connection profile, applied as PRAGMAs on every new connection.
+    sqlite_synchronous: Literal['OFF', 'NORMAL', 'FULL', 'EXTRA'] = 'NORMAL'
+    sqlite_busy_timeout_ms: int = 5000
+    sqlite_mmap_size: int = 256 * 1024 * 1024  # bytes, 0 disables
+    sqlite_cache_size: int = -64000  # negative = KiB, positive = pages
+    sqlite_temp_store: Literal['DEFAULT', 'FILE', 'MEMORY'] = 'MEMORY'
+    # Off by default: existing databases were never written with enforcement on.
+    sqlite_foreign_keys: bool = False
+
+    # ActionLog archival (see pack218/audit/archive.py)
+    action_log_archive_dir: str = 'action_log_archive'
+    action_log_retention_months: int = 12
+    # How often the app checks that next months' action_log partitions exist (Postgres).
+    action_log_partition_check_interval_s: float = 24 * 3600
+
+    # Queue audit rows in action_log_outbox and move them to action_log in the
+    # background (see pack218/audit/outbox.py) instead of inserting them
+    # directly inside each write.
+    audit_outbox: bool = False
+    audit_outbox_batch_size: int = 500
+    audit_outbox_interval_s: float = 1.0
+
+    # Request tracing (see pack218/instrumentation.py): requests slower than
+    # this or issuing more SQL statements than this are logged as warnings.
+    perf_slow_request_ms: int = 1000
+    perf_max_queries_per_request: int = 50
+    # GET /metrics is served only when this is set, to requests sending
+    # 'Authorization: Bearer <token>'.
+    metrics_token: Optional[str] = None
+
     local_dev: bool = False
     local_dev_user_id: int = 1
 
@@ -1,24 +1,73 @@
-from typing import TypeVar, Optional, Type, Sequence
+import time
+from typing import Any, Callable, ClassVar, TypeVar, Optional, Type, Sequence
 
 from nicegui import ui
 from niceguicrud import NiceCRUD, NiceCRUDConfig
 from sqlalchemy import inspect as sa_inspect
-from sqlalchemy.exc import IntegrityError
+from sqlalchemy.exc import IntegrityError, NoResultFound
+from sqlalchemy.orm.attributes import set_committed_value
 from sqlmodel import SQLModel, Session, select
-from pack218.persistence.engine import engine
+from sqlmodel.ext.asyncio.session import AsyncSession
+from pack218.instrumentation import observe_save
+from pack218.persistence.engine import async_engine, engine
 
 
 # Define a generic type variable for the SQLModelWithSave class
 T = TypeVar('T', bound='SQLModelWithSave')
 
 
+async def _run_sync(session: Optional[AsyncSession], fn: Callable[[Session], Any]) -> Any:
+    if session is None:
+        async with AsyncSession(async_engine, expire_on_commit=False) as session:
+            return await session.run_sync(fn)
+    return await session.run_sync(fn)
+
+
+def commit_keeping_loaded(session: Session, instances: Sequence[SQLModel]) -> None:
+    # Commit, then put back the column values ``instances`` had loaded, so
+    # reading them next doesn't SELECT the rows again. Everything else in
+    # the session expires as usual and picks up other writers' changes.
+    # Only safe for rows nothing changed behind the ORM's back (server
+    # defaults, triggers, bulk UPDATEs).
+    session.flush()
+    loaded = []
+    for instance in instances:
+        state = sa_inspect(instance)
+        if state.deleted or state.detached:
+            continue
+        loaded.append((instance, {
+            key: state.dict[key] for key in state.mapper.column_attrs.keys() if key in state.dict
+        }))
+    session.commit()
+    for instance, values in loaded:
+        for key, value in values.items():
+            set_committed_value(instance, key, value)
+        sa_inspect(instance).expired_attributes.difference_update(values)
+
+
 class SQLModelWithSave(SQLModel):
+    # save() ends with a refresh() so the instance reflects what the database
+    # stored. A model whose columns are all set in Python (ids come back from
+    # the INSERT itself) and that no relationship collection caches can turn
+    # it off: after the commit the saved instance keeps its loaded values
+    # instead of being expired (the rest of the session still expires), so
+    # each write is one round trip instead of two. Callers can
+    # override per call with save(refresh=...).
+    refresh_after_save: ClassVar[bool] = True
 
     def pre_save(self):
         # Override this method to add custom logic like validation before saving
         pass
 
-    def save(self, session: Optional[Session] = None) -> None:
+    @classmethod
+    def after_write(cls, session: Session, writes: Sequence[tuple['SQLModelWithSave', dict]], action: str) -> None:
+        # Override this method to keep derived state in sync with a write.
+        # Called with (instance, field_changes) pairs after the rows are
+        # flushed and the audit rows recorded, inside the same transaction
+        # (before commit). Must not commit.
+        pass
+
+    def save(self, session: Optional[Session] = None, refresh: Optional[bool] = None) -> None:
         # Local imports inside make_the_save avoid an import cycle:
         # pack218.audit.hooks imports models which import this module.
         def make_the_save():
@@ -62,7 +111,7 @@ class SQLModelWithSave(SQLModel):
             field_changes = diff_for(self, action)
 
             # 3. Enforce on-behalf rules (raises AuditError on violation).
-            enforce_on_behalf_rules(session, self, action)
+            enforce_on_behalf_rules(session, self, action, field_changes)
 
             # 4. Write the row.
             session.add(self)
@@ -73,14 +122,23 @@ class SQLModelWithSave(SQLModel):
             #    intact and live + tested code paths converge.
             record_change(session, self, action, field_changes=field_changes)
 
-            session.commit()
-            session.refresh(self)
+            # 6. Update derived state (e.g. waitlist positions) atomically
+            #    with the write.
+            type(self).after_write(session, [(self, field_changes)], action)
 
+            if type(self).refresh_after_save if refresh is None else refresh:
+                session.commit()
+                session.refresh(self)
+            else:
+                commit_keeping_loaded(session, [self])
+
+        start = time.perf_counter()
         if session is None:
             with Session(engine) as session:
                 make_the_save()
         else:
             make_the_save()
+        observe_save(type(self).__name__, time.perf_counter() - start)
 
     @classmethod
     def get_by_id(cls: Type[T], id: int, session: Optional[Session] = None, raise_if_not_found: Optional[bool] = False) -> Optional[T]:
@@ -137,13 +195,131 @@ class SQLModelWithSave(SQLModel):
             record_change(s, instance, "delete", field_changes=field_changes)
 
             s.delete(instance)
+            s.flush()
+            cls.after_write(s, [(instance, field_changes)], "delete")
+            s.commit()
+        if session is None:
+            with Session(engine) as session:
+                return execute_query(session)
+        else:
+            return execute_query(session)
+
+    @classmethod
+    def save_many(cls: Type[T], instances: Sequence[T], session: Optional[Session] = None, refresh: Optional[bool] = None) -> None:
+        # Batch save(): every row gets pre_save, its own diff and the on-behalf
+        # checks, but the rows share one flush, one bulk audit insert
+        # (record_changes) and one commit. Enforcement runs for the whole
+        # batch before anything is written, so an AuditError leaves the
+        # database untouched (the caller rolls back the session).
+        def make_the_save(s: Session) -> None:
+            from pack218.audit import (
+                diff_for,
+                enforce_on_behalf_rules,
+                record_changes,
+            )
+            from pack218.entities.models import ActionLog
+
+            if issubclass(cls, ActionLog):
+                raise RuntimeError("ActionLog rows are append-only; use record_changes()")
+
+            writes = {"create": [], "update": []}
+            with s.no_autoflush:
+                for instance in instances:
+                    state = sa_inspect(instance)
+                    action = "create" if state.transient or state.pending else "update"
+                    instance.pre_save()
+                    field_changes = diff_for(instance, action)
+                    enforce_on_behalf_rules(s, instance, action, field_changes)
+                    writes[action].append((instance, field_changes))
+
+            s.add_all(instances)
+            s.flush()  # populate ids
+            record_changes(s, [
+                (instance, action, field_changes)
+                for action, batch in writes.items()
+                for instance, field_changes in batch
+            ])
+            for action, batch in writes.items():
+                if batch:
+                    cls.after_write(s, batch, action)
+            if not (cls.refresh_after_save if refresh is None else refresh):
+                commit_keeping_loaded(s, instances)
+                return
+            ids = [instance.id for instance in instances]
+            s.commit()
+            # Reload every row in one query rather than one refresh() each.
+            if ids:
+                s.exec(select(cls).where(cls.id.in_(ids)).execution_options(populate_existing=True)).all()
+
+        start = time.perf_counter()
+        if session is None:
+            with Session(engine) as session:
+                make_the_save(session)
+        else:
+            make_the_save(session)
+        observe_save(cls.__name__, time.perf_counter() - start)
+
+    @classmethod
+    def delete_many(cls: Type[T], ids: Sequence[int], session: Optional[Session] = None) -> None:
+        # Batch delete_by_id(): rows are loaded in one query, each is checked
+        # and snapshotted, and the audit rows go out in one bulk insert ahead
+        # of a single flush and commit. Raises NoResultFound if any id is
+        # missing, before anything is deleted.
+        def execute_query(s: Session) -> None:
+            from pack218.audit import (
+                diff_for,
+                enforce_on_behalf_rules,
+                record_changes,
+            )
+            from pack218.entities.models import ActionLog
+
+            if issubclass(cls, ActionLog):
+                raise RuntimeError(
+                    "ActionLog rows are append-only; delete_many is not allowed"
+                )
+
+            instances = s.exec(select(cls).where(cls.id.in_(ids))).all()
+            missing = set(ids) - {instance.id for instance in instances}
+            if missing:
+                raise NoResultFound(f"No {cls.__name__} rows with ids {sorted(missing)}")
+
+            writes = []
+            for instance in instances:
+                enforce_on_behalf_rules(s, instance, "delete")
+                writes.append((instance, diff_for(instance, "delete")))
+            record_changes(s, [(instance, "delete", field_changes) for instance, field_changes in writes])
+
+            for instance in instances:
+                s.delete(instance)
+            s.flush()
+            cls.after_write(s, writes, "delete")
             s.commit()
+
         if session is None:
             with Session(engine) as session:
                 return execute_query(session)
         else:
             return execute_query(session)
 
+    # Async variants for the async pages. Each runs the sync method above
+    # through AsyncSession.run_sync, so the audit hook and after_write behave
+    # exactly the same; only the database I/O is awaited.
+
+    @classmethod
+    async def aget_by_id(cls: Type[T], id: int, session: Optional[AsyncSession] = None, raise_if_not_found: Optional[bool] = False) -> Optional[T]:
+        return await _run_sync(session, lambda s: cls.get_by_id(id=id, session=s, raise_if_not_found=raise_if_not_found))
+
+    @classmethod
+    async def aget_all(cls: Type[T], session: Optional[AsyncSession] = None) -> Sequence[T]:
+        return await _run_sync(session, lambda s: cls.get_all(session=s))
+
+    async def asave(self, session: Optional[AsyncSession] = None, refresh: Optional[bool] = None) -> None:
+        await _run_sync(session, lambda s: self.save(session=s, refresh=refresh))
+
+    @classmethod
+    async def adelete_by_id(cls: Type[T], id: int, session: Optional[AsyncSession] = None) -> None:
+        await _run_sync(session, lambda s: cls.delete_by_id(id=id, session=s))
+
 
 class NiceCRUDWithSQL(NiceCRUD):
 
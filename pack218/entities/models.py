@@ -1,27 +1,41 @@
-from datetime import datetime
-from typing import Optional, Literal, Annotated, List, Type, Union
+from contextvars import ContextVar
+from datetime import date, datetime
+from typing import Optional, Literal, Annotated, List, Sequence, Tuple, Type, Union
 import bcrypt
 import phonenumbers
 from nicegui import nicegui
 from sqlalchemy.exc import NoResultFound
+from sqlalchemy.orm import contains_eager, lazyload
 from typing_extensions import get_args
 
 from pydantic import BeforeValidator, EmailStr, computed_field
 from pydantic_extra_types.phone_numbers import PhoneNumber
 from starlette.requests import Request
-from sqlalchemy import String, Column, Index, JSON
-from collections import defaultdict
-from sqlmodel import Field, Session, select, Relationship
-
-from pack218.entities import SQLModelWithSave, T
+from sqlalchemy import DDL, String, Column, Index, LargeBinary, Text, case, text, update
+from sqlalchemy import event as sa_event
+from sqlalchemy import Date as SADate
+from sqlalchemy.types import TypeDecorator
+from sqlmodel import Field, Session, SQLModel, select, Relationship
+
+from pack218.audit.encoding import pack as pack_field_changes, unpack as unpack_field_changes
+from pack218.audit.search import ACTION_LOG_SEARCH_DDL
+from pack218.entities import SQLModelWithSave, T, commit_keeping_loaded
 from pack218.persistence import engine
 
 # Use US phone numbers only
 PhoneNumber.default_region_code = 'US'
 
+# (request, email, user) for the user resolved by User.get_current() in this
+# request's context. chrome(), the admin checks and the page renderers all
+# ask for the current user; only the first call per request hits the database.
+current_user_cache: ContextVar[Optional[Tuple[Request, str, 'User']]] = ContextVar(
+    "pack218_current_user", default=None)
 
 
 class EventRegistration(SQLModelWithSave, table=True, title="Event Registration"):
+    __table_args__ = (
+        Index("ix_eventregistration_event_waitlist", "event_id", "waitlist_position"),
+    )
 
     id: int | None = Field(default=None, primary_key=True)
 
@@ -44,6 +58,15 @@ class EventRegistration(SQLModelWithSave, table=True, title="Event Registration"
 
     has_paid: bool = Field(default=False, title="Has paid for the event")
 
+    # Materialized by refresh_waitlist() inside every write that can move the
+    # waitlist (see after_write on EventRegistration, Event and User), so
+    # reads never have to recompute it. None means the registration has a spot.
+    waitlist_position: int | None = Field(default=None, title="Waitlist Position")
+
+    # Every column is set in Python and after_write moves waitlist positions
+    # through the session, so the saved instance is already current.
+    refresh_after_save = False
+
     def user(self, session: Session) -> 'User':
         return User.get_by_id(id=self.user_id, session=session)
 
@@ -64,6 +87,20 @@ class EventRegistration(SQLModelWithSave, table=True, title="Event Registration"
         results = session.exec(statement)
         return results.one_or_none()
 
+    @staticmethod
+    def get_event_ids_for_family(session: Session, user: 'User') -> set[int]:
+        """Ids of the events any member of ``user``'s family is registered for.
+
+        A user without a family only counts their own registrations.
+        """
+        statement = select(EventRegistration.event_id).distinct()
+        if user.family_id is None:
+            statement = statement.where(EventRegistration.user_id == user.id)
+        else:
+            statement = statement.join(User, User.id == EventRegistration.user_id).where(
+                User.family_id == user.family_id)
+        return set(session.exec(statement).all())
+
     @staticmethod
     def get_or_create_by_user_and_event(session: Session, user_id: int, event_id: int) -> 'EventRegistration':
         event_registration = EventRegistration.get_by_user_and_event(session=session, user_id=user_id, event_id=event_id)
@@ -73,69 +110,245 @@ class EventRegistration(SQLModelWithSave, table=True, title="Event Registration"
         return event_registration
 
     @staticmethod
-    def compute_waitlist_status(session: Session, event_id: int) -> dict[int, bool]:
-        """Returns {registration_id: is_waitlisted} for all registrations of an event."""
-        event = Event.get_by_id(event_id, session=session)
-        registrations = EventRegistration.select_by_event(session=session, event_id=event_id)
+    def save_family_registration(
+        session: Session, event_id: int, selections: dict[int, dict[str, bool]]
+    ) -> List[Tuple[int, str, Optional[str]]]:
+        """Apply a submitted registration form in one transaction.
+
+        ``selections`` maps each member's user id to its checkbox values; a
+        member with nothing selected has their registration removed. Every
+        row goes through the same steps as save() / delete_by_id() (pre_save,
+        diff, on-behalf enforcement, one ActionLog row with its own diff,
+        after_write), but all of them share a single flush, one bulk audit
+        insert and one commit.
+        Members registering for the first time share one registration_ts,
+        so the family enters the waitlist as one batch.
+
+        Enforcement runs for every row before anything is written: a member
+        whose change is rejected keeps their previous registration and the
+        others still go through. Returns ``(user_id, outcome, error)`` per
+        member touched, with outcome 'saved', 'removed' or 'rejected'.
+        """
+        from pack218.audit import AuditError, diff_for, enforce_on_behalf_rules, record_changes
+
+        existing = {
+            r.user_id: r for r in session.exec(
+                select(EventRegistration)
+                .where(EventRegistration.event_id == event_id)
+                .where(EventRegistration.user_id.in_(list(selections)))
+            ).all()
+        }
+        registration_ts = datetime.now()
+        writes: dict[str, list[tuple[EventRegistration, dict]]] = {"create": [], "update": [], "delete": []}
+        outcomes = []
+
+        # 1. Validate, diff and enforce every row. no_autoflush keeps a
+        #    pending change from reaching the database before its verdict.
+        with session.no_autoflush:
+            for user_id, fields in selections.items():
+                registration = existing.get(user_id)
+                if not any(fields.values()):
+                    if registration is None:
+                        continue
+                    action = "delete"
+                else:
+                    if registration is None:
+                        registration = EventRegistration(
+                            user_id=user_id, event_id=event_id, registration_ts=registration_ts)
+                        action = "create"
+                    else:
+                        action = "update"
+                    for field_name, value in fields.items():
+                        setattr(registration, field_name, value)
+                    registration.pre_save()
+                try:
+                    field_changes = diff_for(registration, action)
+                    enforce_on_behalf_rules(session, registration, action, field_changes)
+                except AuditError as e:
+                    if action == "update":
+                        # Drop the rejected in-memory change.
+                        session.expire(registration)
+                    outcomes.append((user_id, "rejected", str(e)))
+                    continue
+                writes[action].append((registration, field_changes))
+                outcomes.append((user_id, "removed" if action == "delete" else "saved", None))
+
+        # 2. Write everything with its audit rows (one bulk insert), then
+        #    commit once. Deletes are recorded while their rows still exist.
+        deletes = [(registration, "delete", field_changes) for registration, field_changes in writes["delete"]]
+        for registration, _ in writes["delete"]:
+            session.delete(registration)
+        session.add_all([registration for registration, _ in writes["create"] + writes["update"]])
+        session.flush()
+        record_changes(session, deletes + [
+            (registration, action, field_changes)
+            for action in ("create", "update")
+            for registration, field_changes in writes[action]
+        ])
+        for action, batch in writes.items():
+            if batch:
+                EventRegistration.after_write(session, batch, action)
+        commit_keeping_loaded(session, [
+            registration for action in ("create", "update") for registration, _ in writes[action]
+        ])
+        return outcomes
 
-        if not event.capacity:
-            return {r.id: False for r in registrations}
+    @staticmethod
+    def compute_waitlist_positions(session: Session, event_id: int) -> dict[int, Optional[int]]:
+        """Returns {registration_id: waitlist position} for all registrations of an event.
+
+        The position is 1-based and shared by the members of a batch; it is
+        None for registrations that have a spot. A single joined query returns
+        (id, registration_ts, family_id) for every registration, already
+        ordered by registration time, along with the event's capacity.
+        Batching and the family merge then run over that sorted list without
+        any further round trips.
+        """
+        statement = (
+            select(EventRegistration.id, EventRegistration.registration_ts, User.family_id, Event.capacity)
+            .join(User, User.id == EventRegistration.user_id)
+            .join(Event, Event.id == EventRegistration.event_id)
+            .where(EventRegistration.event_id == event_id)
+            .order_by(EventRegistration.registration_ts, EventRegistration.id)
+        )
+        rows = session.exec(statement).all()
+        if not rows:
+            return {}
+
+        capacity = rows[0][3]
+        if not capacity:
+            return {registration_id: None for registration_id, _ts, _fid, _cap in rows}
 
         # Group registrations into batches by (family_id, registration_ts).
         # Members registered at the same time stay together, but later
         # additions by the same family are treated as separate batches so
-        # they don't unfairly jump ahead of other registrations.
-        batches: dict[tuple[int, datetime], list[EventRegistration]] = defaultdict(list)
-        for r in registrations:
-            user = r.user(session=session)
-            batches[(user.family_id, r.registration_ts)].append(r)
-
-        # Sort batches by registration_ts
-        sorted_batches = sorted(batches.items(), key=lambda item: item[0][1])
-
-        result: dict[int, bool] = {}
+        # they don't unfairly jump ahead of other registrations. Rows arrive
+        # sorted by (registration_ts, id), so batches sharing a timestamp are
+        # contiguous and keep first-registration order among themselves.
+        batches: list[tuple[int, list[int]]] = []
+        same_ts_batches: dict[int, list[int]] = {}
+        previous_ts = None
+        for registration_id, registration_ts, family_id, _capacity in rows:
+            if registration_ts != previous_ts:
+                same_ts_batches = {}
+                previous_ts = registration_ts
+            batch = same_ts_batches.get(family_id)
+            if batch is None:
+                batch = same_ts_batches[family_id] = []
+                batches.append((family_id, batch))
+            batch.append(registration_id)
+
+        waitlisted_batches: list[tuple[int, list[int]]] = []
+        admitted_families: set[int] = set()
         headcount = 0
-        for _key, batch_regs in sorted_batches:
-            waitlisted = headcount >= event.capacity
-            for r in batch_regs:
-                result[r.id] = waitlisted
-            if not waitlisted:
-                headcount += len(batch_regs)
-
-        # Post-processing: ensure families are never split.
-        # If any batch of a family got in, all members of that family are in.
-        family_reg_ids: dict[int, list[int]] = defaultdict(list)
-        for r in registrations:
-            user = r.user(session=session)
-            family_reg_ids[user.family_id].append(r.id)
-
-        for _fid, reg_ids in family_reg_ids.items():
-            if any(not result[rid] for rid in reg_ids):
-                for rid in reg_ids:
-                    result[rid] = False
+        for family_id, batch_ids in batches:
+            if headcount >= capacity:
+                waitlisted_batches.append((family_id, batch_ids))
+            else:
+                headcount += len(batch_ids)
+                admitted_families.add(family_id)
+
+        # Ensure families are never split: if any batch of a family got in,
+        # all members of that family are in.
+        result: dict[int, Optional[int]] = {registration_id: None for registration_id, _ts, _fid, _cap in rows}
+        position = 0
+        for family_id, batch_ids in waitlisted_batches:
+            if family_id in admitted_families:
+                continue
+            position += 1
+            for registration_id in batch_ids:
+                result[registration_id] = position
 
         return result
 
+    @staticmethod
+    def compute_waitlist_status(session: Session, event_id: int) -> dict[int, bool]:
+        """Returns {registration_id: is_waitlisted} for all registrations of an event."""
+        positions = EventRegistration.compute_waitlist_positions(session=session, event_id=event_id)
+        return {registration_id: position is not None for registration_id, position in positions.items()}
+
+    @staticmethod
+    def refresh_waitlist(session: Session, event_id: int) -> None:
+        """Recompute the event's waitlist and persist any changed ``waitlist_position``.
+
+        Runs inside the caller's transaction (it flushes but never commits) so
+        the materialized positions commit atomically with the write that
+        moved them. Positions are derived state, so they are written straight
+        to the rows rather than through save() and are not audited.
+        """
+        positions = EventRegistration.compute_waitlist_positions(session=session, event_id=event_id)
+        if not positions:
+            return
+        statement = select(EventRegistration).where(EventRegistration.id.in_(positions))
+        for registration in session.exec(statement).all():
+            position = positions[registration.id]
+            if registration.waitlist_position != position:
+                registration.waitlist_position = position
+                session.add(registration)
+        session.flush()
+
+    @classmethod
+    def after_write(cls, session: Session, writes: Sequence[Tuple[SQLModelWithSave, dict]], action: str) -> None:
+        event_ids = set()
+        for registration, field_changes in writes:
+            if action == "update" and not (_WAITLIST_INPUT_FIELDS & field_changes.keys()):
+                continue
+            event_ids.add(registration.event_id)
+            before_event_id = field_changes.get("event_id", [None])[0]
+            if before_event_id is not None:
+                event_ids.add(before_event_id)
+        for event_id in sorted(event_ids):
+            EventRegistration.refresh_waitlist(session=session, event_id=event_id)
+
+
+# Registration columns that decide waitlist order. An update touching none of
+# them (e.g. a meal checkbox) cannot move anyone on the waitlist.
+_WAITLIST_INPUT_FIELDS = frozenset({"event_id", "user_id", "registration_ts"})
+
 
 EventType = Literal["Camping", "Other"]
 
 
 def is_date(value: str) -> str:
-    # See if this is a valid date of format YYYY-MM-DD
+    # See if this is a valid date of format YYYY-MM-DD. strptime also accepts
+    # '2026-6-1', so return the zero-padded form: stored dates are compared as
+    # text by SQLite and must sort like dates.
     try:
-        datetime.strptime(value, '%Y-%m-%d')
+        parsed = datetime.strptime(value, '%Y-%m-%d')
     except ValueError:
         raise ValueError(f'{value} is not a valid date (Expecting format YYYY-MM-DD)')
-    return value
+    return parsed.date().isoformat()
 
 
 Date = Annotated[str, BeforeValidator(is_date)]
 
 
+class IsoDateString(TypeDecorator):
+    """Native DATE column that reads and writes 'YYYY-MM-DD' strings.
+
+    Lets the database sort, range-filter and index real dates while
+    ``Event.date`` keeps its string API (forms, NiceCRUD and f-strings all
+    use it as text). Table models skip pydantic validation, so the format
+    is checked again on the way in.
+    """
+    impl = SADate
+    cache_ok = True
+
+    def process_bind_param(self, value, dialect):
+        if value is None or isinstance(value, date):
+            return value
+        return date.fromisoformat(is_date(value))
+
+    def process_result_value(self, value, dialect):
+        if value is None:
+            return None
+        return value.strftime('%Y-%m-%d')
+
+
 class Event(SQLModelWithSave, table=True, title="Event"):
     id: int | None = Field(default=None, primary_key=True)
     event_type: EventType = Field(default="Camping", sa_type=String, title="Event Type")
-    date: Date = Field(default_factory=lambda: datetime.now().strftime('%Y-%m-%d'), title="Date")
+    date: Date = Field(default_factory=lambda: datetime.now().strftime('%Y-%m-%d'), sa_type=IsoDateString, title="Date", index=True)
     location: str = Field(default="", title="Location")
     details: str = Field(default="", title="Details", description="textarea:Details about the event")
     duration_in_days: int = Field(default=2, title="Duration", description="Duration of the event (in days)")
@@ -169,6 +382,25 @@ class Event(SQLModelWithSave, table=True, title="Event"):
     def get_registrations(self, session: Session) -> List['EventRegistration']:
         return EventRegistration.select_by_event(session=session, event_id=self.id)
 
+    def load_roster(self, session: Session) -> List[Tuple['EventRegistration', 'User', Optional['Family']]]:
+        """Every registration of this event with its User and Family, in one SELECT.
+
+        The family is joined in (outer join, since family_id is nullable) and
+        installed as ``User.family`` so neither the relationship nor the
+        selectin chain to ``Family.family_members`` issues follow-up queries.
+        Callers should build every table / summary from the returned list
+        rather than calling ``r.user(...)`` or ``Family.get_by_id(...)``.
+        """
+        statement = (
+            select(EventRegistration, User, Family)
+            .join(User, User.id == EventRegistration.user_id)
+            .outerjoin(Family, Family.id == User.family_id)
+            .where(EventRegistration.event_id == self.id)
+            .options(contains_eager(User.family), lazyload(Family.family_members))
+        )
+        results = session.exec(statement)
+        return [(r, u, f) for r, u, f in results.all()]
+
     @property
     def date_as_datetime(self) -> datetime:
         return datetime.strptime(self.date, '%Y-%m-%d')
@@ -177,24 +409,62 @@ class Event(SQLModelWithSave, table=True, title="Event"):
     def is_upcoming(self) -> bool:
         return self.date_as_datetime > datetime.now()
 
+    @staticmethod
+    def _today() -> str:
+        # Bound through IsoDateString, so SQL compares native DATE values and
+        # the predicates below can use the date index as a range scan.
+        return datetime.now().strftime('%Y-%m-%d')
+
     @staticmethod
     def get_upcoming(session: Session) -> List['Event']:
-        return sorted(
-            [e for e in Event.get_all(session=session) if e.is_upcoming and not e.cancelled],
-            key=lambda e: e.date,
+        statement = (
+            select(Event)
+            .where(Event.date > Event._today(), Event.cancelled == False)  # noqa: E712
+            .order_by(Event.date)
         )
+        return list(session.exec(statement).all())
 
     @staticmethod
     def get_past(session: Session) -> List['Event']:
-        return [e for e in Event.get_all(session=session) if not e.is_upcoming and not e.cancelled]
+        statement = (
+            select(Event)
+            .where(Event.date <= Event._today(), Event.cancelled == False)  # noqa: E712
+            .order_by(Event.date.desc())
+        )
+        return list(session.exec(statement).all())
 
     @staticmethod
     def get_cancelled(session: Session) -> List['Event']:
-        return sorted(
-            [e for e in Event.get_all(session=session) if e.cancelled],
-            key=lambda e: e.date,
-            reverse=True,
-        )
+        statement = select(Event).where(Event.cancelled == True).order_by(Event.date.desc())  # noqa: E712
+        return list(session.exec(statement).all())
+
+    @staticmethod
+    def get_by_bucket(session: Session) -> Tuple[List['Event'], List['Event'], List['Event']]:
+        """Return (upcoming, past, cancelled) events from a single query.
+
+        The bucket is computed in SQL and rows come back ordered by date, so
+        Python only splits the list: upcoming soonest first, past and
+        cancelled most recent first (the same orders as the helpers above).
+        """
+        bucket = case(
+            (Event.cancelled == True, "cancelled"),  # noqa: E712
+            (Event.date > Event._today(), "upcoming"),
+            else_="past",
+        ).label("bucket")
+        statement = select(Event, bucket).order_by(Event.date, Event.id)
+        buckets: dict[str, List[Event]] = {"upcoming": [], "past": [], "cancelled": []}
+        for event, event_bucket in session.exec(statement).all():
+            buckets[event_bucket].append(event)
+        return buckets["upcoming"], buckets["past"][::-1], buckets["cancelled"][::-1]
+
+    @classmethod
+    def after_write(cls, session: Session, writes: Sequence[Tuple[SQLModelWithSave, dict]], action: str) -> None:
+        # A capacity change can move every registration on or off the waitlist.
+        if action != "update":
+            return
+        for event, field_changes in writes:
+            if "capacity" in field_changes:
+                EventRegistration.refresh_waitlist(session=session, event_id=event.id)
 
 
 class Family(SQLModelWithSave, table=True):
@@ -335,7 +605,7 @@ class User(SQLModelWithSave, table=True):
 
     @property
     def family_size(self) -> int:
-        family_members = self.get_all_from_family()
+        family_members = self.get_all_from_family(session=Session.object_session(self))
         return len(family_members)
 
 
@@ -365,11 +635,30 @@ class User(SQLModelWithSave, table=True):
 
         self.set_hashed_password(new_password)
 
-    def get_all_from_family(self) -> List['User']:
-        with Session(engine) as session:
+    def get_all_from_family(self, session: Optional[Session] = None) -> List['User']:
+        """Every member of this user's family, this user included.
+
+        When this user is attached to a session, the members come from
+        ``self.family.family_members``. Both relationships are selectin-loaded
+        into that session's identity map, so repeated calls during a render
+        cost no extra queries. A detached user falls back to a query on
+        ``session`` (or a short-lived session when none is given). A user
+        without a family only has themselves.
+        """
+        if self.family_id is None:
+            return [self]
+        if Session.object_session(self) is not None and self.family is not None:
+            return list(self.family.family_members)
+
+        def execute_query(s: Session) -> List[User]:
             statement = select(User).where(User.family_id == self.family_id)
-            results = session.exec(statement)
-            return list(results.all())
+            return list(s.exec(statement).all())
+
+        if session is None:
+            with Session(engine) as session:
+                return execute_query(session)
+        else:
+            return execute_query(session)
 
     @staticmethod
     def get_by_username(username: str, session: Optional[Session] = None) -> 'User':
@@ -412,10 +701,26 @@ class User(SQLModelWithSave, table=True):
 
     @staticmethod
     def get_current(request: Request, session: Optional[Session] = None) -> Optional['User']:
+        """The logged-in user, resolved once per request.
+
+        The result is cached in ``current_user_cache`` for this request. A
+        cached instance is only reused when it belongs to ``session`` (or no
+        session was given), so callers never get an object attached to some
+        other session.
+        """
         email = request.session.get('user', {}).get('email')
         if email is None:
             return None
-        return User.get_by_email_or_none(email, session=session)
+        cached = current_user_cache.get()
+        if cached is not None:
+            cached_request, cached_email, cached_user = cached
+            if cached_request is request and cached_email == email and (
+                    session is None or cached_user in session):
+                return cached_user
+        user = User.get_by_email_or_none(email, session=session)
+        if user is not None:
+            current_user_cache.set((request, email, user))
+        return user
 
     @staticmethod
     def current_user_is_admin(request: Request, session: Optional[Session] = None) -> bool:
@@ -446,6 +751,27 @@ class User(SQLModelWithSave, table=True):
         except Exception:
             return True
 
+    @classmethod
+    def after_write(cls, session: Session, writes: Sequence[Tuple[SQLModelWithSave, dict]], action: str) -> None:
+        # Families are never split on the waitlist, so moving a user to another
+        # family can reorder every event they are registered for.
+        if action != "update":
+            return
+        moved = [user for user, field_changes in writes if "family_id" in field_changes]
+        if not moved:
+            return
+        # Rows about a user follow them to their new family, so the on-behalf
+        # panel's family range scan still finds what was logged before the move.
+        for user in moved:
+            for table in (ActionLog, ActionLogOutbox):
+                session.execute(
+                    update(table).where(table.subject_user_id == user.id).values(subject_family_id=user.family_id)
+                )
+        user_ids = [user.id for user in moved]
+        statement = select(EventRegistration.event_id).where(EventRegistration.user_id.in_(user_ids)).distinct()
+        for event_id in sorted(session.exec(statement).all()):
+            EventRegistration.refresh_waitlist(session=session, event_id=event_id)
+
     # @classmethod
     # def delete_by_id(cls: Type[T], id: int, session: Optional[Session] = None):
     #     # Ensure we're not trying to delete ourselves
@@ -458,6 +784,19 @@ class User(SQLModelWithSave, table=True):
 ActionType = Literal["create", "update", "delete"]
 
 
+class PackedFieldChanges(TypeDecorator):
+    """Binary column holding a field_changes dict in the compact encoding of
+    ``pack218.audit.encoding``; reads and writes plain dicts."""
+    impl = LargeBinary
+    cache_ok = True
+
+    def process_bind_param(self, value, dialect):
+        return None if value is None else pack_field_changes(value)
+
+    def process_result_value(self, value, dialect):
+        return None if value is None else unpack_field_changes(value)
+
+
 class ActionLog(SQLModelWithSave, table=True):
     # Append-only audit log. One row per write through SQLModelWithSave.save() / delete_by_id().
     # subject_user_id is null for Family-scoped writes (the panel surfaces those by joining
@@ -466,15 +805,56 @@ class ActionLog(SQLModelWithSave, table=True):
     __tablename__ = "action_log"
     __table_args__ = (
         Index("ix_action_log_subject_created", "subject_user_id", "created_at"),
+        # The on-behalf panel: subject = me, actor != me, newest first.
+        Index("ix_action_log_subject_actor_created", "subject_user_id", "actor_user_id", "created_at"),
         Index("ix_action_log_entity", "entity_name", "entity_id"),
+        # Keyset pagination of the admin Action Log page.
+        Index("ix_action_log_created_id", "created_at", "id"),
+        # The on-behalf panel for users in a family.
+        Index("ix_action_log_subject_family_created", "subject_family_id", text("created_at DESC")),
     )
 
     id: int | None = Field(default=None, primary_key=True)
     actor_user_id: int | None = Field(default=None, foreign_key="user.id", index=True)
     subject_user_id: int | None = Field(default=None, foreign_key="user.id")
+    # The subject's current family (the family itself for Family writes), so
+    # the parent panel is one range scan per family. User.after_write
+    # re-stamps a user's rows when they move family. No foreign key: a
+    # family can be deleted while its log rows remain.
+    subject_family_id: int | None = Field(default=None)
+    entity_name: str = Field(sa_type=String)
+    entity_id: int
+    action: ActionType = Field(sa_type=String)
+    field_changes: dict = Field(default_factory=dict, sa_column=Column(PackedFieldChanges, nullable=False))
+    reason: str | None = Field(default=None)
+    created_at: datetime = Field(default_factory=datetime.now)
+    # What the admin Action Log search indexes (see pack218.audit.search).
+    search_text: str = Field(default="", sa_type=Text)
+
+
+class ActionLogOutbox(SQLModel, table=True):
+    # ActionLog rows waiting to be moved into action_log, used when
+    # config.audit_outbox is on (see pack218.audit.outbox). Same values as
+    # ActionLog minus search_text, and no foreign keys or secondary indexes,
+    # so queueing a row is the cheapest insert the write transaction can do.
+    # A plain SQLModel: rows are only ever written by the audit hook and
+    # removed by the drainer.
+    __tablename__ = "action_log_outbox"
+
+    id: int | None = Field(default=None, primary_key=True)
+    actor_user_id: int | None = Field(default=None)
+    subject_user_id: int | None = Field(default=None)
+    subject_family_id: int | None = Field(default=None)
     entity_name: str = Field(sa_type=String)
     entity_id: int
     action: ActionType = Field(sa_type=String)
-    field_changes: dict = Field(default_factory=dict, sa_column=Column(JSON, nullable=False))
+    field_changes: dict = Field(default_factory=dict, sa_column=Column(PackedFieldChanges, nullable=False))
     reason: str | None = Field(default=None)
     created_at: datetime = Field(default_factory=datetime.now)
+
+
+# The search index lives outside the mapped columns (an FTS5 table on SQLite,
+# a generated tsvector column on Postgres); create it along with the table.
+for _dialect, _statements in ACTION_LOG_SEARCH_DDL.items():
+    for _statement in _statements:
+        sa_event.listen(ActionLog.__table__, "after_create", DDL(_statement).execute_if(dialect=_dialect))
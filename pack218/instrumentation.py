@@ -0,0 +1,212 @@
+"""Per-request SQL and latency tracing for the web app.
+
+``RequestTracingMiddleware`` opens a ``RequestTrace`` for every page request
+(each ``@ui.page`` and the plain routes next to them), and the cursor
+listeners installed by ``instrument_engine()`` add every SQL statement run
+while it is open: the count, total time and the slowest one. When the
+response is done the trace is folded into per-route totals (``route_stats()``,
+shown at ``/admin/perf``) and a warning is logged if the request was slow or
+issued more statements than ``config.perf_max_queries_per_request`` — the
+usual sign of an N+1 loop in a page.
+
+The trace lives in a ContextVar, so statements run by async sessions and by
+``run_db()`` (which copies the caller's context) are counted too. Statements
+from NiceGUI event handlers run over the websocket, outside any request,
+and are not traced.
+"""
+import bisect
+import copy
+import logging
+import threading
+import time
+from contextlib import contextmanager
+from contextvars import ContextVar
+from dataclasses import dataclass, field
+from typing import Iterator, Optional
+
+from sqlalchemy import event
+from sqlalchemy.engine import Engine
+
+from pack218.config import config
+
+logger = logging.getLogger(__name__)
+
+# Statements are kept for display only; long ones are cut to this length.
+_SQL_PREVIEW_CHARS = 300
+
+# Upper bounds (seconds) of the latency histogram buckets, as Prometheus' defaults.
+LATENCY_BUCKETS_S = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+
+
+@dataclass
+class Histogram:
+    """Latency distribution over LATENCY_BUCKETS_S; ``counts[i]`` holds the
+    observations in bucket i only, the last entry those above every bound."""
+    counts: list[int] = field(default_factory=lambda: [0] * (len(LATENCY_BUCKETS_S) + 1))
+    total_s: float = 0.0
+
+    def observe(self, seconds: float) -> None:
+        self.counts[bisect.bisect_left(LATENCY_BUCKETS_S, seconds)] += 1
+        self.total_s += seconds
+
+    @property
+    def count(self) -> int:
+        return sum(self.counts)
+
+
+@dataclass
+class RequestTrace:
+    """What one request did so far."""
+    route: str
+    queries: int = 0
+    db_s: float = 0.0
+    slowest_s: float = 0.0
+    slowest_sql: str = ""
+
+    def record(self, statement: str, elapsed_s: float) -> None:
+        self.queries += 1
+        self.db_s += elapsed_s
+        if elapsed_s > self.slowest_s:
+            self.slowest_s, self.slowest_sql = elapsed_s, statement
+
+
+@dataclass
+class RouteStats:
+    """Running totals for one route since startup (or the last reset)."""
+    route: str
+    requests: int = 0
+    slow_requests: int = 0
+    total_render_s: float = 0.0
+    max_render_s: float = 0.0
+    total_queries: int = 0
+    max_queries: int = 0
+    total_db_s: float = 0.0
+    slowest_s: float = 0.0
+    slowest_sql: str = ""
+    latency: Histogram = field(default_factory=Histogram)
+
+    def add(self, trace: RequestTrace, render_s: float, slow: bool) -> None:
+        self.requests += 1
+        self.latency.observe(render_s)
+        self.slow_requests += slow
+        self.total_render_s += render_s
+        self.max_render_s = max(self.max_render_s, render_s)
+        self.total_queries += trace.queries
+        self.max_queries = max(self.max_queries, trace.queries)
+        self.total_db_s += trace.db_s
+        if trace.slowest_s > self.slowest_s:
+            self.slowest_s, self.slowest_sql = trace.slowest_s, trace.slowest_sql
+
+
+current_trace: ContextVar[Optional[RequestTrace]] = ContextVar("pack218_request_trace", default=None)
+
+_lock = threading.Lock()
+_route_stats: dict[str, RouteStats] = {}
+_save_latency: dict[str, Histogram] = {}
+_audit_rows_written = 0
+
+
+def _finish(trace: RequestTrace, render_s: float) -> None:
+    slow = (
+        render_s * 1000 >= config.perf_slow_request_ms
+        or trace.queries > config.perf_max_queries_per_request
+    )
+    if slow:
+        logger.warning(
+            f"{trace.route}: {render_s * 1000:.0f} ms, {trace.queries} SQL statements "
+            f"({trace.db_s * 1000:.0f} ms in the database, slowest {trace.slowest_s * 1000:.0f} ms: "
+            f"{trace.slowest_sql[:120]})"
+        )
+    with _lock:
+        _route_stats.setdefault(trace.route, RouteStats(trace.route)).add(trace, render_s, slow)
+
+
+@contextmanager
+def request_trace(route: str) -> Iterator[RequestTrace]:
+    """Trace the statements run inside the block and record them under ``route``."""
+    trace = RequestTrace(route)
+    token = current_trace.set(trace)
+    start = time.perf_counter()
+    try:
+        yield trace
+    finally:
+        current_trace.reset(token)
+        _finish(trace, time.perf_counter() - start)
+
+
+def route_stats() -> list[RouteStats]:
+    """A snapshot of the per-route totals."""
+    with _lock:
+        return copy.deepcopy(list(_route_stats.values()))
+
+
+def reset_route_stats() -> None:
+    with _lock:
+        _route_stats.clear()
+
+
+def observe_save(entity_name: str, seconds: float) -> None:
+    """Record how long one save() / save_many() of ``entity_name`` took."""
+    with _lock:
+        _save_latency.setdefault(entity_name, Histogram()).observe(seconds)
+
+
+def save_latency() -> dict[str, Histogram]:
+    """A snapshot of the save() latency per entity since startup."""
+    with _lock:
+        return copy.deepcopy(_save_latency)
+
+
+def count_audit_rows(n: int) -> None:
+    """Count audit rows written (or queued in the outbox)."""
+    global _audit_rows_written
+    with _lock:
+        _audit_rows_written += n
+
+
+def audit_rows_written() -> int:
+    return _audit_rows_written
+
+
+def instrument_engine(engine: Engine) -> None:
+    """Count ``engine``'s statements into the current request's trace.
+
+    For an AsyncEngine pass its ``sync_engine``.
+    """
+    @event.listens_for(engine, "before_cursor_execute")
+    def before_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+        if current_trace.get() is not None:
+            conn.info.setdefault("pack218_query_start", []).append(time.perf_counter())
+
+    @event.listens_for(engine, "after_cursor_execute")
+    def after_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+        trace = current_trace.get()
+        starts = conn.info.get("pack218_query_start")
+        if trace is None or not starts:
+            return
+        trace.record(statement[:_SQL_PREVIEW_CHARS], time.perf_counter() - starts.pop())
+
+
+class RequestTracingMiddleware:
+    """ASGI middleware wrapping each HTTP request in ``request_trace()``.
+
+    Requests are grouped by route template (``/camping-trip/{event_id}``),
+    which the router only knows once it has run, so the trace is renamed
+    at the end. NiceGUI's own static files and websocket are skipped.
+    """
+
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http" or scope["path"].startswith("/_nicegui"):
+            await self.app(scope, receive, send)
+            return
+        with request_trace(scope["path"]) as trace:
+            try:
+                await self.app(scope, receive, send)
+            finally:
+                # Unrouted paths (404s, probes) share one entry so they
+                # cannot grow the table without bound.
+                route = scope.get("route")
+                trace.route = getattr(route, "path", None) or "(unmatched)"
@@ -0,0 +1,123 @@
+"""Prometheus text exposition of the app's metrics, served at ``/metrics``.
+
+Everything here is read from counters the app keeps anyway
+(``pack218.instrumentation`` and the pool's ``pool_stats()``) plus one
+small query for the waitlists, so a scrape costs about as much as a page
+view and nothing is needed beyond the plain-text format (version 0.0.4).
+Counters and histograms are per process and start over on restart, which
+Prometheus' rate() handles as a counter reset.
+"""
+from typing import Iterable
+
+from nicegui import Client
+from sqlalchemy import and_, func
+from sqlmodel import Session, select
+
+from pack218.instrumentation import (
+    LATENCY_BUCKETS_S,
+    Histogram,
+    audit_rows_written,
+    route_stats,
+    save_latency,
+)
+from pack218.persistence.engine import pool_metrics, pool_stats
+
+CONTENT_TYPE = "text/plain; version=0.0.4; charset=utf-8"
+
+
+def _labels(**labels) -> str:
+    if not labels:
+        return ""
+    escaped = (
+        str(value).replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+        for value in labels.values()
+    )
+    return "{" + ",".join(f'{name}="{value}"' for name, value in zip(labels, escaped)) + "}"
+
+
+def _metric(name: str, kind: str, help_text: str, samples: Iterable[tuple[dict, float]]) -> list[str]:
+    lines = [f"# HELP {name} {help_text}", f"# TYPE {name} {kind}"]
+    lines.extend(f"{name}{_labels(**labels)} {value}" for labels, value in samples)
+    return lines
+
+
+def _histogram(name: str, help_text: str, label: str, histograms: dict[str, Histogram]) -> list[str]:
+    lines = [f"# HELP {name} {help_text}", f"# TYPE {name} histogram"]
+    for key, histogram in sorted(histograms.items()):
+        cumulative = 0
+        for bound, count in zip((*LATENCY_BUCKETS_S, "+Inf"), histogram.counts):
+            cumulative += count
+            lines.append(f"{name}_bucket{_labels(**{label: key, 'le': bound})} {cumulative}")
+        lines.append(f"{name}_sum{_labels(**{label: key})} {histogram.total_s}")
+        lines.append(f"{name}_count{_labels(**{label: key})} {histogram.count}")
+    return lines
+
+
+def _waitlist_sizes(session: Session) -> list[tuple[dict, float]]:
+    """Waitlisted registrations per upcoming, non-cancelled event (0 included)."""
+    from pack218.entities.models import Event, EventRegistration
+
+    rows = session.exec(
+        select(Event.id, Event.date, func.count(EventRegistration.id))
+        .outerjoin(EventRegistration, and_(
+            EventRegistration.event_id == Event.id,
+            EventRegistration.waitlist_position.is_not(None),
+        ))
+        # The same "upcoming" as Event.get_upcoming() and the home page.
+        .where(Event.date > Event._today(), Event.cancelled == False)  # noqa: E712
+        .group_by(Event.id, Event.date)
+        .order_by(Event.date, Event.id)
+    ).all()
+    return [({"event_id": event_id, "date": event_date}, waitlisted) for event_id, event_date, waitlisted in rows]
+
+
+def render_metrics(session: Session) -> str:
+    routes = route_stats()
+    pool = pool_stats()
+    lines = []
+    lines += _histogram(
+        "pack218_request_duration_seconds", "Time to serve a page request, by route.",
+        "route", {stats.route: stats.latency for stats in routes},
+    )
+    lines += _metric(
+        "pack218_request_sql_statements_total", "counter", "SQL statements issued by page requests, by route.",
+        [({"route": stats.route}, stats.total_queries) for stats in routes],
+    )
+    lines += _metric(
+        "pack218_request_db_seconds_total", "counter", "Time page requests spent in SQL statements, by route.",
+        [({"route": stats.route}, stats.total_db_s) for stats in routes],
+    )
+    for name, key, help_text in (
+        ("size", "pool_size", "Configured size of the connection pools (sync and async engines)."),
+        ("checked_out", "checked_out", "Connections in use (sync and async engines)."),
+        ("checked_in", "checked_in", "Idle connections in the pools."),
+        ("overflow", "overflow", "Connections open beyond pool_size."),
+    ):
+        lines += _metric(f"pack218_db_pool_{name}", "gauge", help_text, [({}, pool[key])])
+    for key, help_text in (
+        ("checkouts", "Connections checked out of the pool."),
+        ("timeouts", "Checkouts that timed out waiting for a connection."),
+        ("slow_checkouts", "Checkouts that waited longer than DB_POOL_SLOW_CHECKOUT_MS."),
+    ):
+        lines += _metric(f"pack218_db_pool_{key}_total", "counter", help_text, [({}, pool[key])])
+    lines += _metric(
+        "pack218_db_pool_checkout_wait_seconds_total", "counter", "Time spent waiting for a connection.",
+        [({}, pool_metrics.total_wait_s)],
+    )
+    lines += _metric(
+        "pack218_nicegui_clients_connected", "gauge", "Browser tabs connected over the NiceGUI websocket.",
+        [({}, sum(1 for client in list(Client.instances.values()) if client.has_socket_connection))],
+    )
+    lines += _metric(
+        "pack218_audit_rows_written_total", "counter", "ActionLog rows written or queued in the outbox.",
+        [({}, audit_rows_written())],
+    )
+    lines += _histogram(
+        "pack218_save_duration_seconds", "Duration of save() / save_many(), by entity.",
+        "entity", save_latency(),
+    )
+    lines += _metric(
+        "pack218_event_waitlist_size", "gauge", "Waitlisted registrations per upcoming event.",
+        _waitlist_sizes(session),
+    )
+    return "\n".join(lines) + "\n"
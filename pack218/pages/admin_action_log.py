@@ -2,25 +2,33 @@
 
 Mounted at ``/admin/action-log``. Lists every audited write (create / update /
 delete) with the actor, subject, target entity, action, field-level diff,
-reason, and timestamp. The view filters server-side by free-text (matches
-``reason``, ``entity_name``, field-change blob, and actor/subject names),
-action type, entity type, and result limit — so the page stays responsive
-even with a large log.
+reason, and timestamp. The view filters server-side by free-text (a ranked
+full-text search over ``reason``, ``entity_name``, the field changes and
+actor/subject names, see ``pack218.audit.search``), action type and entity
+type, and pages through the result with a keyset cursor — so the page stays
+responsive even with a large log. A search ranks its best matches once and
+pages through that list, best match first. Rows old enough to have been archived
+(``pack218.audit.archive``) are only searched when "Search archive" is ticked.
 """
 from __future__ import annotations
 
-from typing import Optional
+from typing import Any, List, Optional, Tuple
 
 from nicegui import ui
-from sqlalchemy import String, cast
-from sqlmodel import Session, or_, select
+from sqlalchemy import tuple_
+from sqlmodel import Session, select
 
+from pack218.audit.archive import search_archive
+from pack218.audit.search import search_action_log
 from pack218.entities.models import ActionLog, EventRegistration, User
 from pack218.pages.ui_components import card_title
 
-# A reasonable upper bound on result rows so a misclicked "All" doesn't pull
-# the entire log into the UI.
-_LIMIT_CHOICES = [50, 200, 1000, 10000]
+# Rows per page. Pages are fetched with a keyset cursor, so browsing deep into
+# the history costs the same as the first page and only one page of rows
+# (and formatted diffs) is ever sent to the browser.
+_PAGE_SIZE_CHOICES = [50, 100, 200]
+# A search ranks at most this many matches; refine the query to see others.
+_MAX_SEARCH_RESULTS = 1000
 # ActionLog is excluded on purpose — the audit hook skips writes targeting
 # ActionLog itself (to avoid recursion), so there are no such rows to filter.
 _ENTITY_CHOICES = ["(any)", "User", "Event", "EventRegistration", "Family"]
@@ -50,6 +58,159 @@ def _format_changes(field_changes: dict) -> str:
     return "\n".join(lines)
 
 
+# Where a page ends: (created_at, id) of its oldest row when browsing, the
+# offset into the ranked match list when searching.
+Cursor = Any
+
+
+def fetch_action_log_page(
+    session: Session,
+    action: Optional[str] = None,
+    entity: Optional[str] = None,
+    after: Optional[Cursor] = None,
+    page_size: int = _PAGE_SIZE_CHOICES[0],
+) -> Tuple[List[ActionLog], Optional[Cursor]]:
+    """One page of audit-log rows, newest first.
+
+    ``after`` is the cursor returned with the previous page. Returns the
+    rows and the cursor of the next page, or None when this is the last.
+    """
+    stmt = select(ActionLog)
+    if action is not None:
+        stmt = stmt.where(ActionLog.action == action)
+    if entity is not None:
+        stmt = stmt.where(ActionLog.entity_name == entity)
+    if after is not None:
+        stmt = stmt.where(tuple_(ActionLog.created_at, ActionLog.id) < tuple_(*after))
+    stmt = stmt.order_by(ActionLog.created_at.desc(), ActionLog.id.desc()).limit(page_size + 1)
+
+    rows = list(session.exec(stmt).all())
+    if len(rows) > page_size:
+        rows = rows[:page_size]
+        return rows, (rows[-1].created_at, rows[-1].id)
+    return rows, None
+
+
+def rank_action_log_matches(
+    session: Session,
+    q: str,
+    action: Optional[str] = None,
+    entity: Optional[str] = None,
+    limit: int = _MAX_SEARCH_RESULTS,
+) -> List[int]:
+    """Ids of the best ``limit`` rows matching ``q``, best match first.
+
+    Computed once per search and paged with ``fetch_search_page()``: ranks
+    shift as new rows are indexed (bm25 depends on the whole corpus), so
+    re-ranking for every page could skip or repeat rows.
+    """
+    matches = search_action_log(session, q)
+    if matches is None:
+        return []
+    stmt = select(ActionLog.id).join(matches, matches.c.id == ActionLog.id)
+    if action is not None:
+        stmt = stmt.where(ActionLog.action == action)
+    if entity is not None:
+        stmt = stmt.where(ActionLog.entity_name == entity)
+    stmt = stmt.order_by(matches.c.rank, ActionLog.created_at.desc(), ActionLog.id.desc()).limit(limit)
+    return list(session.exec(stmt).all())
+
+
+def fetch_search_page(
+    session: Session,
+    ranked_ids: List[int],
+    after: Optional[Cursor] = None,
+    page_size: int = _PAGE_SIZE_CHOICES[0],
+) -> Tuple[List[ActionLog], Optional[Cursor]]:
+    """One page of ``rank_action_log_matches()`` results, in rank order."""
+    start = after or 0
+    page_ids = ranked_ids[start:start + page_size]
+    by_id = {}
+    if page_ids:
+        by_id = {r.id: r for r in session.exec(select(ActionLog).where(ActionLog.id.in_(page_ids))).all()}
+    # Rows archived since the search ran are skipped.
+    rows = [by_id[row_id] for row_id in page_ids if row_id in by_id]
+    end = start + page_size
+    return rows, end if end < len(ranked_ids) else None
+
+
+_COLUMNS = [
+    {'name': 'created_at', 'label': 'When', 'field': 'created_at', 'sortable': True, 'align': 'left'},
+    {'name': 'actor', 'label': 'Actor', 'field': 'actor', 'sortable': True},
+    {'name': 'subject', 'label': 'Subject', 'field': 'subject', 'sortable': True},
+    {'name': 'entity', 'label': 'Entity', 'field': 'entity', 'sortable': True},
+    {'name': 'action', 'label': 'Action', 'field': 'action', 'sortable': True},
+    {'name': 'reason', 'label': 'Reason', 'field': 'reason'},
+    {'name': 'changes', 'label': 'Field changes', 'field': 'changes'},
+]
+
+
+def _table_rows(session: Session, rows_raw: List[ActionLog]) -> List[dict]:
+    """Display rows for ``rows_raw``, with actor/subject/event labels resolved."""
+    # Resolve actor / subject usernames in a single batch to avoid N+1
+    # session.get() calls per row.
+    user_ids = {r.actor_user_id for r in rows_raw if r.actor_user_id} | {
+        r.subject_user_id for r in rows_raw if r.subject_user_id
+    }
+    users_by_id: dict[int, User] = {}
+    if user_ids:
+        for u in session.exec(select(User).where(User.id.in_(user_ids))).all():
+            users_by_id[u.id] = u
+
+    # For EventRegistration rows in the log, look up the event_id once per
+    # registration so the Entity column can surface "which camping trip".
+    registration_ids = {
+        r.entity_id for r in rows_raw if r.entity_name == 'EventRegistration'
+    }
+    event_id_by_registration_id: dict[int, int] = {}
+    if registration_ids:
+        for er in session.exec(
+            select(EventRegistration).where(EventRegistration.id.in_(registration_ids))
+        ).all():
+            event_id_by_registration_id[er.id] = er.event_id
+
+    rows = []
+    for r in rows_raw:
+        entity_label = f"{r.entity_name}#{r.entity_id}"
+        if r.entity_name == 'EventRegistration':
+            # Prefer the live registration row; for `create`/`delete`
+            # diffs the event_id is in field_changes, so fall back to that.
+            event_id = event_id_by_registration_id.get(r.entity_id)
+            if event_id is None:
+                ev_change = (r.field_changes or {}).get('event_id')
+                if isinstance(ev_change, dict):
+                    event_id = ev_change.get('new') or ev_change.get('old')
+                elif isinstance(ev_change, int):
+                    event_id = ev_change
+            if event_id is not None:
+                entity_label = f"EventRegistration#{r.entity_id},event#{event_id}"
+
+        rows.append({
+            'id': r.id,
+            'created_at': r.created_at.strftime('%Y-%m-%d %H:%M:%S') if r.created_at else '',
+            'actor': _user_label(users_by_id.get(r.actor_user_id)) if r.actor_user_id else '(system)',
+            'subject': _user_label(users_by_id.get(r.subject_user_id)) if r.subject_user_id else '',
+            'entity': entity_label,
+            'action': r.action,
+            'reason': r.reason or '',
+            'changes': _format_changes(r.field_changes or {}),
+        })
+    return rows
+
+
+def _render_rows(rows: List[dict]) -> None:
+    table = ui.table(columns=_COLUMNS, rows=rows).props(
+        'flat dense separator="horizontal" wrap-cells'
+    ).classes('w-full')
+    # Field-changes cell can be multi-line — render with preserved
+    # whitespace so the per-field diff is readable.
+    table.add_slot('body-cell-changes', r'''
+        <q-td :props="props">
+            <pre style="white-space: pre-wrap; margin: 0; font-size: 12px;">{{ props.row.changes }}</pre>
+        </q-td>
+    ''')
+
+
 def render_admin_action_log(session: Session) -> None:
     """Searchable list of audit-log rows."""
     card_title("Action Log")
@@ -59,12 +220,18 @@ def render_admin_action_log(session: Session) -> None:
     ).classes('text-sm p-2')
 
     # Filter state lives in a mutable dict so the refreshable closure can
-    # read the current values without rebinding.
+    # read the current values without rebinding. ``cursors`` holds the start
+    # cursor of every page up to the current one (None for the first page).
     state = {
         'q': '',
         'action': '(any)',
         'entity': '(any)',
-        'limit': _LIMIT_CHOICES[0],
+        'page_size': _PAGE_SIZE_CHOICES[0],
+        'cursors': [None],
+        'next': None,
+        # Ranked match ids of the current search, None when browsing.
+        'ranked': None,
+        'archive': False,
     }
 
     with ui.row().classes('w-full items-center gap-4 p-2'):
@@ -76,133 +243,87 @@ def render_admin_action_log(session: Session) -> None:
             .props('dense outlined').classes('w-40')
         entity_select = ui.select(_ENTITY_CHOICES, value='(any)', label='Entity')\
             .props('dense outlined').classes('w-48')
-        limit_select = ui.select(
-            _LIMIT_CHOICES, value=_LIMIT_CHOICES[0], label='Limit'
+        page_size_select = ui.select(
+            _PAGE_SIZE_CHOICES, value=_PAGE_SIZE_CHOICES[0], label='Rows per page'
         ).props('dense outlined').classes('w-32')
+        archive_checkbox = ui.checkbox('Search archive')
 
     @ui.refreshable
     def render_table():
         # Pull filter values into the query right at render time.
-        q = (state['q'] or '').strip()
-        action_filter = state['action']
-        entity_filter = state['entity']
-        limit = state['limit']
-
-        stmt = select(ActionLog)
-        if action_filter != '(any)':
-            stmt = stmt.where(ActionLog.action == action_filter)
-        if entity_filter != '(any)':
-            stmt = stmt.where(ActionLog.entity_name == entity_filter)
-        if q:
-            # Build an OR across the textual columns. Actor / subject names
-            # live on User, so we resolve those user ids in a separate query
-            # and OR them into the main filter.
-            like = f"%{q}%"
-            matching_user_ids = session.exec(
-                select(User.id).where(
-                    or_(
-                        User.first_name.ilike(like),
-                        User.last_name.ilike(like),
-                        User.email.ilike(like),
-                    )
-                )
-            ).all()
-            or_clauses = [
-                ActionLog.reason.ilike(like),
-                ActionLog.entity_name.ilike(like),
-                # field_changes is JSON in the model, stored as TEXT in
-                # SQLite. Cast to String so ILIKE works as a substring match
-                # on the serialized blob.
-                cast(ActionLog.field_changes, String).ilike(like),
-            ]
-            if matching_user_ids:
-                or_clauses.append(ActionLog.actor_user_id.in_(matching_user_ids))
-                or_clauses.append(ActionLog.subject_user_id.in_(matching_user_ids))
-            stmt = stmt.where(or_(*or_clauses))
-
-        stmt = stmt.order_by(ActionLog.created_at.desc()).limit(limit)
-        rows_raw = session.exec(stmt).all()
-
-        # Resolve actor / subject usernames in a single batch to avoid N+1
-        # session.get() calls per row.
-        user_ids = {r.actor_user_id for r in rows_raw if r.actor_user_id} | {
-            r.subject_user_id for r in rows_raw if r.subject_user_id
-        }
-        users_by_id: dict[int, User] = {}
-        if user_ids:
-            for u in session.exec(select(User).where(User.id.in_(user_ids))).all():
-                users_by_id[u.id] = u
-
-        # For EventRegistration rows in the log, look up the event_id once per
-        # registration so the Entity column can surface "which camping trip".
-        registration_ids = {
-            r.entity_id for r in rows_raw if r.entity_name == 'EventRegistration'
-        }
-        event_id_by_registration_id: dict[int, int] = {}
-        if registration_ids:
-            for er in session.exec(
-                select(EventRegistration).where(EventRegistration.id.in_(registration_ids))
-            ).all():
-                event_id_by_registration_id[er.id] = er.event_id
-
-        columns = [
-            {'name': 'created_at', 'label': 'When', 'field': 'created_at', 'sortable': True, 'align': 'left'},
-            {'name': 'actor', 'label': 'Actor', 'field': 'actor', 'sortable': True},
-            {'name': 'subject', 'label': 'Subject', 'field': 'subject', 'sortable': True},
-            {'name': 'entity', 'label': 'Entity', 'field': 'entity', 'sortable': True},
-            {'name': 'action', 'label': 'Action', 'field': 'action', 'sortable': True},
-            {'name': 'reason', 'label': 'Reason', 'field': 'reason'},
-            {'name': 'changes', 'label': 'Field changes', 'field': 'changes'},
-        ]
-        rows = []
-        for r in rows_raw:
-            entity_label = f"{r.entity_name}#{r.entity_id}"
-            if r.entity_name == 'EventRegistration':
-                # Prefer the live registration row; for `create`/`delete`
-                # diffs the event_id is in field_changes, so fall back to that.
-                event_id = event_id_by_registration_id.get(r.entity_id)
-                if event_id is None:
-                    ev_change = (r.field_changes or {}).get('event_id')
-                    if isinstance(ev_change, dict):
-                        event_id = ev_change.get('new') or ev_change.get('old')
-                    elif isinstance(ev_change, int):
-                        event_id = ev_change
-                if event_id is not None:
-                    entity_label = f"EventRegistration#{r.entity_id},event#{event_id}"
-
-            rows.append({
-                'id': r.id,
-                'created_at': r.created_at.strftime('%Y-%m-%d %H:%M:%S') if r.created_at else '',
-                'actor': _user_label(users_by_id.get(r.actor_user_id)) if r.actor_user_id else '(system)',
-                'subject': _user_label(users_by_id.get(r.subject_user_id)) if r.subject_user_id else '',
-                'entity': entity_label,
-                'action': r.action,
-                'reason': r.reason or '',
-                'changes': _format_changes(r.field_changes or {}),
-            })
-
-        ui.label(f"{len(rows)} row(s) shown (limit {limit})").classes('text-sm italic p-2')
-        table = ui.table(columns=columns, rows=rows).props(
-            'flat dense separator="horizontal" wrap-cells'
-        ).classes('w-full')
-        # Field-changes cell can be multi-line — render with preserved
-        # whitespace so the per-field diff is readable.
-        table.add_slot('body-cell-changes', r'''
-            <q-td :props="props">
-                <pre style="white-space: pre-wrap; margin: 0; font-size: 12px;">{{ props.row.changes }}</pre>
-            </q-td>
-        ''')
+        page_size = state['page_size']
+        if state['ranked'] is not None:
+            rows_raw, state['next'] = fetch_search_page(
+                session, state['ranked'], after=state['cursors'][-1], page_size=page_size,
+            )
+        else:
+            rows_raw, state['next'] = fetch_action_log_page(
+                session,
+                action=None if state['action'] == '(any)' else state['action'],
+                entity=None if state['entity'] == '(any)' else state['entity'],
+                after=state['cursors'][-1],
+                page_size=page_size,
+            )
+
+        rows = _table_rows(session, rows_raw)
+
+        first = (len(state['cursors']) - 1) * page_size
+        with ui.row().classes('w-full items-center gap-2 p-2'):
+            ui.button('Newer', icon='chevron_left', on_click=newer_page)\
+                .props('flat dense').set_enabled(len(state['cursors']) > 1)
+            label = f"Rows {first + 1}–{first + len(rows)}" if rows else "No matching rows"
+            if state['ranked'] is not None and len(state['ranked']) == _MAX_SEARCH_RESULTS:
+                label += f" of the best {_MAX_SEARCH_RESULTS} matches"
+            ui.label(label).classes('text-sm italic')
+            ui.button('Older', icon='chevron_right', on_click=older_page)\
+                .props('flat dense').set_enabled(state['next'] is not None)
+        _render_rows(rows)
+
+        # The archive is read file by file, so it is only searched on request
+        # and only its first page of matches is shown.
+        if state['archive'] and state['q'].strip():
+            archived = search_archive(
+                session,
+                state['q'],
+                action=None if state['action'] == '(any)' else state['action'],
+                entity=None if state['entity'] == '(any)' else state['entity'],
+                limit=page_size,
+            )
+            ui.label(
+                f"Archived matches ({len(archived)})" if archived else "No archived matches"
+            ).classes('text-sm italic p-2')
+            if archived:
+                _render_rows(_table_rows(session, archived))
+
+    def older_page():
+        state['cursors'].append(state['next'])
+        render_table.refresh()
+
+    def newer_page():
+        state['cursors'].pop()
+        render_table.refresh()
 
     def on_filter_change():
         state['q'] = search_input.value or ''
         state['action'] = action_select.value
         state['entity'] = entity_select.value
-        state['limit'] = limit_select.value
+        state['page_size'] = page_size_select.value
+        state['archive'] = archive_checkbox.value
+        state['cursors'] = [None]
+        state['ranked'] = None
+        if state['q'].strip():
+            state['ranked'] = rank_action_log_matches(
+                session,
+                state['q'],
+                action=None if state['action'] == '(any)' else state['action'],
+                entity=None if state['entity'] == '(any)' else state['entity'],
+            )
         render_table.refresh()
 
     search_input.on('update:model-value', lambda e: on_filter_change())
     action_select.on('update:model-value', lambda e: on_filter_change())
     entity_select.on('update:model-value', lambda e: on_filter_change())
-    limit_select.on('update:model-value', lambda e: on_filter_change())
+    page_size_select.on('update:model-value', lambda e: on_filter_change())
+    archive_checkbox.on('update:model-value', lambda e: on_filter_change())
 
     render_table()
@@ -0,0 +1,85 @@
+"""Admin view of the request tracing in ``pack218.instrumentation``.
+
+Mounted at ``/admin/perf``. One row per route with its request count,
+average and worst render time, SQL statements per request, time spent in
+the database and the slowest statement seen, worst offenders first, plus
+the connection pool's counters. The numbers are per process and reset on
+restart (or with the Reset button).
+"""
+from nicegui import ui
+
+from pack218.config import config
+from pack218.instrumentation import reset_route_stats, route_stats
+from pack218.pages.ui_components import card_title, table_export_buttons
+from pack218.persistence.engine import pool_stats
+
+_COLUMNS = [
+    {'name': 'route', 'label': 'Route', 'field': 'route', 'sortable': True, 'align': 'left'},
+    {'name': 'requests', 'label': 'Requests', 'field': 'requests', 'sortable': True},
+    {'name': 'slow_requests', 'label': 'Slow', 'field': 'slow_requests', 'sortable': True},
+    {'name': 'avg_render_ms', 'label': 'Avg ms', 'field': 'avg_render_ms', 'sortable': True},
+    {'name': 'max_render_ms', 'label': 'Max ms', 'field': 'max_render_ms', 'sortable': True},
+    {'name': 'avg_queries', 'label': 'Avg SQL', 'field': 'avg_queries', 'sortable': True},
+    {'name': 'max_queries', 'label': 'Max SQL', 'field': 'max_queries', 'sortable': True},
+    {'name': 'avg_db_ms', 'label': 'Avg DB ms', 'field': 'avg_db_ms', 'sortable': True},
+    {'name': 'slowest_ms', 'label': 'Slowest SQL ms', 'field': 'slowest_ms', 'sortable': True},
+    {'name': 'slowest_sql', 'label': 'Slowest statement', 'field': 'slowest_sql', 'align': 'left'},
+]
+
+
+def _rows() -> list[dict]:
+    rows = []
+    for stats in route_stats():
+        n = stats.requests or 1
+        rows.append({
+            'route': stats.route,
+            'requests': stats.requests,
+            'slow_requests': stats.slow_requests,
+            'avg_render_ms': round(stats.total_render_s / n * 1000, 1),
+            'max_render_ms': round(stats.max_render_s * 1000, 1),
+            'avg_queries': round(stats.total_queries / n, 1),
+            'max_queries': stats.max_queries,
+            'avg_db_ms': round(stats.total_db_s / n * 1000, 1),
+            'slowest_ms': round(stats.slowest_s * 1000, 1),
+            'slowest_sql': stats.slowest_sql,
+        })
+    rows.sort(key=lambda row: (row['max_queries'], row['max_render_ms']), reverse=True)
+    return rows
+
+
+def render_admin_perf() -> None:
+    """Per-route request timings and SQL counts for this process."""
+    card_title("Performance")
+    ui.label(
+        f"Requests over {config.perf_slow_request_ms} ms or "
+        f"{config.perf_max_queries_per_request} SQL statements count as slow and are logged."
+    ).classes('text-sm p-2')
+
+    @ui.refreshable
+    def render_tables():
+        rows = _rows()
+        with ui.row().classes('w-full items-center gap-2 p-2'):
+            ui.button('Refresh', icon='refresh', on_click=render_tables.refresh).props('flat dense')
+            ui.button('Reset', icon='restart_alt', on_click=reset).props('flat dense')
+            table_export_buttons(_COLUMNS, rows, filename="perf_by_route")
+        ui.table(columns=_COLUMNS, rows=rows, row_key='route').props(
+            'flat dense separator="horizontal" wrap-cells'
+        ).classes('w-full')
+
+        card_title("Connection pool", level=2)
+        pool_rows = [{'metric': name, 'value': round(value, 1) if isinstance(value, float) else value}
+                     for name, value in pool_stats().items()]
+        ui.table(
+            columns=[
+                {'name': 'metric', 'label': 'Metric', 'field': 'metric', 'align': 'left'},
+                {'name': 'value', 'label': 'Value', 'field': 'value'},
+            ],
+            rows=pool_rows,
+            row_key='metric',
+        ).props('flat dense separator="horizontal"')
+
+    def reset():
+        reset_route_stats()
+        render_tables.refresh()
+
+    render_tables()
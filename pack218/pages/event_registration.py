@@ -1,20 +1,71 @@
 import logging
 from functools import partial
-from typing import Optional
+from typing import Dict, List, Optional, Tuple
 
 from nicegui import ui
-from sqlmodel import Session
+from sqlmodel import Session, select
 
-from pack218.audit import AuditError, current_reason, set_actor_from_request
+from pack218.audit import current_reason, set_actor_from_request
 from pack218.entities.models import EventRegistration, Event, Family, User
 
 from pack218.pages.on_behalf_panel import render_on_behalf_panel
+from pack218.persistence import run_db
 from pack218.pages.ui_components import BUTTON_CLASSES_ACCEPT, card_title, card, simple_dialog, BUTTON_CLASSES_CANCEL
 from starlette.requests import Request
 
 logger = logging.getLogger(__name__)
 
 
+def apply_registration_changes(
+    session: Session,
+    request: Request,
+    event_id: int,
+    selections: Dict[int, Dict[str, bool]],
+    reason: Optional[str] = None,
+) -> List[Tuple[str, str]]:
+    """Write a submitted registration form in a single transaction.
+
+    ``selections`` maps each user id to its checkbox values; a member with
+    nothing selected has their registration removed. ``reason`` is set for
+    on-behalf edits. Runs on the database thread pool (see ``run_db``), so
+    it returns ``(outcome, message)`` pairs for the dialog instead of
+    touching the UI. Outcome is 'saved', 'removed', 'rejected' or 'error'.
+    """
+    # NiceGUI runs the click handler in a separate task from the original GET
+    # that called chrome() — ContextVars don't propagate, so re-bind the
+    # actor here before any save/delete fires.
+    set_actor_from_request(request=request, session=session)
+    first_names = {
+        u.id: u.first_name
+        for u in session.exec(select(User).where(User.id.in_(list(selections)))).all()
+    }
+
+    # Set the reason for the whole batch so the audit hook attributes
+    # every change properly.
+    token = current_reason.set(reason) if reason is not None else None
+    try:
+        outcomes = EventRegistration.save_family_registration(
+            session=session, event_id=event_id, selections=selections,
+        )
+    except Exception as e:  # pragma: no cover - defensive
+        logger.exception(e)
+        session.rollback()
+        return [('error', f"⚠️ Registration failed: {e}")]
+    finally:
+        if token is not None:
+            current_reason.reset(token)
+
+    messages = {
+        'saved': "☑️ Registration saved for {name}.",
+        'removed': "❌ {name}'s registration was removed.",
+        'rejected': "⛔ {name}: {error}",
+    }
+    return [
+        (outcome, messages[outcome].format(name=first_names.get(user_id, user_id), error=error))
+        for user_id, outcome, error in outcomes
+    ]
+
+
 def render_page_event_registration(
     request: Request,
     session: Session,
@@ -49,22 +100,16 @@ def render_page_event_registration(
                 'text-lg font-bold text-red-500'
             )
             return
-        from sqlmodel import select
         family_members = sorted(
             session.exec(select(User).where(User.family_id == target_family_id)).all(),
             key=lambda u: (u.family_member_type or '', u.first_name or ''),
         )
     else:
-        family_members = current_user.get_all_from_family()
+        family_members = current_user.get_all_from_family(session=session)
 
     reason_input = None  # set below when on_behalf
 
-    def perform_event_registration():
-        # NiceGUI runs this handler in a separate task from the original GET
-        # that called chrome() — ContextVars don't propagate, so re-bind the
-        # actor here before any save/delete fires.
-        set_actor_from_request(request=request, session=session)
-
+    async def perform_event_registration():
         if on_behalf:
             reason = (reason_input.value or '').strip() if reason_input else ''
             if not reason:
@@ -74,54 +119,25 @@ def render_page_event_registration(
         else:
             reason = None
 
-        has_registered_user = False
-        rejected = False
+        # Read the form here; the writes run off the event loop.
+        selections = {
+            user_id: {field_name: field_checkbox.value for field_name, field_checkbox in fields.items()}
+            for user_id, fields in user_to_fields.items()
+        }
+        results = await run_db(
+            apply_registration_changes,
+            request=request, event_id=event_id, selections=selections, reason=reason,
+        )
+
+        has_registered_user = any(outcome == 'saved' for outcome, _message in results)
         with simple_dialog() as dialog, card():
             with ui.card_section():
                 ui.label('Registration update').classes('text-lg font-bold')
             with ui.card_section():
-                for user_id, fields in user_to_fields.items():
-                    user = User.get_by_id(user_id, session=session)
-                    nothing_selected = not any(
-                        field_checkbox.value for field_checkbox in fields.values()
-                    )
-
-                    # Set the reason for this specific save/delete so the
-                    # audit hook attributes the change properly.
-                    token = current_reason.set(reason) if on_behalf else None
-                    try:
-                        if nothing_selected:
-                            existing = EventRegistration.get_by_user_and_event(
-                                user_id=user_id, event_id=event_id, session=session
-                            )
-                            if existing:
-                                EventRegistration.delete_by_id(existing.id, session=session)
-                                ui.label(
-                                    f"❌ {user.first_name}'s registration was removed."
-                                )
-                        else:
-                            event_registration = EventRegistration.get_or_create_by_user_and_event(
-                                user_id=user_id, event_id=event_id, session=session
-                            )
-                            for field_name, field_checkbox in fields.items():
-                                setattr(event_registration, field_name, field_checkbox.value)
-                            event_registration.save(session=session)
-                            ui.label(f"☑️ Registration saved for {user.first_name}.")
-                            has_registered_user = True
-                    except AuditError as e:
-                        rejected = True
-                        ui.label(
-                            f"⛔ {user.first_name}: {e}"
-                        ).classes('text-red-500')
-                        session.rollback()
-                    except Exception as e:  # pragma: no cover - defensive
-                        rejected = True
-                        logger.exception(e)
-                        ui.label(f"⚠️ {user.first_name}: {e}").classes('text-red-500')
-                        session.rollback()
-                    finally:
-                        if token is not None:
-                            current_reason.reset(token)
+                for outcome, message in results:
+                    label = ui.label(message)
+                    if outcome in ('rejected', 'error'):
+                        label.classes('text-red-500')
 
             if has_registered_user and not on_behalf:
                 with ui.card_section():
@@ -1,6 +1,8 @@
 import logging
+from typing import List, Optional, Tuple
 
 from nicegui import ui
+from sqlmodel import Session
 
 from pack218.audit import AuditError, current_reason, set_actor_from_request
 from pack218.entities.models import Event, EventRegistration, Family, User
@@ -11,15 +13,24 @@ from pack218.pages.ui_components import (
     table_export_buttons,
 )
 from pack218.pages.utils import SessionDep
+from pack218.persistence import run_db, run_in_session
 from starlette.requests import Request
 
 logger = logging.getLogger(__name__)
 
 
-def render_participants_table(event: Event, request: Request, session: SessionDep):
+def render_participants_table(
+    event: Event,
+    request: Request,
+    session: SessionDep,
+    roster: Optional[List[Tuple[EventRegistration, User, Optional[Family]]]] = None,
+):
 
-    registrations = event.get_registrations(session=session)
-    waitlist_status = EventRegistration.compute_waitlist_status(session=session, event_id=event.id)
+    # Every table and expansion below is built from this one in-memory roster;
+    # don't reach back into the session per registration.
+    if roster is None:
+        roster = event.load_roster(session=session)
+    registrations = [r for r, _u, _f in roster]
 
     # participants = event.get_participants(session=session)
     with ui.expansion(f'Participants ({len(registrations)})', icon='expand_more').classes('w-full bg-grey-2'):
@@ -48,15 +59,13 @@ def render_participants_table(event: Event, request: Request, session: SessionDe
                 {'name': 'actions', 'label': '', 'field': 'family_id'},
             ])
         table_rows = []
-        for r in sorted(registrations, key=lambda r: r.user(session=session).family.family_name):
-            u = r.user(session=session)
-            family = Family.get_by_id(u.family_id, session=session)
+        for r, u, family in sorted(roster, key=lambda entry: (entry[2].family_name or "") if entry[2] else ""):
             row = {
                 'family': family.family_name if family and family.family_name else "",
                 'participant': u.participant_str,
                 'cost': r.cost,
                 'registration_ts': r.registration_ts.strftime('%Y-%m-%d %H:%M') if r.registration_ts else "",
-                'waitlisted': "Yes" if waitlist_status.get(r.id, False) else "",
+                'waitlisted': "Yes" if r.waitlist_position is not None else "",
             }
             if is_admin:
                 row.update({
@@ -96,9 +105,7 @@ def render_participants_table(event: Event, request: Request, session: SessionDe
     if is_admin:
     # Per-family cost summary
         families_summary = {}
-        for r in registrations:
-            u = r.user(session=session)
-            family = Family.get_by_id(u.family_id, session=session)
+        for r, u, family in roster:
             if not family:
                 continue
             summary = families_summary.get(family.family_name)
@@ -153,8 +160,7 @@ def render_participants_table(event: Event, request: Request, session: SessionDe
 
         # Admin-only: list of participant emails for easy copy/paste
         emails_set = set()
-        for r in registrations:
-            u = r.user(session=session)
+        for _r, u, _family in roster:
             if u.email:
                 emails_set.add(str(u.email))
         emails = sorted(emails_set)
@@ -163,8 +169,7 @@ def render_participants_table(event: Event, request: Request, session: SessionDe
 
         # Admin-only: phone numbers
         phone_numbers_set = set()
-        for r in registrations:
-            u = r.user(session=session)
+        for _r, u, _family in roster:
             if u.phone_number:
                 phone_numbers_set.add(str(u.phone_number))
         phone_numbers = sorted(phone_numbers_set)
@@ -173,9 +178,7 @@ def render_participants_table(event: Event, request: Request, session: SessionDe
 
         # Admin-only: emergency contacts & license plates by family
         families_by_id = {}
-        for r in registrations:
-            u = r.user(session=session)
-            family = Family.get_by_id(u.family_id, session=session)
+        for _r, _u, family in roster:
             if family:
                 families_by_id[family.id] = family
         families = sorted(families_by_id.values(), key=lambda f: f.family_name or "")
@@ -204,13 +207,6 @@ def render_participants_table(event: Event, request: Request, session: SessionDe
             ui.table(columns=table_columns, rows=table_rows).props('flat separator=\"horizontal\"').classes('w-full')
 
 
-def _family_is_registered_for(event: Event, current_user: User, session: SessionDep) -> bool:
-    for u in current_user.get_all_from_family():
-        if EventRegistration.get_by_user_and_event(user_id=u.id, event_id=event.id, session=session):
-            return True
-    return False
-
-
 def render_camping_trip_detail(event: Event, request: Request, session: SessionDep):
     """Render the full detail widget for a single camping trip."""
     current_user = User.get_current(request=request, session=session)
@@ -229,8 +225,8 @@ def render_camping_trip_detail(event: Event, request: Request, session: SessionD
             if event.is_upcoming and not event.cancelled:
                 ui.button(
                     'Cancel Trip', icon='cancel',
-                    on_click=lambda ev=event: _open_cancel_trip_dialog(
-                        event=ev, request=request, session=session,
+                    on_click=lambda ev=event: run_in_session(
+                        session, _open_cancel_trip_dialog, event=ev, request=request,
                     ),
                 ).props('outline color=red').tooltip('Cancel this trip and drop all registrations')
 
@@ -249,13 +245,26 @@ def render_camping_trip_detail(event: Event, request: Request, session: SessionD
         if (event.details or '').strip():
             ui.markdown(event.details, sanitize=False).classes('w-full')
 
-        render_participants_table(event=event, request=request, session=session)
+        roster = event.load_roster(session=session)
+        render_participants_table(event=event, request=request, session=session, roster=roster)
 
-        is_registered = _family_is_registered_for(event=event, current_user=current_user, session=session)
+        family_registrations = [
+            r for r, u, _family in roster
+            if u.id == current_user.id
+            or (current_user.family_id is not None and u.family_id == current_user.family_id)
+        ]
+        is_registered = bool(family_registrations)
         if is_registered:
             ui.markdown(
-                f"Your cost: **${event.get_family_cost(session=session, family_id=current_user.family_id)}**"
+                f"Your cost: **${sum(r.cost for r in family_registrations)}**"
             )
+            waitlist_positions = [
+                r.waitlist_position for r in family_registrations if r.waitlist_position is not None
+            ]
+            if waitlist_positions and not event.cancelled:
+                ui.label(
+                    f"⏳ You are #{min(waitlist_positions)} on the waitlist"
+                ).classes('text-lg font-bold text-orange-700')
 
         if event.is_upcoming and not event.cancelled:
             if is_registered:
@@ -270,7 +279,34 @@ def render_camping_trip_detail(event: Event, request: Request, session: SessionD
             ).classes(BUTTON_CLASSES_ACCEPT)
 
 
-def _open_cancel_trip_dialog(event: Event, request: Request, session: SessionDep) -> None:
+def cancel_trip(session: Session, request: Request, event_id: int, reason: str) -> Optional[str]:
+    """Mark an event cancelled, attributing the change to ``reason``.
+
+    Runs on the database thread pool (see ``run_db``); returns an error
+    message for the UI, or None on success.
+    """
+    # Re-bind the actor for this event-handler task — ContextVars
+    # set in chrome() don't survive across async boundaries.
+    set_actor_from_request(request=request, session=session)
+
+    event = Event.get_by_id(event_id, session=session, raise_if_not_found=True)
+    event.cancelled = True
+    token = current_reason.set(reason)
+    try:
+        event.save(session=session)
+    except AuditError as e:
+        session.rollback()
+        return str(e)
+    except Exception as e:  # pragma: no cover - defensive
+        logger.exception(e)
+        session.rollback()
+        return f"Failed to cancel trip: {e}"
+    finally:
+        current_reason.reset(token)
+    return None
+
+
+def _open_cancel_trip_dialog(session: SessionDep, event: Event, request: Request) -> None:
     """Confirm-and-cancel modal. Marks the event ``cancelled = True`` so the
     trip is no longer registrable, but keeps every existing
     ``EventRegistration`` intact — that history is what tells us who *would*
@@ -298,33 +334,16 @@ def _open_cancel_trip_dialog(event: Event, request: Request, session: SessionDep
             placeholder="e.g., 'Site closed due to wildfire risk'",
         ).classes('w-full').props('outlined autofocus')
 
-        def confirm():
-            # Re-bind the actor for this event-handler task — ContextVars
-            # set in chrome() don't survive across async boundaries.
-            set_actor_from_request(request=request, session=session)
-
+        async def confirm():
             reason = (reason_input.value or '').strip()
             if not reason:
                 ui.notify('Reason is required', color='negative')
                 return
 
-            event.cancelled = True
-            token = current_reason.set(reason)
-            try:
-                event.save(session=session)
-            except AuditError as e:
-                ui.notify(str(e), color='negative')
-                session.rollback()
-                session.expire(event)
-                return
-            except Exception as e:  # pragma: no cover - defensive
-                logger.exception(e)
-                ui.notify(f"Failed to cancel trip: {e}", color='negative')
-                session.rollback()
-                session.expire(event)
+            error = await run_db(cancel_trip, request=request, event_id=event.id, reason=reason)
+            if error is not None:
+                ui.notify(error, color='negative')
                 return
-            finally:
-                current_reason.reset(token)
 
             ui.notify('Trip cancelled.', color='positive')
             dialog.close()
@@ -337,11 +356,10 @@ def _open_cancel_trip_dialog(event: Event, request: Request, session: SessionDep
     dialog.open()
 
 
-def _render_trip_list_item(event: Event, current_user: User, session: SessionDep, acting_admin: bool, request: Request) -> None:
+def _render_trip_list_item(event: Event, is_registered: bool, session: SessionDep, acting_admin: bool, request: Request) -> None:
     """One clickable row in the camping-trips list."""
     url = f'/camping-trip/{event.id}'
     capacity_info = f" (capacity: {event.capacity})" if event.capacity else ""
-    is_registered = _family_is_registered_for(event=event, current_user=current_user, session=session)
 
     with ui.card().classes('w-full cursor-pointer hover:bg-grey-2').on(
         'click', lambda url=url: ui.navigate.to(url)
@@ -373,8 +391,8 @@ def _render_trip_list_item(event: Event, current_user: User, session: SessionDep
                 if event.is_upcoming and not event.cancelled:
                     cancel_btn = ui.button(
                         'Cancel Trip', icon='cancel',
-                        on_click=lambda ev=event: _open_cancel_trip_dialog(
-                            event=ev, request=request, session=session,
+                        on_click=lambda ev=event: run_in_session(
+                            session, _open_cancel_trip_dialog, event=ev, request=request,
                         ),
                     ).props('flat color=red').tooltip('Cancel this trip and drop all registrations')
                     cancel_btn.on('click.stop', lambda: None)
@@ -385,9 +403,8 @@ def render_home_page(request: Request, session: SessionDep):
 
     current_user = User.get_current(request=request, session=session)
     acting_admin = User.acting_is_admin(request=request, session=session)
-    upcoming_events = Event.get_upcoming(session=session)
-    past_events = sorted(Event.get_past(session=session), key=lambda e: e.date, reverse=True)
-    cancelled_events = Event.get_cancelled(session=session)
+    upcoming_events, past_events, cancelled_events = Event.get_by_bucket(session=session)
+    registered_event_ids = EventRegistration.get_event_ids_for_family(session=session, user=current_user)
 
     if acting_admin:
         with ui.row().classes('w-full justify-end mb-2'):
@@ -406,20 +423,20 @@ def render_home_page(request: Request, session: SessionDep):
             with ui.tab_panel(one):
                 if upcoming_events:
                     for event in upcoming_events:
-                        _render_trip_list_item(event=event, current_user=current_user, session=session, acting_admin=acting_admin, request=request)
+                        _render_trip_list_item(event=event, is_registered=event.id in registered_event_ids, session=session, acting_admin=acting_admin, request=request)
                 else:
                     ui.label('No upcoming events found. Come back soon!').classes('text-lg font-bold text-red-500')
 
             with ui.tab_panel(two):
                 if past_events:
                     for event in past_events:
-                        _render_trip_list_item(event=event, current_user=current_user, session=session, acting_admin=acting_admin, request=request)
+                        _render_trip_list_item(event=event, is_registered=event.id in registered_event_ids, session=session, acting_admin=acting_admin, request=request)
                 else:
                     ui.label('No past events found').classes('text-lg font-bold text-red-500')
 
             with ui.tab_panel(three):
                 if cancelled_events:
                     for event in cancelled_events:
-                        _render_trip_list_item(event=event, current_user=current_user, session=session, acting_admin=acting_admin, request=request)
+                        _render_trip_list_item(event=event, is_registered=event.id in registered_event_ids, session=session, acting_admin=acting_admin, request=request)
                 else:
                     ui.label('No cancelled trips').classes('text-lg font-bold text-grey-500')
@@ -53,13 +53,17 @@ def _summarize_field_changes(changes: dict[str, Any]) -> str:
     return ", ".join(parts)
 
 
-def _actor_label(session: Session, actor_user_id: Optional[int]) -> str:
-    if actor_user_id is None:
-        return "System"
-    actor = session.get(User, actor_user_id)
-    if actor is None:
-        return f"User #{actor_user_id}"
-    return f"{actor.first_name} {actor.last_name}"
+def _actor_labels(session: Session, rows: list[ActionLog]) -> dict[Optional[int], str]:
+    """Map each row's actor_user_id to a display name with one IN query."""
+    labels: dict[Optional[int], str] = {None: "System"}
+    actor_ids = {r.actor_user_id for r in rows if r.actor_user_id is not None}
+    if actor_ids:
+        statement = select(User.id, User.first_name, User.last_name).where(User.id.in_(actor_ids))
+        for user_id, first_name, last_name in session.exec(statement).all():
+            labels[user_id] = f"{first_name} {last_name}"
+    for actor_id in actor_ids - labels.keys():
+        labels[actor_id] = f"User #{actor_id}"
+    return labels
 
 
 def _fetch_rows(
@@ -70,16 +74,18 @@ def _fetch_rows(
 ) -> list[ActionLog]:
     # Two ways a row surfaces to this user:
     # 1. subject_user_id == current_user.id (User / EventRegistration edits)
-    # 2. entity_name == 'Family' AND entity_id == current_user.family_id (Family edits)
-    family_clause = None
+    # 2. entity_name == 'Family' rows for their family (Family edits)
+    # For a user in a family both kinds carry that family in
+    # subject_family_id (User.after_write re-stamps a user's rows when they
+    # join or move family), so the query is one range scan over
+    # ix_action_log_subject_family_created, narrowed to this user's rows.
+    subject_clause = ActionLog.subject_user_id == current_user.id
     if current_user.family_id is not None:
-        family_clause = (
-            (ActionLog.entity_name == "Family")
-            & (ActionLog.entity_id == current_user.family_id)
+        where = (ActionLog.subject_family_id == current_user.family_id) & or_(
+            subject_clause, ActionLog.entity_name == "Family",
         )
-    subject_clause = ActionLog.subject_user_id == current_user.id
-
-    where = or_(subject_clause, family_clause) if family_clause is not None else subject_clause
+    else:
+        where = subject_clause
 
     stmt = (
         select(ActionLog)
@@ -121,6 +127,8 @@ def render_on_behalf_panel(
     if not rows:
         return  # Quiet when there's nothing to show.
 
+    actor_labels = _actor_labels(session, rows)
+
     with ui.expansion(
         f"📒 Changes made on your behalf ({len(rows)})", icon='history',
     ).classes('w-full'):
@@ -128,7 +136,7 @@ def render_on_behalf_panel(
             "These are changes a pack admin made to your record(s) recently."
         ).classes('text-sm italic')
         for row in rows:
-            actor_label = _actor_label(session, row.actor_user_id)
+            actor_label = actor_labels[row.actor_user_id]
             when = row.created_at.strftime("%b %d, %Y")
             summary = _summarize_field_changes(row.field_changes)
 
@@ -139,8 +139,7 @@ def family_members(request: Request, session: SessionDep):
         card_title("My Family Members (grown ups and cub scouts)")
         ui.button('Create/Add New', on_click=partial(dialog_user_crud, request=request, session=session, crud_mode=CRUDMode.CREATE,
                                                      user=None)).classes(BUTTON_CLASSES_ACCEPT)
-        current_user.get_all_from_family()
-        for user in current_user.get_all_from_family():
+        for user in current_user.get_all_from_family(session=session):
             with ui.card():
                 user_card(request=request, session=session, user=user)
 
@@ -5,9 +5,10 @@ from nicegui import ui
 import nicegui
 from sqlalchemy.exc import NoResultFound
 from sqlmodel import Session
+from sqlmodel.ext.asyncio.session import AsyncSession
 
 from pack218.entities.models import User
-from pack218.persistence import get_session
+from pack218.persistence import get_async_session, get_session
 from starlette.requests import Request
 
 
@@ -28,3 +29,4 @@ def assert_is_admin(request: Request, session: Session) -> None:
 
 
 SessionDep = Annotated[Session, Depends(get_session)]
+AsyncSessionDep = Annotated[AsyncSession, Depends(get_async_session)]
@@ -1,6 +1,16 @@
+import asyncio
+import contextvars
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Callable, Optional, TypeVar
+
+from sqlalchemy.ext.asyncio import async_session
 from sqlmodel import Session, SQLModel
+from sqlmodel.ext.asyncio.session import AsyncSession
+
+from pack218.config import config
+from pack218.persistence.engine import async_engine, engine
 
-from pack218.persistence.engine import engine
+R = TypeVar('R')
 
 # https://arunanshub.hashnode.dev/using-sqlmodel-with-alembic
 NAMING_CONVENTION = {
@@ -19,4 +29,60 @@ def create_db_and_tables():
 
 def get_session():
     with Session(engine) as session:
-        yield session
\ No newline at end of file
+        yield session
+
+
+async def get_async_session():
+    # expire_on_commit=False: an expired attribute read between awaits would
+    # need I/O outside the greenlet. save() still refreshes what it wrote.
+    async with AsyncSession(async_engine, expire_on_commit=False) as session:
+        # Pages render through session.run_sync() and hand the plain Session
+        # to the existing render code and its event handlers. Pin the
+        # AsyncSession on it so run_in_session() can find it again later
+        # (SQLAlchemy only keeps a weak reference from one to the other).
+        session.sync_session.info["async_session"] = session
+        yield session
+
+
+async def run_in_session(session: Session, fn: Callable[..., R], *args: Any, **kwargs: Any) -> R:
+    """Call ``fn(session, *args, **kwargs)`` without blocking the event loop.
+
+    When ``session`` is the sync side of an AsyncSession (the sessions
+    handed out by the async pages), ``fn`` runs through ``run_sync``. Its
+    queries are then awaited on the event loop, and everything else about
+    the call (contextvars, the current task, NiceGUI's slot stack) stays
+    the same. A plain Session is called directly.
+    """
+    proxy = async_session(session)
+    if proxy is None:
+        return fn(session, *args, **kwargs)
+    return await proxy.run_sync(fn, *args, **kwargs)
+
+
+_db_executor: Optional[ThreadPoolExecutor] = None
+
+
+def _get_db_executor() -> ThreadPoolExecutor:
+    global _db_executor
+    if _db_executor is None:
+        _db_executor = ThreadPoolExecutor(
+            max_workers=config.db_executor_max_workers, thread_name_prefix="pack218-db")
+    return _db_executor
+
+
+async def run_db(fn: Callable[..., R], *args: Any, **kwargs: Any) -> R:
+    """Run ``fn(session, *args, **kwargs)`` on the database thread pool.
+
+    Meant for write batches in event handlers: the event loop keeps serving
+    other clients while the batch runs. ``fn`` gets a fresh Session of its
+    own and runs in a copy of the caller's contextvars, so current_actor,
+    current_reason and the current-user cache carry over. It must not touch
+    NiceGUI elements: return what the UI needs and render it after the await.
+    """
+    context = contextvars.copy_context()
+
+    def call() -> R:
+        with Session(engine) as session:
+            return fn(session, *args, **kwargs)
+
+    return await asyncio.get_running_loop().run_in_executor(_get_db_executor(), context.run, call)
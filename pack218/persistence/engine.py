@@ -1,6 +1,12 @@
 import os
+import threading
+import time
+from dataclasses import dataclass
 
 from sqlalchemy import create_engine, event
+from sqlalchemy.exc import TimeoutError as PoolTimeoutError
+from sqlalchemy.ext.asyncio import create_async_engine
+from sqlalchemy.pool import AsyncAdaptedQueuePool, QueuePool
 from sqlmodel import SQLModel
 import logging
 
@@ -18,15 +24,131 @@ def get_sql_alchemy_database_url():
         logger.info(f"Connecting to {connection_str}")
         return connection_str
 
-engine = create_engine(get_sql_alchemy_database_url())
+
+def get_async_database_url():
+    # psycopg 3 serves both engines: create_async_engine picks its async
+    # dialect from the same postgresql+psycopg URL.
+    if config.pack218_use_sqlite:
+        return "sqlite+aiosqlite:///database.db"
+    return get_sql_alchemy_database_url()
+
+
+@dataclass
+class PoolMetrics:
+    """Running totals for connection checkouts from the engine's pool."""
+    checkouts: int = 0
+    timeouts: int = 0
+    slow_checkouts: int = 0
+    total_wait_s: float = 0.0
+    max_wait_s: float = 0.0
+
+    def __post_init__(self):
+        self._lock = threading.Lock()
+
+    def record(self, wait_s: float, timed_out: bool = False) -> None:
+        with self._lock:
+            if timed_out:
+                self.timeouts += 1
+                return
+            self.checkouts += 1
+            self.total_wait_s += wait_s
+            self.max_wait_s = max(self.max_wait_s, wait_s)
+            if wait_s * 1000 >= config.db_pool_slow_checkout_ms:
+                self.slow_checkouts += 1
+
+
+pool_metrics = PoolMetrics()
+
+
+class TimedQueuePool(QueuePool):
+    """QueuePool that records how long each checkout waited for a connection.
+
+    The wait includes opening a new connection when the pool has none idle,
+    which is what a request actually blocks on during a registration rush.
+    """
+
+    def _do_get(self):
+        start = time.perf_counter()
+        try:
+            connection = super()._do_get()
+        except PoolTimeoutError:
+            pool_metrics.record(time.perf_counter() - start, timed_out=True)
+            raise
+        wait_s = time.perf_counter() - start
+        pool_metrics.record(wait_s)
+        if wait_s * 1000 >= config.db_pool_slow_checkout_ms:
+            logger.warning(f"Waited {wait_s * 1000:.0f} ms for a database connection ({self.status()})")
+        return connection
+
+
+class TimedAsyncAdaptedQueuePool(TimedQueuePool, AsyncAdaptedQueuePool):
+    """TimedQueuePool for the async engine."""
+
+
+def get_engine_kwargs(poolclass=TimedQueuePool) -> dict:
+    kwargs = dict(
+        poolclass=poolclass,
+        pool_size=config.db_pool_size,
+        max_overflow=config.db_max_overflow,
+        pool_timeout=config.db_pool_timeout,
+        pool_pre_ping=config.db_pool_pre_ping,
+        pool_recycle=config.db_pool_recycle,
+    )
+    if not config.pack218_use_sqlite and config.db_statement_timeout_ms is not None:
+        kwargs["connect_args"] = {"options": f"-c statement_timeout={config.db_statement_timeout_ms}"}
+    return kwargs
+
+
+engine = create_engine(get_sql_alchemy_database_url(), **get_engine_kwargs())
+async_engine = create_async_engine(get_async_database_url(), **get_engine_kwargs(poolclass=TimedAsyncAdaptedQueuePool))
+
+
+def pool_stats() -> dict:
+    """Current pool occupancy plus the checkout totals since startup.
+
+    Sizes and occupancy are summed over both engines' pools, so
+    checked_out never exceeds pool_size plus overflow; the checkout totals
+    are shared.
+    """
+    pools = (engine.pool, async_engine.pool)
+    return {
+        "pool_size": sum(pool.size() for pool in pools),
+        "checked_out": sum(pool.checkedout() for pool in pools),
+        "checked_in": sum(pool.checkedin() for pool in pools),
+        "overflow": sum(max(pool.overflow(), 0) for pool in pools),
+        "checkouts": pool_metrics.checkouts,
+        "timeouts": pool_metrics.timeouts,
+        "slow_checkouts": pool_metrics.slow_checkouts,
+        "max_wait_ms": pool_metrics.max_wait_s * 1000,
+        "avg_wait_ms": (pool_metrics.total_wait_s / pool_metrics.checkouts * 1000) if pool_metrics.checkouts else 0.0,
+    }
+
+
+def apply_sqlite_pragmas(dbapi_conn, configs=config) -> None:
+    """Apply the SQLite profile from ``configs`` to a new DBAPI connection.
+
+    WAL plus synchronous=NORMAL only fsyncs at checkpoints. busy_timeout
+    makes a writer wait for the lock instead of failing with "database is
+    locked" straight away. mmap_size, cache_size and temp_store keep reads
+    and sorts in memory.
+    """
+    cursor = dbapi_conn.cursor()
+    cursor.execute("PRAGMA journal_mode=WAL")
+    cursor.execute("PRAGMA wal_autocheckpoint=1000")
+    cursor.execute(f"PRAGMA synchronous={configs.sqlite_synchronous}")
+    cursor.execute(f"PRAGMA busy_timeout={int(configs.sqlite_busy_timeout_ms)}")
+    cursor.execute(f"PRAGMA mmap_size={int(configs.sqlite_mmap_size)}")
+    cursor.execute(f"PRAGMA cache_size={int(configs.sqlite_cache_size)}")
+    cursor.execute(f"PRAGMA temp_store={configs.sqlite_temp_store}")
+    cursor.execute(f"PRAGMA foreign_keys={'ON' if configs.sqlite_foreign_keys else 'OFF'}")
+    cursor.close()
+
 
 if config.pack218_use_sqlite:
     @event.listens_for(engine, "connect")
-    def set_sqlite_wal_mode(dbapi_conn, connection_record):
-        cursor = dbapi_conn.cursor()
-        cursor.execute("PRAGMA journal_mode=WAL")
-        cursor.execute("PRAGMA wal_autocheckpoint=1000")
-        cursor.close()
+    @event.listens_for(async_engine.sync_engine, "connect")
+    def set_sqlite_pragmas(dbapi_conn, connection_record):
+        apply_sqlite_pragmas(dbapi_conn)
 
 NAMING_CONVENTION = {
     "ix": "ix_%(column_0_label)s",
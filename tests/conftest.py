@@ -1,5 +1,6 @@
 # Shared fixtures for the pack218 test suite.
 import pytest
+from sqlalchemy import event as sa_event
 from sqlmodel import SQLModel, Session, create_engine
 
 from pack218.audit import current_actor, current_reason
@@ -22,6 +23,20 @@ def db_session():
         yield session
 
 
+@pytest.fixture
+def count_statements(db_session):
+    """Collect every SQL statement issued on the session's engine."""
+    statements = []
+
+    def before_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+        statements.append(statement)
+
+    engine = db_session.get_bind()
+    sa_event.listen(engine, "before_cursor_execute", before_cursor_execute)
+    yield statements
+    sa_event.remove(engine, "before_cursor_execute", before_cursor_execute)
+
+
 @pytest.fixture
 def isolated_audit_context():
     """Reset audit contextvars after each test so they never leak between tests."""
@@ -1,7 +1,8 @@
 from datetime import datetime
 
 import pytest
-from sqlmodel import select
+from sqlalchemy.exc import NoResultFound
+from sqlmodel import func, select
 
 from pack218.audit import (
     AuditError,
@@ -9,9 +10,10 @@ from pack218.audit import (
     current_reason,
     diff_for,
     record_change,
+    record_changes,
     subject_for,
 )
-from pack218.entities.models import ActionLog, EventRegistration, Family, User
+from pack218.entities.models import ActionLog, Event, EventRegistration, Family, User
 
 
 @pytest.fixture
@@ -242,6 +244,12 @@ def test_diff_for_update_redacts_sensitive_user_fields(db_session, parent_user):
     assert diff["hashed_password"] == ["<redacted>", "<redacted>"]
 
 
+def test_diff_for_update_ignores_assignments_that_change_nothing(db_session, parent_user):
+    parent_user.first_name = "Sarah"  # same value: tracked as modified, but no change
+    parent_user.last_name = "Chen-Li"
+    assert diff_for(parent_user, "update") == {"last_name": ["Chen", "Chen-Li"]}
+
+
 def test_diff_for_update_skips_relationship_attrs(db_session, parent_user):
     """User.family is a relationship — must not appear in field_changes."""
     parent_user.first_name = "Sarah-Edit"
@@ -354,3 +362,437 @@ def test_contextvars_isolation():
     assert b == 2
     # And no leakage into the outer context:
     assert current_actor.get() is None
+
+
+def _member(db_session, first_name, family_id=None):
+    user = User(
+        first_name=first_name,
+        last_name="Chen",
+        email=f"{first_name.lower()}@example.com",
+        hashed_password=User.hash_password("x"),
+        family_id=family_id,
+    )
+    db_session.add(user)
+    db_session.commit()
+    db_session.refresh(user)
+    return user
+
+
+def test_record_changes_is_one_bulk_insert(
+    db_session, isolated_audit_context, admin_user, parent_user, count_statements
+):
+    current_actor.set(admin_user.id)
+    current_reason.set("Phone call")
+    other = _member(db_session, "Leo")
+    db_session.refresh(parent_user)
+    parent_user.first_name = "Sarah-2"
+    other.first_name = "Leo-2"
+    changes = [
+        (parent_user, "update", diff_for(parent_user, "update")),
+        (other, "update", diff_for(other, "update")),
+    ]
+
+    count_statements.clear()
+    record_changes(db_session, changes)
+    db_session.commit()
+
+    assert len([s for s in count_statements if s.startswith("INSERT INTO action_log")]) == 1
+    rows = db_session.exec(select(ActionLog).order_by(ActionLog.subject_user_id)).all()
+    assert [r.field_changes["first_name"] for r in rows] == [["Sarah", "Sarah-2"], ["Leo", "Leo-2"]]
+    assert {r.reason for r in rows} == {"Phone call"}
+    assert rows[0].created_at == rows[1].created_at
+
+
+def test_save_many_records_one_row_per_instance(db_session, isolated_audit_context, parent_user):
+    current_actor.set(parent_user.id)
+    event = Event(date="2026-06-01", location="Camp Emerald", duration_in_days=2)
+    db_session.add(event)
+    db_session.commit()
+    existing = EventRegistration(user_id=parent_user.id, event_id=event.id)
+    db_session.add(existing)
+    db_session.commit()
+    db_session.refresh(existing)
+
+    created = EventRegistration(user_id=parent_user.id, event_id=event.id, eat_saturday_lunch=True)
+    existing.stay_friday_night = True
+    EventRegistration.save_many([existing, created], session=db_session)
+
+    rows = db_session.exec(
+        select(ActionLog).where(ActionLog.entity_name == "EventRegistration")).all()
+    by_action = {r.action: r for r in rows}
+    assert set(by_action) == {"create", "update"}
+    assert by_action["update"].entity_id == existing.id
+    assert by_action["update"].field_changes == {"stay_friday_night": [False, True]}
+    assert by_action["create"].entity_id == created.id
+    assert created.id is not None
+
+
+def test_save_many_rejects_the_whole_batch(db_session, isolated_audit_context, admin_user, parent_user):
+    """A non-self edit without a reason aborts the batch before anything is written."""
+    current_actor.set(admin_user.id)
+    current_reason.set(None)
+    other = _member(db_session, "Leo")
+    admin_user.first_name = "Dave-2"  # self-edit, allowed on its own
+    other.first_name = "Leo-2"  # on behalf of Leo, no reason
+
+    with pytest.raises(AuditError):
+        User.save_many([admin_user, other], session=db_session)
+    db_session.rollback()
+
+    assert db_session.exec(select(ActionLog)).all() == []
+    assert db_session.get(User, admin_user.id).first_name == "Cubmaster"
+
+
+def test_delete_many_snapshots_each_row(db_session, isolated_audit_context, parent_user):
+    current_actor.set(parent_user.id)
+    event = Event(date="2026-06-01", location="Camp Emerald", duration_in_days=2)
+    db_session.add(event)
+    db_session.commit()
+    registrations = [
+        EventRegistration(user_id=parent_user.id, event_id=event.id, stay_friday_night=flag)
+        for flag in (True, False)
+    ]
+    db_session.add_all(registrations)
+    db_session.commit()
+    ids = [r.id for r in registrations]
+
+    EventRegistration.delete_many(ids, session=db_session)
+
+    assert db_session.exec(select(EventRegistration)).all() == []
+    rows = db_session.exec(select(ActionLog).order_by(ActionLog.entity_id)).all()
+    assert [r.entity_id for r in rows] == ids
+    assert [r.field_changes["snapshot"]["stay_friday_night"] for r in rows] == [True, False]
+
+
+def test_delete_many_missing_id_deletes_nothing(db_session, isolated_audit_context, parent_user):
+    current_actor.set(parent_user.id)
+    with pytest.raises(NoResultFound):
+        User.delete_many([parent_user.id, 9999], session=db_session)
+    assert db_session.get(User, parent_user.id) is not None
+    assert db_session.exec(select(ActionLog)).all() == []
+
+
+def test_subject_family_id_is_recorded_for_single_and_batch_writes(db_session, isolated_audit_context):
+    family = Family(family_name="Chen")
+    db_session.add(family)
+    db_session.commit()
+    sarah = _member(db_session, "Sarah", family_id=family.id)
+    loner = _member(db_session, "Ava")
+    event = Event(date="2026-06-01", location="Camp Emerald", duration_in_days=2)
+    db_session.add(event)
+    db_session.commit()
+    sarah_id, loner_id, family_id, event_id = sarah.id, loner.id, family.id, event.id
+    db_session.expunge_all()  # owners must be looked up, not read from the session
+
+    EventRegistration(user_id=sarah_id, event_id=event_id).save(session=db_session)
+    EventRegistration.save_many([
+        EventRegistration(user_id=sarah_id, event_id=event_id, stay_friday_night=True),
+        EventRegistration(user_id=loner_id, event_id=event_id),
+    ], session=db_session)
+    family = db_session.get(Family, family_id)
+    family.family_name = "Chen-Li"
+    family.save(session=db_session)
+
+    rows = db_session.exec(select(ActionLog).order_by(ActionLog.id)).all()
+    assert [(r.entity_name, r.subject_family_id) for r in rows] == [
+        ("EventRegistration", family_id),
+        ("EventRegistration", family_id),
+        ("EventRegistration", None),
+        ("Family", family_id),
+    ]
+
+
+def _search(db_session, q):
+    from pack218.audit.search import search_action_log
+
+    matches = search_action_log(db_session, q)
+    if matches is None:
+        return []
+    statement = (
+        select(ActionLog)
+        .join(matches, matches.c.id == ActionLog.id)
+        .order_by(matches.c.rank, ActionLog.created_at.desc())
+    )
+    return db_session.exec(statement).all()
+
+
+def test_search_text_is_indexed_on_write(db_session, isolated_audit_context, admin_user, parent_user):
+    current_actor.set(admin_user.id)
+    current_reason.set("Texted the cubmaster about allergies")
+    db_session.refresh(parent_user)
+    parent_user.last_name = "Okonkwo"
+    parent_user.email = "secret@example.com"
+    record_change(db_session, parent_user, "update")
+    db_session.commit()
+
+    [row] = db_session.exec(select(ActionLog)).all()
+    assert "Okonkwo" in row.search_text and "allergies" in row.search_text
+    assert "secret@example.com" not in row.search_text  # redacted values stay out
+
+    assert [r.id for r in _search(db_session, "okonk")] == [row.id]  # prefix match
+    assert [r.id for r in _search(db_session, "cubmaster allerg")] == [row.id]  # every term
+    assert _search(db_session, "cubmaster snacks") == []
+    assert _search(db_session, "!!") == []
+
+
+def test_search_ranks_text_matches_before_name_matches(db_session, isolated_audit_context, admin_user, parent_user):
+    current_actor.set(admin_user.id)
+    current_reason.set("Phone call")
+    other = _member(db_session, "Leo")
+    db_session.refresh(parent_user)
+    other.last_name = "Chen-Sarah"
+    record_change(db_session, other, "update")
+    db_session.commit()
+    parent_user.phone_number = None
+    parent_user.first_name = "Sara"
+    record_change(db_session, parent_user, "update")
+    db_session.commit()
+
+    # "sarah" is in Leo's diff, and is the subject's email on the other row.
+    rows = _search(db_session, "sarah")
+    assert [r.subject_user_id for r in rows] == [other.id, parent_user.id]
+
+
+def _page_through(db_session, page_size, **filters):
+    from pack218.pages.admin_action_log import fetch_action_log_page
+
+    pages, cursor = [], None
+    while True:
+        rows, cursor = fetch_action_log_page(db_session, after=cursor, page_size=page_size, **filters)
+        pages.append([r.id for r in rows])
+        if cursor is None:
+            return pages
+
+
+def test_action_log_pages_cover_every_row_once(db_session, isolated_audit_context, parent_user):
+    current_actor.set(parent_user.id)
+    users = [_member(db_session, f"Kid{i}") for i in range(7)]
+    for user in users:
+        user.last_name = "Renamed"
+    # One batch: all seven rows share created_at, so pages split on id.
+    record_changes(db_session, [(user, "update", diff_for(user, "update")) for user in users])
+    db_session.commit()
+    parent_user.first_name = "Sarah-2"
+    record_change(db_session, parent_user, "update")
+    db_session.commit()
+
+    all_ids = [r.id for r in db_session.exec(
+        select(ActionLog).order_by(ActionLog.created_at.desc(), ActionLog.id.desc())).all()]
+    pages = _page_through(db_session, page_size=3)
+    assert [len(page) for page in pages] == [3, 3, 2]
+    assert sum(pages, []) == all_ids
+
+    assert _page_through(db_session, page_size=8) == [all_ids]
+    assert _page_through(db_session, page_size=3, entity="Family") == [[]]
+
+
+def _log_camp_edits(db_session, count, start=0):
+    ids = []
+    for i in range(start, start + count):
+        user = _member(db_session, f"Kid{i}")
+        # More mentions of "camp" rank higher, so older edits match better.
+        user.last_name = " ".join(["camp"] * (20 - i))
+        record_change(db_session, user, "update")
+        db_session.commit()
+        ids.append(db_session.exec(select(func.max(ActionLog.id))).one())
+    return ids
+
+
+def _search_pages(db_session, ranked_ids, page_size, between_pages=lambda: None):
+    from pack218.pages.admin_action_log import fetch_search_page
+
+    pages, cursor = [], None
+    while True:
+        rows, cursor = fetch_search_page(db_session, ranked_ids, after=cursor, page_size=page_size)
+        pages.append([r.id for r in rows])
+        if cursor is None:
+            return pages
+        between_pages()
+
+
+def test_action_log_search_results_page_in_rank_order(db_session, isolated_audit_context, parent_user):
+    from pack218.pages.admin_action_log import rank_action_log_matches
+
+    current_actor.set(parent_user.id)
+    current_reason.set(None)
+    ids = _log_camp_edits(db_session, 5)
+
+    # Older edits mention "camp" more, so the best match is the oldest row.
+    ranked = rank_action_log_matches(db_session, "camp")
+    assert ranked == ids
+    assert _search_pages(db_session, ranked, page_size=2) == [ids[:2], ids[2:4], ids[4:]]
+    assert rank_action_log_matches(db_session, "camp", limit=2) == ids[:2]
+    assert rank_action_log_matches(db_session, "camp", entity="Family") == []
+
+
+def test_action_log_search_pages_survive_rows_indexed_between_pages(
+    db_session, isolated_audit_context, parent_user
+):
+    from pack218.pages.admin_action_log import rank_action_log_matches
+
+    current_actor.set(parent_user.id)
+    current_reason.set(None)
+    ids = _log_camp_edits(db_session, 6)
+    ranked = rank_action_log_matches(db_session, "camp")
+    added = []
+
+    def index_another_match():
+        # New matches shift every bm25 score; paging must not skip or repeat rows.
+        added.extend(_log_camp_edits(db_session, 1, start=len(ids) + len(added)))
+
+    pages = _search_pages(db_session, ranked, page_size=2, between_pages=index_another_match)
+    assert sum(pages, []) == ranked == ids
+    assert added
+def test_archive_moves_old_months_out_and_stays_searchable(db_session, isolated_audit_context, parent_user, tmp_path):
+    from datetime import date
+
+    from sqlalchemy import func, update
+
+    from pack218.audit.archive import archive_action_log, iter_archived_rows, search_archive
+
+    def write(last_name, created_at):
+        db_session.refresh(parent_user)
+        parent_user.last_name = last_name
+        record_change(db_session, parent_user, "update")
+        db_session.commit()
+        row_id = db_session.exec(select(func.max(ActionLog.id))).one()
+        db_session.exec(update(ActionLog).where(ActionLog.id == row_id).values(created_at=created_at))
+        db_session.commit()
+        return row_id
+
+    current_actor.set(parent_user.id)
+    january = write("Okonkwo", datetime(2025, 1, 20, 9, 30))
+    february = write("Lindqvist", datetime(2025, 2, 3))
+    recent = write("Chen", datetime(2026, 10, 1))
+
+    paths = archive_action_log(db_session, months=12, directory=tmp_path, today=date(2026, 10, 18))
+    assert [p.name for p in paths] == ["action_log-2025-01.jsonl.gz", "action_log-2025-02.jsonl.gz"]
+    assert [r.id for r in db_session.exec(select(ActionLog)).all()] == [recent]
+    assert _search(db_session, "okonkwo") == []  # the FTS index dropped them too
+
+    [found] = search_archive(db_session, "lindq", limit=10, directory=tmp_path)
+    assert (found.id, found.created_at) == (february, datetime(2025, 2, 3))
+    assert found.field_changes["last_name"] == ["Okonkwo", "Lindqvist"]
+    # Name matches on the (still live) subject find every archived row.
+    assert [r.id for r in search_archive(db_session, "sarah", limit=10, directory=tmp_path)] == [february, january]
+    assert search_archive(db_session, "lindq", limit=10, entity="Family", directory=tmp_path) == []
+
+    # A straggler for an already-archived month is merged into its file.
+    straggler = write("Adeyemi", datetime(2025, 1, 2))
+    archive_action_log(db_session, months=12, directory=tmp_path, today=date(2026, 10, 18))
+    assert sorted(r["id"] for r in iter_archived_rows(tmp_path)) == [january, february, straggler]
+    assert len(list(tmp_path.iterdir())) == 2
+
+
+def test_partition_maintenance_keeps_checking_after_a_failure(monkeypatch):
+    import asyncio
+
+    from pack218.audit import archive
+
+    calls = []
+
+    def ensure(session, months_ahead=3):
+        calls.append(months_ahead)
+        if len(calls) == 1:
+            raise RuntimeError("lock timeout")
+        return []
+
+    monkeypatch.setattr(archive, "ensure_action_log_partitions", ensure)
+    monkeypatch.setattr(archive.config, "action_log_partition_check_interval_s", 0)
+
+    async def run_until_third_check():
+        task = asyncio.create_task(archive.run_partition_maintenance())
+        while len(calls) < 3:
+            await asyncio.sleep(0.01)
+        task.cancel()
+
+    asyncio.run(asyncio.wait_for(run_until_third_check(), timeout=5))
+    assert len(calls) >= 3
+
+
+def test_field_changes_are_stored_packed_and_read_back_as_dicts(db_session, isolated_audit_context, parent_user):
+    import json
+
+    from sqlalchemy import text
+
+    from pack218.audit.encoding import pack, unpack
+
+    current_actor.set(parent_user.id)
+    current_reason.set("Merged duplicate family")
+    family = Family(family_name="Chen", emergency_contact_phone_number_1="+16505550100")
+    family.save(session=db_session)
+    Family.delete_by_id(family.id, session=db_session)
+
+    created, deleted = db_session.exec(select(ActionLog).order_by(ActionLog.id)).all()
+    assert created.field_changes["emergency_contact_phone_number_1"] == [None, "+16505550100"]
+    assert deleted.field_changes["_action"] == "delete"
+    assert deleted.field_changes["snapshot"]["family_name"] == "Chen"
+
+    for row in (created, deleted):
+        [stored] = db_session.exec(
+            text("SELECT field_changes FROM action_log WHERE id = :id").bindparams(id=row.id)
+        ).one()
+        assert unpack(stored) == row.field_changes
+        assert len(stored) < len(json.dumps(row.field_changes)) / 2
+
+    # Names missing from the dictionary are kept as strings.
+    unknown = {"brand_new_column": [1, 2.5], "notes": {"nested": [True, None]}}
+    assert unpack(pack(unknown)) == unknown
+
+
+def test_field_name_codes_keep_the_packing_migrations_prefix():
+    import importlib.util
+    from pathlib import Path
+
+    from pack218.audit.encoding import FIELD_NAMES, pack, unpack
+
+    path = Path(__file__).parent.parent / "alembic" / "versions" / "0b6d4f2e8c15_pack_action_log_field_changes.py"
+    spec = importlib.util.spec_from_file_location("pack_migration", path)
+    migration = importlib.util.module_from_spec(spec)
+    spec.loader.exec_module(migration)
+
+    # Rows the migration packed must decode the same with today's table.
+    assert FIELD_NAMES[:len(migration._FIELD_NAMES)] == migration._FIELD_NAMES
+    diff = {"first_name": ["Sarah", "Sara"], "snapshot": {"capacity": 12}}
+    assert unpack(migration._pack(diff)) == diff == migration._unpack(pack(diff))
+
+
+def test_outbox_mode_queues_audit_rows_until_drained(db_session, isolated_audit_context, parent_user, monkeypatch):
+    from pack218.audit.outbox import drain_action_log_outbox, drain_all
+    from pack218.config import config
+    from pack218.entities.models import ActionLogOutbox
+
+    monkeypatch.setattr(config, "audit_outbox", True)
+    current_actor.set(parent_user.id)
+    current_reason.set("Den roster update")
+    kids = [_member(db_session, f"Kid{i}") for i in range(3)]
+    db_session.refresh(parent_user)
+    parent_user.first_name = "Sarah-Lee"
+    parent_user.save(session=db_session)
+    for kid in kids:
+        db_session.refresh(kid)
+    for kid in kids:
+        kid.last_name = "Okafor"
+    User.save_many(kids, session=db_session)
+
+    # Rolled back with the write it describes.
+    parent_user.last_name = "Gone"
+    record_change(db_session, parent_user, "update")
+    db_session.rollback()
+
+    assert db_session.exec(select(ActionLog)).all() == []
+    queued = [
+        (row.entity_id, row.field_changes, row.created_at)
+        for row in db_session.exec(select(ActionLogOutbox).order_by(ActionLogOutbox.id)).all()
+    ]
+    assert [(entity_id, changes) for entity_id, changes, _ in queued] == [
+        (parent_user.id, {"first_name": ["Sarah", "Sarah-Lee"]}),
+        *[(kid.id, {"last_name": ["Chen", "Okafor"]}) for kid in kids],
+    ]
+
+    assert drain_action_log_outbox(db_session, batch_size=3) == 3
+    assert drain_all(db_session) == 1
+    assert db_session.exec(select(ActionLogOutbox)).all() == []
+    rows = db_session.exec(select(ActionLog).order_by(ActionLog.id)).all()
+    assert [(r.entity_id, r.field_changes, r.created_at) for r in rows] == queued
+    assert sorted(r.id for r in _search(db_session, "okafor")) == [r.id for r in rows[1:]]
@@ -0,0 +1,458 @@
+"""Tests for the Event / EventRegistration read paths used by the trip pages."""
+import pytest
+
+from pack218.entities.models import Event, EventRegistration, Family, User
+
+
+@pytest.fixture
+def camporee(db_session):
+    e = Event(date="2026-06-01", location="Camp Emerald", duration_in_days=2)
+    db_session.add(e)
+    db_session.commit()
+    db_session.refresh(e)
+    return e
+
+
+def _register(db_session, event, first_name, family=None, **fields):
+    user = User(
+        first_name=first_name,
+        last_name=family.family_name if family else "Solo",
+        family_id=family.id if family else None,
+    )
+    db_session.add(user)
+    db_session.commit()
+    db_session.refresh(user)
+    registration = EventRegistration(user_id=user.id, event_id=event.id, **fields)
+    db_session.add(registration)
+    db_session.commit()
+    db_session.refresh(registration)
+    return registration
+
+
+def test_load_roster_returns_registration_user_and_family(db_session, camporee):
+    chen = Family(family_name="Chen")
+    db_session.add(chen)
+    db_session.commit()
+    db_session.refresh(chen)
+    _register(db_session, camporee, "Sarah", family=chen, eat_saturday_lunch=True)
+    _register(db_session, camporee, "Liam", family=chen)
+    _register(db_session, camporee, "Noah")
+
+    roster = camporee.load_roster(session=db_session)
+
+    by_name = {u.first_name: (r, u, f) for r, u, f in roster}
+    assert set(by_name) == {"Sarah", "Liam", "Noah"}
+    sarah_reg, sarah, sarah_family = by_name["Sarah"]
+    assert sarah_reg.user_id == sarah.id
+    assert sarah_reg.cost == 5
+    assert sarah_family.family_name == "Chen"
+    assert sarah.family is sarah_family
+    assert by_name["Noah"][2] is None
+
+
+def test_load_roster_is_a_single_query(db_session, camporee, count_statements):
+    families = []
+    for name in ("Chen", "Smith", "Patel"):
+        f = Family(family_name=name)
+        db_session.add(f)
+        db_session.commit()
+        db_session.refresh(f)
+        families.append(f)
+    for i in range(9):
+        _register(db_session, camporee, f"Kid{i}", family=families[i % 3])
+    event_id = camporee.id
+    db_session.expunge_all()
+
+    event = db_session.get(Event, event_id)
+    count_statements.clear()
+    roster = event.load_roster(session=db_session)
+    # Touch everything the trip-detail page reads per row.
+    for r, u, f in roster:
+        _ = (r.cost, u.participant_str, u.family_name, u.family.family_name, f.car_license_plates)
+
+    assert len(roster) == 9
+    assert len(count_statements) == 1
+
+
+# ---------------------------------------------------------------------------
+# Waitlist computation
+# ---------------------------------------------------------------------------
+
+
+def _reference_waitlist_status(session, event_id):
+    """The original per-registration implementation, kept as the oracle."""
+    from collections import defaultdict
+
+    event = Event.get_by_id(event_id, session=session)
+    registrations = EventRegistration.select_by_event(session=session, event_id=event_id)
+    if not event.capacity:
+        return {r.id: False for r in registrations}
+
+    batches = defaultdict(list)
+    for r in registrations:
+        batches[(r.user(session=session).family_id, r.registration_ts)].append(r)
+    result = {}
+    headcount = 0
+    for _key, batch_regs in sorted(batches.items(), key=lambda item: item[0][1]):
+        waitlisted = headcount >= event.capacity
+        for r in batch_regs:
+            result[r.id] = waitlisted
+        if not waitlisted:
+            headcount += len(batch_regs)
+
+    family_reg_ids = defaultdict(list)
+    for r in registrations:
+        family_reg_ids[r.user(session=session).family_id].append(r.id)
+    for reg_ids in family_reg_ids.values():
+        if any(not result[rid] for rid in reg_ids):
+            for rid in reg_ids:
+                result[rid] = False
+    return result
+
+
+def test_compute_waitlist_status_empty_event(db_session, camporee):
+    assert EventRegistration.compute_waitlist_status(session=db_session, event_id=camporee.id) == {}
+
+
+def test_compute_waitlist_status_keeps_families_together(db_session):
+    from datetime import datetime, timedelta
+
+    event = Event(date="2026-06-01", location="Camp Emerald", capacity=2)
+    chen, smith, patel = Family(family_name="Chen"), Family(family_name="Smith"), Family(family_name="Patel")
+    db_session.add_all([event, chen, smith, patel])
+    db_session.commit()
+    t0 = datetime(2026, 5, 1, 9, 0)
+    first = _register(db_session, event, "Noah", family=smith, registration_ts=t0)
+    sarah = _register(db_session, event, "Sarah", family=chen, registration_ts=t0 + timedelta(minutes=1))
+    late = _register(db_session, event, "Ava", family=patel, registration_ts=t0 + timedelta(minutes=2))
+    liam = _register(db_session, event, "Liam", family=chen, registration_ts=t0 + timedelta(minutes=3))
+
+    status = EventRegistration.compute_waitlist_status(session=db_session, event_id=event.id)
+
+    assert status == {first.id: False, sarah.id: False, late.id: True, liam.id: False}
+
+
+@pytest.mark.parametrize("seed", range(8))
+def test_compute_waitlist_status_matches_reference_on_random_rosters(db_session, seed):
+    import random
+    from datetime import datetime, timedelta
+
+    rng = random.Random(seed)
+    families = [Family(family_name=f"F{i}") for i in range(rng.randint(1, 6))]
+    db_session.add_all(families)
+    db_session.commit()
+    users = []
+    for i in range(rng.randint(5, 25)):
+        family = rng.choice(families + [None])
+        users.append(User(first_name=f"U{i}", last_name="X", family_id=family.id if family else None))
+    db_session.add_all(users)
+    db_session.commit()
+
+    # A small pool of timestamps so batches (same family + same ts) and
+    # cross-family ties both occur.
+    t0 = datetime(2026, 5, 1, 9, 0)
+    timestamps = [t0 + timedelta(minutes=m) for m in range(rng.randint(1, 6))]
+    for capacity in (None, 0, 1, rng.randint(2, 10), 100):
+        event = Event(date="2026-06-01", location=f"Site {seed}", capacity=capacity)
+        db_session.add(event)
+        db_session.commit()
+        for user in rng.sample(users, rng.randint(0, len(users))):
+            db_session.add(EventRegistration(
+                user_id=user.id, event_id=event.id, registration_ts=rng.choice(timestamps),
+            ))
+        db_session.commit()
+
+        expected = _reference_waitlist_status(db_session, event.id)
+        actual = EventRegistration.compute_waitlist_status(session=db_session, event_id=event.id)
+        assert actual == expected
+
+
+def test_compute_waitlist_status_is_a_single_query(db_session, camporee, count_statements):
+    camporee.capacity = 1
+    db_session.add(camporee)
+    db_session.commit()
+    for i in range(5):
+        _register(db_session, camporee, f"Kid{i}")
+    event_id = camporee.id
+    db_session.expunge_all()
+
+    count_statements.clear()
+    EventRegistration.compute_waitlist_status(session=db_session, event_id=event_id)
+    assert len(count_statements) == 1
+
+
+# ---------------------------------------------------------------------------
+# Materialized waitlist positions
+# ---------------------------------------------------------------------------
+
+
+@pytest.fixture
+def small_trip(db_session):
+    """A capacity-2 trip with four single-member families registered in order."""
+    from datetime import datetime, timedelta
+
+    event = Event(date="2026-06-01", location="Camp Emerald", capacity=2)
+    db_session.add(event)
+    db_session.commit()
+    t0 = datetime(2026, 5, 1, 9, 0)
+    registrations = []
+    for i, name in enumerate(("Chen", "Smith", "Patel", "Garcia")):
+        family = Family(family_name=name)
+        db_session.add(family)
+        db_session.commit()
+        user = User(first_name=name, last_name=name, family_id=family.id)
+        db_session.add(user)
+        db_session.commit()
+        registration = EventRegistration(
+            user_id=user.id, event_id=event.id, registration_ts=t0 + timedelta(minutes=i),
+        )
+        registration.save(session=db_session)
+        registrations.append(registration)
+    return event, registrations
+
+
+def _positions(db_session, registrations):
+    for r in registrations:
+        db_session.refresh(r)
+    return [r.waitlist_position for r in registrations]
+
+
+def test_save_materializes_waitlist_positions(db_session, isolated_audit_context, small_trip):
+    event, registrations = small_trip
+    assert _positions(db_session, registrations) == [None, None, 1, 2]
+    assert EventRegistration.compute_waitlist_positions(session=db_session, event_id=event.id) == {
+        r.id: r.waitlist_position for r in registrations
+    }
+
+
+def test_delete_promotes_from_waitlist(db_session, isolated_audit_context, small_trip):
+    _event, registrations = small_trip
+    EventRegistration.delete_by_id(registrations[0].id, session=db_session)
+    assert _positions(db_session, registrations[1:]) == [None, None, 1]
+
+
+def test_capacity_change_updates_positions(db_session, isolated_audit_context, small_trip):
+    event, registrations = small_trip
+    event.capacity = 3
+    event.save(session=db_session)
+    assert _positions(db_session, registrations) == [None, None, None, 1]
+
+    event.capacity = None
+    event.save(session=db_session)
+    assert _positions(db_session, registrations) == [None, None, None, None]
+
+
+def test_moving_family_updates_positions(db_session, isolated_audit_context, small_trip):
+    _event, registrations = small_trip
+    # Garcia joins the Chen family, which already has a spot.
+    garcia = db_session.get(User, registrations[3].user_id)
+    garcia.family_id = db_session.get(User, registrations[0].user_id).family_id
+    garcia.save(session=db_session)
+    assert _positions(db_session, registrations) == [None, None, 1, None]
+
+
+def test_waitlist_position_is_not_audited(db_session, isolated_audit_context, small_trip):
+    from sqlmodel import select
+    from pack218.entities.models import ActionLog
+
+    rows = db_session.exec(select(ActionLog).where(ActionLog.entity_name == "EventRegistration")).all()
+    assert rows
+    assert all("waitlist_position" not in row.field_changes for row in rows)
+
+
+def test_registration_save_keeps_instances_current_without_refresh(
+    db_session, isolated_audit_context, small_trip, count_statements
+):
+    _event, registrations = small_trip
+    count_statements.clear()
+    # The last save kept its own instance loaded.
+    assert registrations[-1].waitlist_position == 2
+    assert count_statements == []
+    # The others were expired by that commit and reload with the positions it moved.
+    assert [r.waitlist_position for r in registrations] == [None, None, 1, 2]
+
+    registrations[0].eat_saturday_lunch = True
+    registrations[0].save(session=db_session)
+    count_statements.clear()
+    registrations[0].eat_saturday_dinner = True
+    registrations[0].save(session=db_session)
+    assert registrations[0].eat_saturday_lunch is True
+    assert not any(statement.startswith("SELECT") for statement in count_statements)
+
+
+def test_registration_save_still_expires_the_rest_of_the_session(
+    db_session, isolated_audit_context, small_trip
+):
+    from sqlmodel import Session
+
+    event, registrations = small_trip
+    assert event.location == "Camp Emerald"
+    with Session(db_session.get_bind()) as other:
+        other.get(Event, event.id).location = "Camp Ruby"
+        other.commit()
+
+    registrations[0].has_paid = True
+    registrations[0].save(session=db_session)
+    assert event.location == "Camp Ruby"
+
+
+def test_save_refresh_can_be_forced_per_call(db_session, isolated_audit_context, small_trip, count_statements):
+    _event, registrations = small_trip
+    registrations[0].has_paid = True
+    count_statements.clear()
+    registrations[0].save(session=db_session, refresh=True)
+    assert count_statements[-1].startswith("SELECT eventregistration")
+    assert registrations[0].has_paid is True
+
+
+def test_get_event_ids_for_family(db_session, count_statements):
+    chen, smith = Family(family_name="Chen"), Family(family_name="Smith")
+    trips = [Event(date="2026-06-01", location=f"Site {i}") for i in range(4)]
+    db_session.add_all([chen, smith, *trips])
+    db_session.commit()
+    sarah = _register(db_session, trips[0], "Sarah", family=chen).user(session=db_session)
+    _register(db_session, trips[1], "Liam", family=chen)
+    _register(db_session, trips[2], "Noah", family=smith)
+    loner = _register(db_session, trips[3], "Ava").user(session=db_session)
+    _register(db_session, trips[2], "Mia")
+
+    expected = {trips[0].id, trips[1].id}
+    db_session.refresh(sarah)
+
+    count_statements.clear()
+    assert EventRegistration.get_event_ids_for_family(session=db_session, user=sarah) == expected
+    assert len(count_statements) == 1
+    # Family-less users only see their own registrations.
+    assert EventRegistration.get_event_ids_for_family(session=db_session, user=loner) == {trips[3].id}
+
+
+def test_save_family_registration_commits_once(db_session, isolated_audit_context, small_trip):
+    from sqlalchemy import event as sa_event
+    from sqlmodel import select
+    from pack218.entities.models import ActionLog
+
+    event, registrations = small_trip
+    chen_id = db_session.get(User, registrations[0].user_id).family_id
+    kids = [User(first_name=f"Kid{i}", last_name="Chen", family_id=chen_id) for i in range(3)]
+    db_session.add_all(kids)
+    db_session.commit()
+    event_id, kid_ids = event.id, [k.id for k in kids]
+    parent_id = registrations[0].user_id
+    log_count = len(db_session.exec(select(ActionLog)).all())
+
+    commits = []
+
+    def after_commit(session):
+        commits.append(session)
+
+    sa_event.listen(db_session, "after_commit", after_commit)
+    try:
+        outcomes = EventRegistration.save_family_registration(
+            session=db_session,
+            event_id=event_id,
+            selections={
+                parent_id: {"eat_saturday_lunch": False, "stay_friday_night": False},
+                **{kid_id: {"eat_saturday_lunch": True, "stay_friday_night": True} for kid_id in kid_ids},
+            },
+        )
+    finally:
+        sa_event.remove(db_session, "after_commit", after_commit)
+
+    assert len(commits) == 1
+    assert outcomes == [(parent_id, "removed", None)] + [(kid_id, "saved", None) for kid_id in kid_ids]
+    new_rows = db_session.exec(select(EventRegistration).where(EventRegistration.user_id.in_(kid_ids))).all()
+    assert len({r.registration_ts for r in new_rows}) == 1
+    assert all(r.eat_saturday_lunch for r in new_rows)
+    assert db_session.exec(
+        select(EventRegistration).where(EventRegistration.user_id == parent_id)
+    ).one_or_none() is None
+    logs = db_session.exec(select(ActionLog).order_by(ActionLog.id)).all()[log_count:]
+    assert sorted(log.action for log in logs) == ["create", "create", "create", "delete"]
+    assert all(log.field_changes for log in logs)
+    # The Chens lost their spot: the kids were registered after Patel.
+    assert {r.waitlist_position for r in new_rows} == {2}
+
+
+# ---------------------------------------------------------------------------
+# Home-page buckets
+# ---------------------------------------------------------------------------
+
+
+@pytest.fixture
+def mixed_events(db_session):
+    from datetime import datetime, timedelta
+
+    today = datetime.now()
+
+    def day(offset):
+        return (today + timedelta(days=offset)).strftime('%Y-%m-%d')
+
+    events = [
+        Event(date=day(30), location="Next month"),
+        Event(date=day(3), location="This week"),
+        Event(date=day(0), location="Today"),
+        Event(date=day(-10), location="Last week"),
+        Event(date=day(-400), location="Last year"),
+        Event(date=day(20), location="Rained out", cancelled=True),
+        Event(date=day(-20), location="Closed site", cancelled=True),
+    ]
+    db_session.add_all(events)
+    db_session.commit()
+    return events
+
+
+def test_bucket_helpers_filter_and_order_in_sql(db_session, mixed_events):
+    locations = lambda events: [e.location for e in events]  # noqa: E731
+    assert locations(Event.get_upcoming(session=db_session)) == ["This week", "Next month"]
+    assert locations(Event.get_past(session=db_session)) == ["Today", "Last week", "Last year"]
+    assert locations(Event.get_cancelled(session=db_session)) == ["Rained out", "Closed site"]
+
+
+def test_get_by_bucket_matches_helpers_in_one_query(db_session, mixed_events, count_statements):
+    count_statements.clear()
+    upcoming, past, cancelled = Event.get_by_bucket(session=db_session)
+    assert len(count_statements) == 1
+
+    assert upcoming == Event.get_upcoming(session=db_session)
+    assert past == Event.get_past(session=db_session)
+    assert cancelled == Event.get_cancelled(session=db_session)
+    assert all(e.is_upcoming for e in upcoming)
+    assert not any(e.is_upcoming for e in past)
+
+
+def test_unpadded_dates_are_stored_padded_and_sort_as_dates(db_session):
+    from sqlalchemy import text
+
+    from pack218.entities.models import is_date
+
+    assert is_date("2099-6-1") == "2099-06-01"
+    db_session.add_all([
+        Event(date="2099-10-1", location="October"),
+        Event(date="2099-9-15", location="September"),
+    ])
+    db_session.commit()
+
+    stored = db_session.execute(text("SELECT date FROM event ORDER BY date")).scalars().all()
+    assert stored == ["2099-09-15", "2099-10-01"]
+    assert [e.location for e in Event.get_upcoming(session=db_session)] == ["September", "October"]
+
+
+def test_event_date_is_stored_as_native_date(db_session, camporee):
+    from datetime import date
+    from sqlalchemy import text
+
+    stored = db_session.execute(text("SELECT date FROM event WHERE id = :id"), {"id": camporee.id}).scalar_one()
+    assert stored == "2026-06-01"
+    assert Event.__table__.c.date.type.impl.python_type is date
+
+    db_session.expunge_all()
+    assert db_session.get(Event, camporee.id).date == "2026-06-01"
+
+
+def test_event_date_rejects_non_iso_strings(db_session):
+    from sqlalchemy.exc import StatementError
+
+    db_session.add(Event(date="06/01/2026", location="Nowhere"))
+    with pytest.raises(StatementError):
+        db_session.commit()
+    db_session.rollback()
@@ -42,3 +42,93 @@ def test_user_update_password_new_no_match(user: User):
     # Validate that we raise the correct exception when the current password is wrong
     with pytest.raises(InvalidNewPasswordException):
         user.update_password("test2", "test3", "test4")
+
+
+@pytest.fixture
+def fresh_current_user_cache():
+    from pack218.entities.models import current_user_cache
+    token = current_user_cache.set(None)
+    yield
+    current_user_cache.reset(token)
+
+
+def _request_for(email):
+    from types import SimpleNamespace
+    return SimpleNamespace(session={"user": {"email": email}})
+
+
+def test_get_current_queries_once_per_request(db_session, fresh_current_user_cache, count_statements):
+    db_session.add(User(first_name="Ada", last_name="Admin", email="ada@example.com", is_admin=True))
+    db_session.commit()
+    count_statements.clear()
+    request = _request_for("ada@example.com")
+    user = User.get_current(request=request, session=db_session)
+    assert User.get_current(request=request, session=db_session) is user
+    assert User.current_user_is_admin(request=request, session=db_session)
+    assert User.current_user_is_admin(request=request)
+    assert len(count_statements) == 1
+
+    # A new request resolves the user again.
+    User.get_current(request=_request_for("ada@example.com"), session=db_session)
+    assert len(count_statements) == 2
+
+
+def test_get_current_does_not_reuse_user_from_another_session(db_session, fresh_current_user_cache):
+    from sqlmodel import Session
+
+    db_session.add(User(first_name="Ada", last_name="Admin", email="ada@example.com"))
+    db_session.commit()
+    request = _request_for("ada@example.com")
+    first = User.get_current(request=request, session=db_session)
+
+    with Session(db_session.get_bind()) as other:
+        second = User.get_current(request=request, session=other)
+        assert second is not first
+        assert second in other
+        assert second.id == first.id
+
+
+def _select_user(first_name):
+    from sqlmodel import select
+    return select(User).where(User.first_name == first_name)
+
+
+def test_get_all_from_family_uses_the_identity_map(db_session, count_statements):
+    from pack218.entities.models import Family
+
+    chen = Family(family_name="Chen")
+    db_session.add(chen)
+    db_session.commit()
+    db_session.add_all([
+        User(first_name="Sarah", last_name="Chen", family_id=chen.id),
+        User(first_name="Liam", last_name="Chen", family_id=chen.id),
+        User(first_name="Noah", last_name="Solo"),
+    ])
+    db_session.commit()
+    sarah = db_session.exec(_select_user("Sarah")).one()
+    assert sorted(u.first_name for u in sarah.get_all_from_family(session=db_session)) == ["Liam", "Sarah"]
+
+    count_statements.clear()
+    for _ in range(3):
+        assert len(sarah.get_all_from_family(session=db_session)) == 2
+    assert sarah.family_size == 2
+    assert count_statements == []
+
+    noah = db_session.exec(_select_user("Noah")).one()
+    assert noah.get_all_from_family(session=db_session) == [noah]
+
+
+def test_get_all_from_family_for_detached_user(db_session):
+    from pack218.entities.models import Family
+
+    chen = Family(family_name="Chen")
+    db_session.add(chen)
+    db_session.commit()
+    db_session.add_all([User(first_name=n, last_name="Chen", family_id=chen.id) for n in ("Sarah", "Liam")])
+    db_session.commit()
+    sarah = db_session.exec(_select_user("Sarah")).one()
+    db_session.expunge(sarah)
+
+    members = sarah.get_all_from_family(session=db_session)
+    assert sorted(u.first_name for u in members) == ["Liam", "Sarah"]
+    assert all(u in db_session for u in members)
@@ -228,6 +228,25 @@ def test_admin_cannot_change_subject_email(
     assert refreshed.email == "sarah@example.com"
 
 
+def test_blocklist_checks_the_precomputed_diff(
+    db_session, isolated_audit_context, admin_dave, sarah
+):
+    """save() hands its diff to enforcement; the blocklist reads its keys."""
+    from pack218.audit import diff_for, enforce_on_behalf_rules
+
+    current_actor.set(admin_dave.id)
+    current_reason.set("admin attempt")
+
+    sarah.first_name = "Sara"
+    field_changes = diff_for(sarah, "update")
+    enforce_on_behalf_rules(db_session, sarah, "update", field_changes)
+
+    sarah.username = "sarah2"
+    field_changes = diff_for(sarah, "update")
+    with pytest.raises(AuditError, match="username"):
+        enforce_on_behalf_rules(db_session, sarah, "update", field_changes)
+
+
 def test_admin_cannot_promote_subject_to_admin(
     db_session, isolated_audit_context, admin_dave, sarah
 ):
@@ -552,6 +571,79 @@ def test_panel_shows_family_scoped_edits_to_all_members(
     assert rows_sarah[0].entity_name == "Family"
 
 
+def test_panel_does_not_show_family_members_own_records(
+    db_session, isolated_audit_context, admin_dave, sarah, family_chen
+):
+    """A sibling's profile edit shares the family but is not this user's row."""
+    from pack218.pages.on_behalf_panel import _fetch_rows
+
+    kid = User(first_name="Liam", last_name="Chen", family_id=family_chen.id)
+    db_session.add(kid)
+    db_session.commit()
+    db_session.refresh(kid)
+
+    current_actor.set(admin_dave.id)
+    current_reason.set("phone call")
+    kid.first_name = "Liam-Edit"
+    kid.save(session=db_session)
+
+    assert _fetch_rows(session=db_session, current_user=sarah) == []
+    rows = _fetch_rows(session=db_session, current_user=kid)
+    assert [r.subject_family_id for r in rows] == [family_chen.id]
+
+
+def test_panel_keeps_edits_made_before_the_user_joined_a_family(
+    db_session, isolated_audit_context, admin_dave
+):
+    """An admin sets up a family-less parent, who later creates a family."""
+    from pack218.pages.on_behalf_panel import _fetch_rows
+
+    noah = User(first_name="Noah", last_name="Park", email="noah@example.com")
+    db_session.add(noah)
+    db_session.commit()
+    db_session.refresh(noah)
+
+    current_actor.set(admin_dave.id)
+    current_reason.set("Set up at the sign-up table")
+    noah.first_name = "Noah-Edited"
+    noah.save(session=db_session)
+    assert len(_fetch_rows(session=db_session, current_user=noah)) == 1
+
+    current_actor.set(noah.id)
+    current_reason.set(None)
+    park = Family(family_name="Park")
+    park.save(session=db_session)
+    noah.family_id = park.id
+    noah.save(session=db_session)
+
+    # The earlier row was re-stamped with the new family.
+    rows = _fetch_rows(session=db_session, current_user=noah)
+    assert [(r.actor_user_id, r.subject_family_id) for r in rows] == [(admin_dave.id, park.id)]
+
+
+def test_panel_rows_follow_a_user_to_another_family(
+    db_session, isolated_audit_context, admin_dave, sarah, family_chen, family_smith
+):
+    from pack218.pages.on_behalf_panel import _fetch_rows
+
+    current_actor.set(admin_dave.id)
+    current_reason.set("phone call")
+    sarah.first_name = "Sarah-Edited"
+    sarah.save(session=db_session)
+    family_chen.family_name = "Chen-Edited"
+    family_chen.save(session=db_session)
+    assert len(_fetch_rows(session=db_session, current_user=sarah)) == 2
+
+    current_actor.set(sarah.id)
+    current_reason.set(None)
+    sarah.family_id = family_smith.id
+    sarah.save(session=db_session)
+
+    # Her own row moves with her; the Chen family's edit stays with the Chens.
+    rows = _fetch_rows(session=db_session, current_user=sarah)
+    assert [(r.entity_name, r.subject_family_id) for r in rows] == [("User", family_smith.id)]
+
+
 def test_panel_scoped_filter_only_returns_matching_entity(
     db_session, isolated_audit_context, admin_dave, sarah, sarah_registration
 ):
@@ -596,6 +688,25 @@ def test_panel_delete_shows_removal_summary(
     assert "removed" in summary.lower()
 
 
+def test_panel_resolves_actor_names_in_one_query(db_session, admin_dave, sarah, count_statements):
+    from pack218.pages.on_behalf_panel import _actor_labels
+
+    rows = [
+        ActionLog(actor_user_id=actor_id, subject_user_id=sarah.id, entity_name="User",
+                  entity_id=sarah.id, action="update", reason="r")
+        for actor_id in (admin_dave.id, admin_dave.id, 9999, None)
+    ]
+    count_statements.clear()
+    labels = _actor_labels(db_session, rows)
+
+    assert len(count_statements) == 1
+    assert labels == {
+        admin_dave.id: f"{admin_dave.first_name} {admin_dave.last_name}",
+        9999: "User #9999",
+        None: "System",
+    }
+
+
 def test_panel_empty_when_no_on_behalf_edits(db_session, sarah):
     from pack218.pages.on_behalf_panel import _fetch_rows
     rows = _fetch_rows(session=db_session, current_user=sarah)
@@ -744,3 +855,69 @@ def test_self_edit_short_circuit_when_actor_row_missing(
 
     refreshed = db_session.get(User, sarah.id)
     assert refreshed.first_name == "Sarah-Self-Stale"
+
+
+# ---------------------------------------------------------------------------
+# Registration form write batch (runs on the run_db thread pool)
+# ---------------------------------------------------------------------------
+
+
+def test_apply_registration_changes_on_behalf(
+    db_session, isolated_audit_context, admin_dave, sarah, family_chen, sarah_registration, event_camporee
+):
+    from types import SimpleNamespace
+    from pack218.pages.event_registration import apply_registration_changes
+
+    liam = User(first_name="Liam", last_name="Chen", family_id=family_chen.id)
+    db_session.add(liam)
+    db_session.commit()
+    db_session.add(EventRegistration(user_id=liam.id, event_id=event_camporee.id, stay_friday_night=True))
+    db_session.commit()
+    fields = ["stay_friday_night", "eat_saturday_breakfast"]
+
+    results = apply_registration_changes(
+        db_session,
+        request=SimpleNamespace(session={"user": {"email": admin_dave.email}}),
+        event_id=event_camporee.id,
+        selections={
+            sarah.id: dict(zip(fields, [True, False])),
+            liam.id: dict.fromkeys(fields, False),
+        },
+        reason="Called the Chens",
+    )
+
+    assert results == [
+        ("saved", "☑️ Registration saved for Sarah."),
+        ("removed", "❌ Liam's registration was removed."),
+    ]
+    assert current_reason.get() is None
+    rows = db_session.exec(
+        select(ActionLog).where(ActionLog.entity_name == "EventRegistration").order_by(ActionLog.id)
+    ).all()
+    assert sorted((row.action, row.actor_user_id, row.reason) for row in rows) == [
+        ("delete", admin_dave.id, "Called the Chens"),
+        ("update", admin_dave.id, "Called the Chens"),
+    ]
+
+
+def test_save_family_registration_rejects_per_member(
+    db_session, isolated_audit_context, admin_dave, admin_lisa, sarah, event_camporee
+):
+    # Dave registers Sarah on her behalf, but may not touch fellow admin Lisa.
+    current_actor.set(admin_dave.id)
+    current_reason.set("Phone registration")
+
+    outcomes = EventRegistration.save_family_registration(
+        session=db_session,
+        event_id=event_camporee.id,
+        selections={sarah.id: {"stay_friday_night": True}, admin_lisa.id: {"stay_friday_night": True}},
+    )
+
+    assert outcomes == [
+        (sarah.id, "saved", None),
+        (admin_lisa.id, "rejected", "On-behalf-of edits cannot target another admin's record"),
+    ]
+    registered = db_session.exec(
+        select(EventRegistration.user_id).where(EventRegistration.event_id == event_camporee.id)
+    ).all()
+    assert registered == [sarah.id]
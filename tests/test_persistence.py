@@ -0,0 +1,275 @@
+"""Tests for the engine's pool instrumentation."""
+import importlib
+
+import pytest
+from sqlalchemy import create_engine, text
+from sqlalchemy.exc import TimeoutError as PoolTimeoutError
+
+from pack218.persistence.engine import PoolMetrics, TimedQueuePool
+
+# pack218.persistence re-exports the Engine object under the module's name.
+engine_module = importlib.import_module("pack218.persistence.engine")
+
+
+@pytest.fixture
+def fresh_pool_metrics(monkeypatch):
+    metrics = PoolMetrics()
+    monkeypatch.setattr(engine_module, "pool_metrics", metrics)
+    return metrics
+
+
+def test_timed_pool_records_checkouts_and_timeouts(tmp_path, fresh_pool_metrics):
+    engine = create_engine(
+        f"sqlite:///{tmp_path / 'pool.db'}",
+        poolclass=TimedQueuePool, pool_size=1, max_overflow=0, pool_timeout=0.05,
+    )
+    with engine.connect() as conn:
+        conn.execute(text("SELECT 1"))
+        with pytest.raises(PoolTimeoutError):
+            engine.connect()
+    with engine.connect():
+        pass
+
+    assert fresh_pool_metrics.checkouts == 2
+    assert fresh_pool_metrics.timeouts == 1
+    assert fresh_pool_metrics.max_wait_s < 0.05
+    engine.dispose()
+
+
+def test_pool_stats_reports_occupancy(fresh_pool_metrics):
+    fresh_pool_metrics.record(0.002)
+    fresh_pool_metrics.record(0.004)
+    stats = engine_module.pool_stats()
+    # Both engines (sync and async) have a pool of db_pool_size.
+    assert stats["pool_size"] == 2 * engine_module.config.db_pool_size
+    assert stats["checkouts"] == 2
+    assert stats["avg_wait_ms"] == pytest.approx(3.0)
+    assert stats["max_wait_ms"] == pytest.approx(4.0)
+
+
+def test_apply_sqlite_pragmas(tmp_path):
+    import sqlite3
+
+    conn = sqlite3.connect(tmp_path / "pragmas.db")
+    engine_module.apply_sqlite_pragmas(conn, configs=engine_module.config.model_copy(update={
+        "sqlite_busy_timeout_ms": 1234,
+        "sqlite_foreign_keys": True,
+    }))
+    pragma = lambda name: conn.execute(f"PRAGMA {name}").fetchone()[0]  # noqa: E731
+    assert pragma("journal_mode") == "wal"
+    assert pragma("synchronous") == 1  # NORMAL
+    assert pragma("busy_timeout") == 1234
+    assert pragma("temp_store") == 2  # MEMORY
+    assert pragma("cache_size") == -64000
+    assert pragma("foreign_keys") == 1
+    conn.close()
+
+
+@pytest.fixture
+def async_db(tmp_path):
+    """An AsyncSession factory over a fresh SQLite file, via aiosqlite."""
+    import asyncio
+    from sqlalchemy.ext.asyncio import create_async_engine
+    from sqlmodel import SQLModel
+    from sqlmodel.ext.asyncio.session import AsyncSession
+
+    async_engine = create_async_engine(f"sqlite+aiosqlite:///{tmp_path / 'async.db'}")
+
+    async def create_all():
+        async with async_engine.begin() as conn:
+            await conn.run_sync(SQLModel.metadata.create_all)
+
+    asyncio.run(create_all())
+    yield lambda: AsyncSession(async_engine, expire_on_commit=False)
+    asyncio.run(async_engine.dispose())
+
+
+def test_async_model_methods_run_the_sync_write_path(async_db, isolated_audit_context):
+    import asyncio
+    from pack218.entities.models import Event, EventRegistration, Family, User
+
+    async def scenario():
+        async with async_db() as session:
+            event = Event(date="2026-06-01", location="Camp Emerald", capacity=1)
+            await event.asave(session=session)
+            registrations = []
+            for name in ("Chen", "Smith"):
+                family = Family(family_name=name)
+                await family.asave(session=session)
+                user = User(first_name=name, last_name=name, family_id=family.id)
+                await user.asave(session=session)
+                registration = EventRegistration(user_id=user.id, event_id=event.id)
+                await registration.asave(session=session)
+                registrations.append(registration)
+
+            # after_write ran inside the async save and waitlisted the second family.
+            loaded = await EventRegistration.aget_by_id(registrations[1].id, session=session)
+            assert loaded.waitlist_position == 1
+            assert [e.location for e in await Event.aget_all(session=session)] == ["Camp Emerald"]
+
+            await EventRegistration.adelete_by_id(registrations[0].id, session=session)
+            assert await EventRegistration.aget_by_id(registrations[0].id, session=session) is None
+            promoted = await EventRegistration.aget_by_id(registrations[1].id, session=session)
+            assert promoted.waitlist_position is None
+
+    asyncio.run(scenario())
+
+
+def test_run_in_session_awaits_through_the_async_session(async_db):
+    import asyncio
+    from sqlmodel import Session
+    from pack218.persistence import run_in_session
+
+    async def scenario():
+        async with async_db() as session:
+            session.sync_session.info["async_session"] = session
+            count = await run_in_session(
+                session.sync_session, lambda s, sql: s.exec(text(sql)).scalar_one(), "SELECT 41 + 1",
+            )
+            assert count == 42
+
+    asyncio.run(scenario())
+
+    # A plain Session is simply called.
+    with Session(create_engine("sqlite://")) as plain:
+        assert asyncio.run(run_in_session(plain, lambda s: s.exec(text("SELECT 7")).scalar_one())) == 7
+
+
+def test_run_db_runs_off_loop_with_the_callers_context(isolated_audit_context):
+    import asyncio
+    import threading
+    from sqlmodel import Session
+    from pack218.audit import current_actor
+    from pack218.persistence import run_db
+
+    def work(session, multiplier):
+        return threading.current_thread().name, current_actor.get() * multiplier, isinstance(session, Session)
+
+    async def scenario():
+        current_actor.set(21)
+        return await run_db(work, multiplier=2)
+
+    thread_name, value, got_session = asyncio.run(scenario())
+    assert thread_name.startswith("pack218-db")
+    assert value == 42
+    assert got_session
+
+
+@pytest.fixture
+def traced_engine(monkeypatch):
+    from pack218 import instrumentation
+
+    monkeypatch.setattr(instrumentation, "_route_stats", {})
+    engine = create_engine("sqlite://")
+    instrumentation.instrument_engine(engine)
+    yield engine
+    engine.dispose()
+
+
+def test_request_trace_counts_statements_per_route(traced_engine, monkeypatch, caplog):
+    from pack218.instrumentation import request_trace, route_stats
+
+    monkeypatch.setattr(engine_module.config, "perf_max_queries_per_request", 2)
+    with traced_engine.connect() as conn:
+        conn.execute(text("SELECT 1"))  # outside any request: not counted
+        with request_trace("/camping-trip/{event_id}") as trace:
+            conn.execute(text("SELECT 1"))
+            conn.execute(text("WITH RECURSIVE n(i) AS (SELECT 1 UNION ALL SELECT i + 1 FROM n WHERE i < 20000) "
+                              "SELECT count(*) FROM n"))
+            conn.execute(text("SELECT 3"))
+        with request_trace("/camping-trip/{event_id}"):
+            conn.execute(text("SELECT 4"))
+
+    assert trace.queries == 3
+    assert trace.slowest_sql.startswith("WITH RECURSIVE")
+    [stats] = route_stats()
+    assert (stats.route, stats.requests, stats.total_queries, stats.max_queries) == ("/camping-trip/{event_id}", 2, 4, 3)
+    assert stats.slow_requests == 1
+    assert stats.total_db_s >= stats.slowest_s > 0
+    assert "/camping-trip/{event_id}: " in caplog.text and "3 SQL statements" in caplog.text
+
+
+def test_tracing_middleware_groups_requests_by_route_template(traced_engine):
+    from starlette.applications import Starlette
+    from starlette.responses import PlainTextResponse
+    from starlette.routing import Route
+    from starlette.testclient import TestClient
+
+    from pack218.instrumentation import RequestTracingMiddleware, route_stats
+
+    def item(request):
+        with traced_engine.connect() as conn:
+            for _ in range(int(request.path_params["n"])):
+                conn.execute(text("SELECT 1"))
+        return PlainTextResponse("ok")
+
+    app = Starlette(routes=[Route("/items/{n}", item)])
+    app.add_middleware(RequestTracingMiddleware)
+    with TestClient(app) as client:
+        for path in ("/items/2", "/items/4", "/nope", "/_nicegui/static/app.js"):
+            client.get(path)
+
+    stats = {s.route: (s.requests, s.total_queries) for s in route_stats()}
+    assert stats == {"/items/{n}": (2, 6), "(unmatched)": (1, 0)}
+
+
+def test_render_metrics_exports_histograms_counters_and_waitlists(db_session, monkeypatch):
+    from pack218 import instrumentation
+    from pack218.entities.models import Event, EventRegistration, Family, User
+    from pack218.metrics import render_metrics
+
+    monkeypatch.setattr(instrumentation, "_route_stats", {})
+    monkeypatch.setattr(instrumentation, "_save_latency", {})
+    monkeypatch.setattr(instrumentation, "_audit_rows_written", 0)
+    with instrumentation.request_trace("/events"):
+        pass
+    # Events on "today" count as past, as on the home page.
+    monkeypatch.setattr(Event, "_today", staticmethod(lambda: "2099-01-01"))
+    upcoming = Event(date="2099-06-01", location="Camp Emerald", capacity=1)
+    today = Event(date="2099-01-01", location="Camp Emerald", capacity=1)
+    past = Event(date="2000-06-01", location="Camp Emerald", capacity=1)
+    db_session.add_all([upcoming, today, past])
+    db_session.commit()
+    for name in ("Chen", "Smith"):
+        family = Family(family_name=name)
+        db_session.add(family)
+        db_session.commit()
+        user = User(first_name=name, last_name=name, family_id=family.id)
+        db_session.add(user)
+        db_session.commit()
+        EventRegistration(user_id=user.id, event_id=upcoming.id).save(session=db_session)
+
+    lines = render_metrics(db_session).splitlines()
+
+    assert "# TYPE pack218_request_duration_seconds histogram" in lines
+    assert 'pack218_request_duration_seconds_count{route="/events"} 1' in lines
+    assert 'pack218_request_duration_seconds_bucket{route="/events",le="+Inf"} 1' in lines
+    buckets = [int(line.rsplit(" ", 1)[1]) for line in lines
+               if line.startswith('pack218_save_duration_seconds_bucket{entity="EventRegistration"')]
+    assert len(buckets) == len(instrumentation.LATENCY_BUCKETS_S) + 1
+    assert buckets == sorted(buckets) and buckets[-1] == 2
+    assert "# TYPE pack218_db_pool_checkouts_total counter" in lines
+    assert int(next(line for line in lines if line.startswith("pack218_audit_rows_written_total ")).split()[1]) > 0
+    waitlists = [line for line in lines if line.startswith("pack218_event_waitlist_size{")]
+    assert waitlists == [f'pack218_event_waitlist_size{{event_id="{upcoming.id}",date="2099-06-01"}} 1']
+
+
+def test_audit_rows_are_counted_only_once_committed(db_session, monkeypatch):
+    from pack218 import instrumentation
+    from pack218.audit.hooks import record_change, record_changes
+    from pack218.entities.models import Family
+
+    monkeypatch.setattr(instrumentation, "_audit_rows_written", 0)
+    family = Family(family_name="Chen")
+    db_session.add(family)
+    db_session.commit()
+
+    record_change(db_session, family, "update", {"family_name": ["Chen", "Chen-Smith"]})
+    record_changes(db_session, [(family, "update", {"family_name": ["Chen-Smith", "Chen"]})])
+    assert instrumentation.audit_rows_written() == 0
+    db_session.rollback()
+    assert instrumentation.audit_rows_written() == 0
+
+    record_changes(db_session, [(family, "update", {"family_name": ["Chen", "Smith"]})] * 2)
+    db_session.commit()
+    assert instrumentation.audit_rows_written() == 2